@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
-import math
 import time
 
 import client as ct
-import ast
-import matplotlib.pyplot as plt
-import networkx as nx
-from hierarchy_pos import hierarchy_pos
+from move_ordering import KillerTargets
+from tracing import NetworkXTracer
+from tree_log import TreeRecorder
 
 
 action_dict = {
@@ -20,14 +18,13 @@ action_dict = {
 instances = 1
 
 
-def result(state, action, graph):
+def result(state, action):
     """Defines the state that results from doing a certain action in a certain state.
     In other words, it is the transition model.
 
     Parameters:
         state (dict): state description dictionary
         action (string): action description string
-        graph (networkx.Graph): graph, used for visualization, may be None.
 
     Returns:
         state(dict): state description dictionary of the resulting state
@@ -39,12 +36,6 @@ def result(state, action, graph):
     if state["agent_id"] == 1:
         new_state["round"] += 1
 
-    if graph is not None:
-        new_state["node_name"] = state["node_name"]+str(new_state["agent_id"])+action  # NetworkX
-        # print(new_state["node_name"])  # NetworkX
-        graph.add_node(new_state["node_name"], **new_state)  # NetworkX
-        graph.add_edge(new_state["node_name"], state["node_name"], action=action)  # NetworkX
-
     global instances
     instances += 1
     return new_state
@@ -131,12 +122,10 @@ def killer_moves(state, action):
         turn, returns the Manhattan distance from position that results from the action to the goal.
     """
     min_pos = state["agents"][0]
-    closest_goal = sorted(state["goals"], key=lambda x: manhattan_distance(x, min_pos))[0]
+    closest_goal, _, goal_adjacent_pos = KillerTargets.for_goals(state["goals"]).lookup(min_pos)
     if state["agent_id"] == 0:
         hypothetical_pos = (state["agents"][1][0] + action_dict[action][0],
                             state["agents"][1][1] + action_dict[action][1])
-        goal_adjacent_pos = sorted([(closest_goal[0]+i, closest_goal[1]+j) for i, j in action_dict.values()],
-                                   key=lambda x: manhattan_distance(x,min_pos))[0]
         return manhattan_distance(hypothetical_pos, goal_adjacent_pos)
     else:
         hypothetical_pos = (min_pos[0] + action_dict[action][0], min_pos[1] + action_dict[action][1])
@@ -156,19 +145,11 @@ def killer_moves2(state, action):
             the goal.
         """
     min_pos = state["agents"][0]
-    closest_goal = min(state["goals"], key=lambda x: manhattan_distance(x, min_pos))
+    closest_goal, blocking_target, _ = KillerTargets.for_goals(state["goals"]).lookup(min_pos)
     if state["agent_id"] == 0:
         hypothetical_pos = (state["agents"][1][0] + action_dict[action][0],
                             state["agents"][1][1] + action_dict[action][1])
-        dx, dy = closest_goal[0]-min_pos[0], closest_goal[1]-min_pos[1]
-        if dx >= 0 and dx >= abs(dy):
-            return manhattan_distance(hypothetical_pos, (closest_goal[0] + 1, closest_goal[1]))
-        if dx <= 0 and dx >= abs(dy):
-            return manhattan_distance(hypothetical_pos, (closest_goal[0] - 1, closest_goal[1]))
-        if dy >= 0 and dx < abs(dy):
-            return manhattan_distance(hypothetical_pos, (closest_goal[0], closest_goal[1] + 1))
-        if dy <= 0 and dx < abs(dy):
-            return manhattan_distance(hypothetical_pos, (closest_goal[0], closest_goal[1] - 1))
+        return manhattan_distance(hypothetical_pos, blocking_target)
     else:
         hypothetical_pos = (min_pos[0] + action_dict[action][0],
                             min_pos[1] + action_dict[action][1])
@@ -188,7 +169,7 @@ def actions(state):
     return sorted(actions, key=lambda x: killer_moves2(state, x))  # Comment out for naive Alpha-beta pruning
 
 
-def max_value(state, alpha, beta, rounds, graph, action):
+def max_value(state, alpha, beta, rounds, tracer, action):
     """Explores, in a tree-like fashion, the outcomes of all possible actions in a state from the perspective of the
     minimizing player, without ever exploring the outcomes that could have no influence on the final decision.
 
@@ -196,7 +177,8 @@ def max_value(state, alpha, beta, rounds, graph, action):
         state (dict): state description dictionary
         alpha (int): the value of the best choice found so far in the path for the maximizing player
         beta (int): the value of the best choice found so far in the path for the minimizing player
-        graph (networkx.Graph): graph, used for visualization, may be None
+        rounds (int): number of rounds the minimizing player has to reach the goal
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
         action (str): the action that resulted in the state that the function is given
 
     Returns:
@@ -205,28 +187,30 @@ def max_value(state, alpha, beta, rounds, graph, action):
         minimizing player.
     """
     action = action
+    if tracer is not None:
+        tracer.on_enter(state, action, alpha, beta)
     if terminal_test(state, rounds):
-        if graph is not None:
-            state["value"] = utility(state, rounds) # NetworkX
-            graph.nodes[state["node_name"]]["value"] = utility(state, rounds)  # NetworkX
+        if tracer is not None:
+            tracer.on_terminal(utility(state, rounds))
         return action, utility(state, rounds)
     value = -1000
     for a in actions(state):
         action, value = max((action, value),
-                            (a, min_value(result(state, a, graph), alpha, beta, rounds, graph, a)[1]),
+                            (a, min_value(result(state, a), alpha, beta, rounds, tracer, a)[1]),
                             key=lambda x: x[1])
         if value >= beta:
+            if tracer is not None:
+                tracer.on_cutoff(a, alpha, beta)
+                tracer.on_exit(value)
             return action, value
         alpha = max(alpha, value)
 
-    if graph is not None:
-        state["value"] = value # NetworkX
-        graph.nodes[state["node_name"]]["value"] = value  # NetworkX
-
+    if tracer is not None:
+        tracer.on_exit(value)
     return action, value
 
 
-def min_value(state, alpha, beta, rounds, graph, action):
+def min_value(state, alpha, beta, rounds, tracer, action):
     """Explores, in a tree-like fashion, the outcomes of all possible actions in a state from the perspective of the
     minimizing player, without ever exploring the outcomes that could have no influence on the final decision.
 
@@ -234,7 +218,8 @@ def min_value(state, alpha, beta, rounds, graph, action):
         state (dict): state description dictionary
         alpha (int): the value of the best choice found so far in the path for the maximizing player
         beta (int): the value of the best choice found so far in the path for the minimizing player
-        graph (networkx.Graph): graph, used for visualization, may be None
+        rounds (int): number of rounds the minimizing player has to reach the goal
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
         action (str): the action that resulted in the state that the function is given
 
     Returns:
@@ -244,27 +229,30 @@ def min_value(state, alpha, beta, rounds, graph, action):
     """
 
     action = action
+    if tracer is not None:
+        tracer.on_enter(state, action, alpha, beta)
     if terminal_test(state, rounds):
-        if graph is not None:
-            state["value"] = utility(state, rounds)  # NetworkX
-            graph.nodes[state["node_name"]]["value"] = utility(state, rounds)  # NetworkX
+        if tracer is not None:
+            tracer.on_terminal(utility(state, rounds))
         return action, utility(state, rounds)
     value = 1000
     for a in actions(state):
         action, value = min((action, value),
-                            (a, max_value(result(state, a, graph), alpha, beta, rounds, graph, a)[1]),
+                            (a, max_value(result(state, a), alpha, beta, rounds, tracer, a)[1]),
                             key=lambda x: x[1])
         if value <= alpha:
+            if tracer is not None:
+                tracer.on_cutoff(a, alpha, beta)
+                tracer.on_exit(value)
             return action, value
         beta = min(beta, value)
 
-    if graph is not None:
-        state["value"] = value  # NetworkX
-        graph.nodes[state["node_name"]]["value"] = value  # NetworkX
+    if tracer is not None:
+        tracer.on_exit(value)
     return action, value
 
 
-def alpha_beta_search(state, rounds, graph=None):
+def alpha_beta_search(state, rounds, tracer=None):
     """Returns the action description string that corresponds to the best action the agent can execute, that is, to the
     action that leads to the outcome with the best utility for the agent, assuming the adversary wants to minimize it.
     This search is optimized using a technique called alpha-beta pruning, a technique that prevents the minimax
@@ -272,51 +260,20 @@ def alpha_beta_search(state, rounds, graph=None):
 
     Parameters:
         state (dict): state description dictionary. The state of the environment before the agent moves.
-        graph (Graph or None): graph for visualization
+        rounds (int): number of rounds the minimizing player has to reach the goal
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
 
     Returns:
         (str): the action description string.
     """
 
-
-    if graph is not None:
-        graph.add_node("root", **state)
-    a, v = max_value(state, -1000, 1000, rounds, graph, "stay")
-
-    if graph is not None:
-        labels = nx.get_node_attributes(graph, "value")
-        edge_labels = nx.get_edge_attributes(graph, "action")
-        # print(edge_labels)
-        plt.figure(figsize=(20, 20))
-
-        pos = hierarchy_pos(graph, "root", width=2 * math.pi, xcenter=0)
-        new_pos = {u: (r * math.cos(theta), r * math.sin(theta)) for u, (theta, r) in pos.items()}
-
-        nx.draw(graph, new_pos, node_size=20, alpha=0.5, node_color="blue", labels=labels)
-        nx.draw_networkx_edge_labels(graph, new_pos, edge_labels=edge_labels)
-        plt.axis("equal")
-        plt.show()
-
+    if tracer is not None:
+        tracer.new_search()
+    a, v = max_value(state, -1000, 1000, rounds, tracer, "stay")
     return a
 
 
-def parse_last_dict(bad_string):
-    """Returns the string that corresponds to the last open and closed curly brackets.
-    This is necessary due to the way the server/client interaction works, so as to identify the last server response.
-    Ideally, this would be unnecessary, but this had to be implemented due to time restrictions that prevented the group
-    from exploring the software.
-
-    Parameters:
-        bad_string (str): the string to parse
-
-    Returns:
-        (str): the resulting good string
-
-    """
-    return bad_string[bad_string.rindex("{"):]
-
-
-def main(rounds=5, visualization=False):
+def main(rounds=5, visualization=False, log_path=None):
     """Game loop. Creates two clients and cycles between them.
     The first client is the minimizing player, or the human,
     and so the program waits for user input and sends the corresponding action value pair to the server.
@@ -324,7 +281,10 @@ def main(rounds=5, visualization=False):
     minimax algorithm with alpha-beta pruning and sends the corresponding action value pair to the server.
 
     Parameters:
-        None
+        rounds (int): number of rounds the minimizing player has to reach the goal
+        visualization (bool): whether or not the search tree of every move is drawn to search_tree_round_<round>.png,
+        once the move is sent, which needs the whole tree in memory
+        log_path (str or None): the file the search trees of the whole game are recorded to instead (see tree_log.py)
 
     Returns:
         None
@@ -334,31 +294,35 @@ def main(rounds=5, visualization=False):
     res_min = client_min.connect()
     res_max = client_max.connect()
     if all(res != -1 for res in (res_min, res_max)):
+        recorder = TreeRecorder(log_path) if log_path is not None else None
         print("Round: 1")
         while True:
             action, value = input("Min > ").split(" ")
             client_min.execute(action, value)
 
-            state = ast.literal_eval(parse_last_dict(client_max.receiveData()))
-            state["node_name"] = "root"
+            state = client_max.receive_state()
 
             start = time.perf_counter()
-            g = nx.Graph() if visualization else None
-            value = alpha_beta_search(state, rounds, g)
+            tracer = recorder or (NetworkXTracer() if visualization else None)
+            value = alpha_beta_search(state, rounds, tracer)
             stop = time.perf_counter()
 
             print("Max >", action, value)
             global instances
             print("Elapsed time:", stop - start, "Generated nodes:", instances)
-            if visualization:
-                print("Graph nodes: ",g.number_of_nodes())
+            if isinstance(tracer, NetworkXTracer):
+                print("Graph nodes: ", tracer.graph.number_of_nodes())
             client_max.execute("command", value)
+            if isinstance(tracer, NetworkXTracer):
+                tracer.draw("search_tree_round_%d.png" % state["round"])
 
-            if terminal_test(result(state, value, None), rounds):
+            if terminal_test(result(state, value), rounds):
                 input("O jogo terminou.")
                 break
             instances = 1
             print("Round: ",state["round"]+1)
+        if recorder is not None:
+            recorder.close()
 
 if __name__=="__main__":
     main(rounds=5, visualization=True)
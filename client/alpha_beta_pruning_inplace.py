@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+import alpha_beta_pruning
+from move_ordering import KillerTargets
+
+action_list = tuple(alpha_beta_pruning.action_dict.items())
+
+instances = 1
+
+
+def prepare(state):
+    """Builds the single state the search mutates from a state description dictionary, which is left untouched, and
+    precomputes what the search needs to know about the board
+
+    Parameters:
+        state (dict): state description dictionary
+
+    Returns:
+        (dict): the search state
+    """
+    obstacles = state["obstacles"]
+    return {
+        "agent_id": state["agent_id"],
+        "agents": [tuple(state["agents"][0]), tuple(state["agents"][1])],
+        "round": state["round"],
+        "obstacles": obstacles,
+        "goals": {tuple(goal) for goal in state["goals"]},
+        "columns": len(obstacles),
+        "rows": len(obstacles[0]),
+        "killer_targets": KillerTargets.for_goals(state["goals"]),
+    }
+
+
+def make_move(state, action):
+    """Performs an action of the next player on the search state, in place. Like alpha_beta_pruning.result, the new
+    position is not wrapped around the edges of the board.
+
+    Parameters:
+        state (dict): search state
+        action (str): action description string
+
+    Returns:
+        (tuple): the position the player had before the action, to give to unmake_move
+    """
+    global instances
+    instances += 1
+    mover = 1 - state["agent_id"]
+    agents = state["agents"]
+    previous_pos = agents[mover]
+    dx, dy = alpha_beta_pruning.action_dict[action]
+    agents[mover] = (previous_pos[0] + dx, previous_pos[1] + dy)
+    state["agent_id"] = mover
+    if mover == 0:
+        state["round"] += 1
+    return previous_pos
+
+
+def unmake_move(state, previous_pos):
+    """Takes back the last action performed on the search state
+
+    Parameters:
+        state (dict): search state
+        previous_pos (tuple): the value make_move returned for that action
+    """
+    mover = state["agent_id"]
+    state["agents"][mover] = previous_pos
+    if mover == 0:
+        state["round"] -= 1
+    state["agent_id"] = 1 - mover
+
+
+def actions(state):
+    """Returns the actions the next player is allowed to do, in the order given by alpha_beta_pruning.killer_moves2
+
+    Parameters:
+        state (dict): search state
+
+    Returns:
+        list: list of strings representing actions ("north", "south", "east", "west", "stay")
+    """
+    agent_id = state["agent_id"]
+    agents = state["agents"]
+    self_pos, other_pos = agents[1 - agent_id], agents[agent_id]
+    columns, rows, obstacles, goals = state["columns"], state["rows"], state["obstacles"], state["goals"]
+    closest_goal, blocking_target, _ = state["killer_targets"].lookup(agents[0])
+    target = blocking_target if agent_id == 0 else closest_goal
+
+    ranked = []
+    for index, (action, (dx, dy)) in enumerate(action_list):
+        x, y = self_pos[0] + dx, self_pos[1] + dy
+        destination = (x % columns, y % rows)
+        if obstacles[destination[0]][destination[1]] != 0 or destination == other_pos or \
+                (agent_id == 0 and destination in goals):
+            continue
+        ranked.append((abs(target[0] - x) + abs(target[1] - y), index, action))
+    ranked.sort()
+    return [action for _, _, action in ranked]
+
+
+def max_value(state, alpha, beta, rounds):
+    """Value of the search state, in which the maximizing player is the next to play, according to the minimax
+    algorithm with alpha-beta pruning (see alpha_beta_pruning.max_value)
+
+    Parameters:
+        state (dict): search state
+        alpha (int): the value of the best choice found so far in the path for the maximizing player
+        beta (int): the value of the best choice found so far in the path for the minimizing player
+        rounds (int): number of rounds the minimizing player has to reach the goal
+
+    Returns:
+        (int): the value of the state, from the perspective of the minimizing player
+    """
+    if state["agents"][0] in state["goals"]:
+        return 0
+    if state["round"] >= rounds:
+        return 1
+    value = -1000
+    for a in actions(state):
+        previous_pos = make_move(state, a)
+        v = min_value(state, alpha, beta, rounds)
+        unmake_move(state, previous_pos)
+        if v > value:
+            value = v
+            if value >= beta:
+                return value
+            if value > alpha:
+                alpha = value
+    return value
+
+
+def min_value(state, alpha, beta, rounds):
+    """Value of the search state, in which the minimizing player is the next to play, according to the minimax
+    algorithm with alpha-beta pruning (see alpha_beta_pruning.min_value)
+
+    Parameters:
+        state (dict): search state
+        alpha (int): the value of the best choice found so far in the path for the maximizing player
+        beta (int): the value of the best choice found so far in the path for the minimizing player
+        rounds (int): number of rounds the minimizing player has to reach the goal
+
+    Returns:
+        (int): the value of the state, from the perspective of the minimizing player
+    """
+    if state["agents"][0] in state["goals"]:
+        return 0
+    if state["round"] >= rounds:
+        return 1
+    value = 1000
+    for a in actions(state):
+        previous_pos = make_move(state, a)
+        v = max_value(state, alpha, beta, rounds)
+        unmake_move(state, previous_pos)
+        if v < value:
+            value = v
+            if value <= alpha:
+                return value
+            if value < beta:
+                beta = value
+    return value
+
+
+def alpha_beta_search(state, rounds, tracer=None):
+    """Returns the action description string that corresponds to the best action the agent can execute, like
+    alpha_beta_pruning.alpha_beta_search, including the way ties are broken. Instead of building a new state description
+    dictionary for every node, the search performs and takes back the actions on a single state. Tracers may keep the
+    states they are given, so when a tracer is given the search is left to alpha_beta_pruning.
+
+    Parameters:
+        state (dict): state description dictionary. The state of the environment before the agent moves.
+        rounds (int): number of rounds the minimizing player has to reach the goal
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
+
+    Returns:
+        (str): the action description string.
+    """
+    if tracer is not None:
+        return alpha_beta_pruning.alpha_beta_search(state, rounds, tracer)
+
+    state = prepare(state)
+    action = "stay"
+    if state["agents"][0] in state["goals"] or state["round"] >= rounds:
+        return action
+    value, alpha = -1000, -1000
+    for a in actions(state):
+        previous_pos = make_move(state, a)
+        v = min_value(state, alpha, 1000, rounds)
+        unmake_move(state, previous_pos)
+        if v > value:
+            action, value = a, v
+            if value > alpha:
+                alpha = value
+    return action
@@ -1,21 +1,35 @@
 #!/usr/bin/env python3
-import math
 import client as ct
-import ast
-import matplotlib.pyplot as plt
-import networkx as nx
-from hierarchy_pos import hierarchy_pos
+import bitboard
+from move_tables import build_move_tables
+from move_ordering import KillerTargets, MoveHistory
+from distance_oracle import DistanceOracle
+from proof_number_search import ProofNumberSearch
+from tablebase import Tablebase
+from tracing import CountingTracer, NetworkXTracer
+from transposition_table import TranspositionTable, EXACT, LOWER, UPPER
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import copy
 import time
 
 import time
 
 
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget for the current move runs out"""
+
+
 class State:
     """Represents a node in the minimax decision tree and a possible state of the game at a given (hypothetical)
     time"""
 
+    __slots__ = ("is_max_turn", "min_pos", "max_pos", "round")
+
     instances = 0
 
+    # Receives the events of the search when attached (see tracing.py)
+    tracer = None
+
     action_offset = {
         "stay": (0, 0),
         "north": (0, -1),
@@ -27,43 +41,69 @@ class State:
     goal_positions = None
     max_rounds = None
     obstacle_matrix = None
+    move_table = None
+    killer_targets = None
+    distance_oracle = None
+    ordering = "distance"
+    transposition_table = TranspositionTable()
+    move_history = MoveHistory()
+    principal_variation = {}
+    deadline = None
 
     @classmethod
     def set_obstacle_matrix(cls, obstacle_matrix):
         """Defines the obstacle matrix, where at indexes [x][y] 1 means there is an obstacle at position at (x,y),
-        0 otherwise. Also defines the dimensions of the board"""
+        0 otherwise. Also defines the dimensions of the board and, if the board changed, the tables derived from it"""
+        if obstacle_matrix == cls.obstacle_matrix:
+            return
+        cls.clear_learned_tables()
         cls.obstacle_matrix = obstacle_matrix
         cls.columns = len(obstacle_matrix)
         cls.rows = len(obstacle_matrix[0])
+        cls.update_board_tables()
 
     @classmethod
     def set_goal_positions(cls, goal_positions):
-        """Defines the goal positions for the round that will be examined by the algorithm"""
+        """Defines the goal positions for the round that will be examined by the algorithm and, if they changed, the
+        tables derived from them"""
+        if goal_positions == cls.goal_positions:
+            return
+        cls.clear_learned_tables()
         cls.goal_positions = goal_positions
+        cls.update_board_tables()
+
+    @classmethod
+    def clear_learned_tables(cls):
+        """Empties the transposition table and the move history, which are only valid for the board they were filled
+        in on"""
+        if cls.transposition_table is not None:
+            cls.transposition_table.clear()
+        if cls.move_history is not None:
+            cls.move_history.clear()
+
+    @classmethod
+    def update_board_tables(cls):
+        """Precomputes the moves each player can make from every cell of the board (see move_tables.py), the
+        targets of the killer-moves heuristic (see move_ordering.py) and the true distances on the board (see
+        distance_oracle.py), once both the obstacle matrix and the goal positions are known"""
+        if cls.obstacle_matrix is not None and cls.goal_positions is not None:
+            cls.move_table = build_move_tables(cls.obstacle_matrix, cls.goal_positions, cls.action_offset, True)
+            cls.killer_targets = KillerTargets(cls.goal_positions, cls.columns, cls.rows)
+            cls.distance_oracle = DistanceOracle(cls.obstacle_matrix, cls.goal_positions)
 
     @classmethod
     def set_max_rounds(cls, max_rounds):
         """Defines the duration of the game, which is also the depth of the search tree"""
+        if max_rounds != cls.max_rounds and cls.transposition_table is not None:
+            cls.transposition_table.clear()
         cls.max_rounds = max_rounds
 
-    def __init__(self, is_max_turn, min_pos, max_pos, previous_round, graph=None, previous_name=None, action=None):
-        """Defines the state's attributes and, if visualization is enabled (work in progress), adds a corresponding node
-        and edge to the tree graph."""
-
+    def __init__(self, is_max_turn, min_pos, max_pos, previous_round):
+        """Defines the state's attributes"""
         self.is_max_turn = is_max_turn
         self.min_pos = min_pos
         self.max_pos = max_pos
         self.round = previous_round + (1 if is_max_turn else 0)
-        self.graph = graph
-        self.name = "root"
-        self.action = action
-
-        # TODO: fix graph issues
-        if self.graph is not None and (previous_name is not None):
-            self.name = previous_name + str("Max" if self.is_max_turn else "Min") + \
-                        str(self.max_pos if self.is_max_turn else self.min_pos)
-            graph.add_node(self.name)  # NetworkX
-            graph.add_edge(previous_name, self.name, action=action)  # NetworkX
 
         State.instances += 1
 
@@ -78,15 +118,14 @@ class State:
             (State): the resulting state
         """
         if self.is_max_turn:
-            new_max_pos = (self.max_pos[0] + self.action_offset[action][0],
-                           self.max_pos[1] + self.action_offset[action][1])
+            new_max_pos = ((self.max_pos[0] + self.action_offset[action][0]) % self.columns,
+                           (self.max_pos[1] + self.action_offset[action][1]) % self.rows)
             new_min_pos = self.min_pos
         else:
-            new_min_pos = (self.min_pos[0] + self.action_offset[action][0],
-                           self.min_pos[1] + self.action_offset[action][1])
+            new_min_pos = ((self.min_pos[0] + self.action_offset[action][0]) % self.columns,
+                           (self.min_pos[1] + self.action_offset[action][1]) % self.rows)
             new_max_pos = self.max_pos
-        return State(not self.is_max_turn, new_min_pos, new_max_pos, self.round,
-                     graph=self.graph, previous_name=self.name, action=action)
+        return type(self)(not self.is_max_turn, new_min_pos, new_max_pos, self.round)
 
     def utility(self):
         """Utility function (or payoff function). Defines the final numeric value for the game that ends in the state.
@@ -96,10 +135,19 @@ class State:
         Returns:
             (int) 0 if the minimizing player wins, 1 if the maximizing player wins
         """
-        u = 0 if self.min_pos in self.goal_positions else 1
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = u
-        return u
+        return 0 if self.min_pos in self.goal_positions else 1
+
+    def key(self):
+        """Packs the position of both players, the next player and the round into a single integer, used to identify
+        the state in the transposition table.
+
+        Returns:
+            (int): the compact state key
+        """
+        cells = self.columns * self.rows
+        min_cell = self.min_pos[0] * self.rows + self.min_pos[1]
+        max_cell = self.max_pos[0] * self.rows + self.max_pos[1]
+        return ((self.round * 2 + self.is_max_turn) * cells + min_cell) * cells + max_cell
 
     def is_terminal(self):
         """Checks whether or not the game is over. Returns True if so, False otherwise.
@@ -110,6 +158,15 @@ class State:
         """
         return self.min_pos in State.goal_positions or self.round >= State.max_rounds
 
+    def positions(self):
+        """Returns the position of both players as (x, y) tuples
+
+        Returns:
+            (tuple): the position of the minimizing player
+            (tuple): the position of the maximizing player
+        """
+        return self.min_pos, self.max_pos
+
     def is_legal(self, action):
         """Checks whether or not the next player can perform a certain action.
 
@@ -143,35 +200,44 @@ class State:
         return abs(pos2[0] - pos1[0]) + abs(pos2[1] - pos1[1])
 
     def killer_moves(self, action):
-        """Heuristic ordering function for the actions, based on the Manhattan distance to the goal or related tiles.
+        """Heuristic ordering function for the actions, based on the distance to the goal or related tiles. The distance
+        is the true distance on the board (see distance_oracle.py) if State.ordering is "distance", or the Manhattan
+        distance if it is "manhattan".
 
             Parameters:
                 action (str): the action to rank
 
             Returns:
-                (int): if it's the maximizing player's turn, returns the Manhattan distance from the position resulting
+                (int): if it's the maximizing player's turn, returns the distance from the position resulting
                 from the action to the goal-adjacent tile that is closest to the minimizing player. If it's the
-                minimizing player's turn, returns the Manhattan distance from position that results from the action to
+                minimizing player's turn, returns the distance from position that results from the action to
                 the goal.
             """
-        closest_goal = min(self.goal_positions, key=lambda x: self.manhattan_distance(x, self.min_pos))
-        if not self.is_max_turn:
-            hypothetical_pos = (self.max_pos[0] + self.action_offset[action][0],
-                                self.max_pos[1] + self.action_offset[action][1])
-            dx, dy = closest_goal[0]-self.min_pos[0], closest_goal[1]-self.min_pos[1]
-            if dx >= 0 and dx >= abs(dy):
-                return self.manhattan_distance(hypothetical_pos, (closest_goal[0] + 1, closest_goal[1]))
-            if dx <= 0 and dx >= abs(dy):
-                return self.manhattan_distance(hypothetical_pos, (closest_goal[0] - 1, closest_goal[1]))
-            if dy >= 0 and dx < abs(dy):
-                return self.manhattan_distance(hypothetical_pos, (closest_goal[0], closest_goal[1] + 1))
-            if dy <= 0 and dx < abs(dy):
-                return self.manhattan_distance(hypothetical_pos, (closest_goal[0], closest_goal[1] - 1))
-        else:
-            hypothetical_pos = (self.min_pos[0] + self.action_offset[action][0],
-                                self.min_pos[1] + self.action_offset[action][1])
-            return self.manhattan_distance(hypothetical_pos, closest_goal)
+        min_pos, max_pos = self.positions()
+        offset = self.action_offset[action]
+        if State.ordering == "distance":
+            if self.is_max_turn:
+                hypothetical_pos = ((max_pos[0] + offset[0]) % self.columns, (max_pos[1] + offset[1]) % self.rows)
+                return State.distance_oracle.blocker_distance(hypothetical_pos,
+                                                              State.distance_oracle.blocking_target(min_pos))
+            hypothetical_pos = ((min_pos[0] + offset[0]) % self.columns, (min_pos[1] + offset[1]) % self.rows)
+            return State.distance_oracle.distance_to_goal(hypothetical_pos)
+
+        closest_goal, blocking_target, _ = State.killer_targets.lookup(min_pos)
+        if self.is_max_turn:
+            hypothetical_pos = (max_pos[0] + offset[0], max_pos[1] + offset[1])
+            return self.manhattan_distance(hypothetical_pos, blocking_target)
+        hypothetical_pos = (min_pos[0] + offset[0], min_pos[1] + offset[1])
+        return self.manhattan_distance(hypothetical_pos, closest_goal)
 
+    def out_of_reach(self):
+        """Checks whether the minimizing player is too far from every goal to reach one in the rounds that are left,
+        even if the maximizing player did not stand in its way, in which case the maximizing player wins.
+
+        Returns:
+            (bool): whether or not the minimizing player can no longer reach a goal
+        """
+        return State.distance_oracle.distance_to_goal(self.positions()[0]) > State.max_rounds - self.round
 
     def actions(self):
         """Returns all actions that the next player is allowed to perform in its turn.
@@ -180,8 +246,123 @@ class State:
             (list) list of strings representing all legal actions ("north", "south", "east", "west", "stay"),
             ordered by the killer-moves heuristic
         """
-        return sorted([action for action in State.action_offset if self.is_legal(action)], key=self.killer_moves)
-        #return [action for action in State.action_offset if self.is_legal(action)]
+        player_pos, other_pos = (self.max_pos, self.min_pos) if self.is_max_turn else (self.min_pos, self.max_pos)
+        moves = State.move_table[self.is_max_turn][player_pos]
+        return sorted([action for action, destination in moves if destination != other_pos], key=self.killer_moves)
+
+    def probe(self, alpha, beta):
+        """Looks the state up in the transposition table.
+
+        Parameters:
+            alpha (int): the value of the best choice found so far in the path for the maximizing player
+            beta (int): the value of the best choice found so far in the path for the minimizing player
+
+        Returns:
+            (tuple or None): the (action, value) pair to return without searching the state if the stored value is
+            enough to decide it, None otherwise
+            (str or None): the best action stored for the state, to be tried first, or None
+        """
+        entry = State.transposition_table.lookup(self.key())
+        if entry is None:
+            return None, None
+        _, value, bound, depth, move, _ = entry
+        if depth == State.max_rounds - self.round and (bound == EXACT or (bound == LOWER and value >= beta) or
+                                                      (bound == UPPER and value <= alpha)):
+            return (move, value), move
+        return None, move
+
+    def ply(self):
+        """Returns the number of plies played since the start of the game until the state
+
+        Returns:
+            (int): the ply of the state
+        """
+        return 2 * self.round + (0 if self.is_max_turn else 1)
+
+    def player_position(self):
+        """Returns the position of the next player
+
+        Returns:
+            (tuple or int): the position of the next player
+        """
+        return self.max_pos if self.is_max_turn else self.min_pos
+
+    def ordered_actions(self, tt_move):
+        """Returns the legal actions ordered by the killer-moves heuristic and, if enabled, the move history (see
+        MoveHistory in move_ordering.py), with the best action stored in the transposition table or, failing that, the
+        action of the previous principal variation, if any, in front.
+
+        Parameters:
+            tt_move (str or None): the best action stored in the transposition table
+
+        Returns:
+            (list) list of strings representing all legal actions
+        """
+        actions = self.actions()
+        if State.move_history is not None:
+            actions = State.move_history.order(actions, self.ply(), self.is_max_turn, self.player_position())
+        if tt_move is None and State.principal_variation:
+            tt_move = State.principal_variation.get(self.key())
+        if tt_move in actions and actions[0] != tt_move:
+            actions.remove(tt_move)
+            actions.insert(0, tt_move)
+        return actions
+
+    def learn(self, action, cutoff):
+        """Updates the move history, if enabled, with the outcome of searching the state
+
+        Parameters:
+            action (str): the best action found in the state
+            cutoff (int or None): the index of the action that caused a cutoff, None if there was no cutoff
+        """
+        State.move_history.update(self.ply(), self.is_max_turn, self.player_position(), action,
+                                  State.max_rounds - self.round, cutoff)
+
+    def record(self, alpha, beta, action, value):
+        """Stores the outcome of searching the state in the transposition table.
+
+        Parameters:
+            alpha (int): the alpha value the state was searched with
+            beta (int): the beta value the state was searched with
+            action (str): the best action found in the state
+            value (int): the value found for the state
+        """
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        State.transposition_table.store(self.key(), value, bound, State.max_rounds - self.round, action)
+
+    def check_deadline(self):
+        """Stops the search, raising SearchTimeout, if the time budget of the current move ran out"""
+        if State.deadline is not None and time.perf_counter() > State.deadline:
+            raise SearchTimeout()
+
+    def early_result(self, alpha, beta, action):
+        """Checks whether the state can be decided without exploring its children: because the game is over, because
+        the minimizing player can no longer reach a goal or because of the value stored in the transposition table.
+        Also stops the search if the time budget ran out.
+
+        Parameters:
+            alpha (int): the value of the best choice found so far in the path for the maximizing player
+            beta (int): the value of the best choice found so far in the path for the minimizing player
+            action (str): the action that resulted in the state
+
+        Returns:
+            (tuple or None): the (action, value) pair to return without exploring the children, None if they must be
+            explored
+            (str or None): the best action stored in the transposition table, to be tried first, or None
+        """
+        if self.is_terminal():
+            return (action, self.utility()), None
+        self.check_deadline()
+        if State.distance_oracle is not None and self.out_of_reach():
+            return (action, 1), None
+        if State.transposition_table is not None:
+            return self.probe(alpha, beta)
+        return None, None
 
     def max_value(self, alpha, beta, action):
         """Explores, in a tree-like fashion, the outcomes of all possible actions in the state from the perspective of
@@ -198,21 +379,37 @@ class State:
                 the minimizing player.
             """
 
-        if self.is_terminal():
-            return action, self.utility()
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action, alpha, beta)
+        stored, tt_move = self.early_result(alpha, beta, action)
+        if stored is not None:
+            if tracer is not None:
+                tracer.on_terminal(stored[1])
+            return stored
+        alpha_0 = alpha
 
         value = -1000
-        for a in self.actions():
+        cutoff = None
+        for i, a in enumerate(self.ordered_actions(tt_move)):
             action, value = max((action, value),
                                 (a, self.result(a).min_value(alpha, beta, a)[1]),
                                 key=lambda x: x[1])
             if value >= beta:
-                return action, value
-            alpha = min(alpha, value)
+                cutoff = i
+                if tracer is not None:
+                    tracer.on_cutoff(a, alpha, beta)
+                break
+            alpha = max(alpha, value)
 
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = value
+        if State.move_history is not None:
+            self.learn(action, cutoff)
 
+        if State.transposition_table is not None:
+            self.record(alpha_0, beta, action, value)
+
+        if tracer is not None:
+            tracer.on_exit(value)
         return action, value
 
     def min_value(self, alpha, beta, action):
@@ -230,29 +427,291 @@ class State:
             minimizing player.
         """
 
-        if self.is_terminal():
-            return action, self.utility()
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action, alpha, beta)
+        stored, tt_move = self.early_result(alpha, beta, action)
+        if stored is not None:
+            if tracer is not None:
+                tracer.on_terminal(stored[1])
+            return stored
+        beta_0 = beta
 
         value = 1000
-        for a in self.actions():
+        cutoff = None
+        for i, a in enumerate(self.ordered_actions(tt_move)):
             action, value = min((action, value),
                                 (a, self.result(a).max_value(alpha, beta, a)[1]),
                                 key=lambda x: x[1])
             if value <= alpha:
-                return action, value
+                cutoff = i
+                if tracer is not None:
+                    tracer.on_cutoff(a, alpha, beta)
+                break
             beta = min(beta, value)
 
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = value
+        if State.move_history is not None:
+            self.learn(action, cutoff)
+
+        if State.transposition_table is not None:
+            self.record(alpha, beta_0, action, value)
+
+        if tracer is not None:
+            tracer.on_exit(value)
         return action, value
 
+    def scout_max_value(self, alpha, beta, action):
+        """Principal variation search (NegaScout) counterpart of max_value: only the first action is searched with the
+        (alpha, beta) window. The other actions are searched with the null window (alpha, alpha + 1), which only tells
+        whether they are better than the best one so far, and are searched again with a wider window if they are.
+        Since utilities are integers, the null window is as narrow as a window can be.
+
+        Parameters:
+            alpha (int): the value of the best choice found so far in the path for the maximizing player
+            beta (int): the value of the best choice found so far in the path for the minimizing player
+            action (str): the action that resulted in the state that the function is given
+
+        Returns:
+            (str): the action that resulted in the value to assign to this state
+            (int): the value to assign to this state
+        """
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action, alpha, beta)
+        stored, tt_move = self.early_result(alpha, beta, action)
+        if stored is not None:
+            if tracer is not None:
+                tracer.on_terminal(stored[1])
+            return stored
+        alpha_0 = alpha
+
+        value = -1000
+        cutoff = None
+        for i, a in enumerate(self.ordered_actions(tt_move)):
+            child = self.result(a)
+            if i == 0:
+                v = child.scout_min_value(alpha, beta, a)[1]
+            else:
+                v = child.scout_min_value(alpha, alpha + 1, a)[1]
+                if alpha < v < beta:
+                    v = child.scout_min_value(v, beta, a)[1]
+            if v > value:
+                action, value = a, v
+            if value >= beta:
+                cutoff = i
+                if tracer is not None:
+                    tracer.on_cutoff(a, alpha, beta)
+                break
+            alpha = max(alpha, value)
+
+        if State.move_history is not None:
+            self.learn(action, cutoff)
+
+        if State.transposition_table is not None:
+            self.record(alpha_0, beta, action, value)
+
+        if tracer is not None:
+            tracer.on_exit(value)
+        return action, value
+
+    def scout_min_value(self, alpha, beta, action):
+        """Principal variation search (NegaScout) counterpart of min_value (see scout_max_value), where the actions
+        after the first one are searched with the null window (beta - 1, beta)
+
+        Parameters:
+            alpha (int): the value of the best choice found so far in the path for the maximizing player
+            beta (int): the value of the best choice found so far in the path for the minimizing player
+            action (str): the action that resulted in the state that the function is given
+
+        Returns:
+            (str): the action that resulted in the value to assign to this state
+            (int): the value to assign to this state
+        """
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action, alpha, beta)
+        stored, tt_move = self.early_result(alpha, beta, action)
+        if stored is not None:
+            if tracer is not None:
+                tracer.on_terminal(stored[1])
+            return stored
+        beta_0 = beta
+
+        value = 1000
+        cutoff = None
+        for i, a in enumerate(self.ordered_actions(tt_move)):
+            child = self.result(a)
+            if i == 0:
+                v = child.scout_max_value(alpha, beta, a)[1]
+            else:
+                v = child.scout_max_value(beta - 1, beta, a)[1]
+                if alpha < v < beta:
+                    v = child.scout_max_value(alpha, v, a)[1]
+            if v < value:
+                action, value = a, v
+            if value <= alpha:
+                cutoff = i
+                if tracer is not None:
+                    tracer.on_cutoff(a, alpha, beta)
+                break
+            beta = min(beta, value)
+
+        if State.move_history is not None:
+            self.learn(action, cutoff)
+
+        if State.transposition_table is not None:
+            self.record(alpha, beta_0, action, value)
+
+        if tracer is not None:
+            tracer.on_exit(value)
+        return action, value
+
+
+class BitboardState(bitboard.BitboardState, State):
+    """State of the game where the positions of both players are cell indexes of a bitboard (see bitboard.py), which
+    replaces the tuple arithmetic and the obstacle matrix lookups of State with lookups in tables indexed by cell. With
+    the "distance" ordering, the moves are also ordered once per board rather than at every node, so the search reads
+    them already ordered (see order_moves)"""
+
+    __slots__ = ()
+
+    min_seeks_goal = True
+
+    # The bitboard the tables were built for, the distance from every cell to the closest goal, the moves of the
+    # minimizing player from every cell and the moves of the maximizing player for every cell of the minimizing player
+    # and then for every cell of its own, ordered as killer_moves orders them (see order_moves)
+    ordered_board = None
+    goal_distances = None
+    min_moves = None
+    max_moves = None
+
+    @classmethod
+    def load_board(cls):
+        """Builds the bitboard (see bitboard.BitboardState.load_board) and, if it changed, the ordered moves"""
+        super().load_board()
+        if cls.ordered_board is not cls.board:
+            cls.order_moves()
+
+    @classmethod
+    def order_moves(cls):
+        """Orders the moves of the bitboard by the true distances on the board (see distance_oracle.py): the moves of
+        the minimizing player by the distance to the closest goal, and the ones of the maximizing player by the
+        distance to the blocking target of the minimizing player, which only depends on the cell of the minimizing
+        player. The sort is stable, so ties keep the order of the actions, as in State.actions"""
+        board, oracle = cls.board, State.distance_oracle
+        cls.goal_distances = tuple(oracle.distance_to_goal(pos) for pos in board.coords)
+        cls.min_moves = tuple(tuple(sorted(moves, key=lambda move: cls.goal_distances[move[1]]))
+                              for moves in board.moves[False])
+        by_target = {}
+        max_moves = []
+        for pos in board.coords:
+            target = oracle.blocking_target(pos)
+            if target not in by_target:
+                by_target[target] = tuple(
+                    tuple(sorted(moves, key=lambda move: oracle.blocker_distance(board.coords[move[1]], target)))
+                    for moves in board.moves[True])
+            max_moves.append(by_target[target])
+        cls.max_moves = tuple(max_moves)
+        cls.ordered_board = board
+
+    def out_of_reach(self):
+        """Checks whether the minimizing player can no longer reach a goal (see State.out_of_reach)
+
+        Returns:
+            (bool): whether or not the minimizing player can no longer reach a goal
+        """
+        return self.goal_distances[self.min_pos] > State.max_rounds - self.round
+
+    def actions(self):
+        """Returns all actions that the next player is allowed to perform in its turn.
+
+        Returns:
+            (list) list of strings representing all legal actions ("north", "south", "east", "west", "stay"),
+            ordered by the killer-moves heuristic
+        """
+        if State.ordering != "distance":
+            return sorted(bitboard.BitboardState.actions(self), key=self.killer_moves)
+        if self.is_max_turn:
+            return [action for action, cell in self.max_moves[self.min_pos][self.max_pos] if cell != self.min_pos]
+        return [action for action, cell in self.min_moves[self.min_pos] if cell != self.max_pos]
+
+
+def initialize_worker(obstacle_matrix, goal_positions, max_rounds):
+    """Loads the board into the State class of a worker process of the parallel search. This runs once per worker, so
+    the tables derived from the board are built once per worker rather than once per task
+
+    Parameters:
+        obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+        goal_positions (list): list of the goal positions
+        max_rounds (int): the duration of the game
+    """
+    State.set_max_rounds(max_rounds)
+    State.set_goal_positions(goal_positions)
+    State.set_obstacle_matrix(obstacle_matrix)
+
+
+def search_root_action(state_class, min_pos, max_pos, previous_round, action, alpha, beta):
+    """Searches, in a worker process of the parallel search, the state that results from one action of the maximizing
+    player at the root
+
+    Parameters:
+        state_class (type): State or BitboardState
+        min_pos (tuple or int): the position of the minimizing player at the root
+        max_pos (tuple or int): the position of the maximizing player at the root
+        previous_round (int): the round before the root state
+        action (str): the action of the maximizing player to search
+        alpha (int): the value of the best choice found so far for the maximizing player
+        beta (int): the value of the best choice found so far for the minimizing player
+
+    Returns:
+        (str): the action that was searched
+        (int): the value of the action
+        (int): the number of states generated by the search
+    """
+    State.instances = 0
+    if state_class is BitboardState:
+        BitboardState.load_board()
+    if State.transposition_table is not None:
+        State.transposition_table.new_search()
+    if State.move_history is not None:
+        State.move_history.new_search()
+    value = state_class(True, min_pos, max_pos, previous_round).result(action).min_value(alpha, beta, action)[1]
+    return action, value, State.instances
+
 
 class Agent:
     """Describes an adversarial agent"""
 
-    def __init__(self):
-        """Simply initializes the agent"""
+    def __init__(self, time_budget=None, bitboard=False, tablebase=None, workers=1, engine="alphabeta",
+                 tracer=None):
+        """Simply initializes the agent
+
+        Parameters:
+            time_budget (float or None): the number of seconds the agent may spend searching for each move, using
+            iterative deepening. If None, every search goes all the way to the end of the game
+            bitboard (bool): whether or not the states are represented with a bitboard (see BitboardState)
+            tablebase (Tablebase or None): the table the agent looks the best action up in, before falling back to a
+            search if the current state is not covered by it
+            workers (int): the number of processes that search the actions of the root in parallel. With 1, or with
+            a time budget, the search runs in this process only
+            engine (str): "alphabeta" for max_value/min_value, "pvs" for principal variation search (see
+            scout_max_value), "mtdf" for a series of null window searches (see mtdf_search) or "dfpn" for a
+            proof-number search (see proof_number_search.py). The parallel search always uses "alphabeta"
+            tracer (Tracer or None): receives the events of the searches of the agent (see tracing.py). The parallel
+            search is not traced, so the search runs in this process only when there is a tracer
+        """
         self.current_state = None
+        self.bitboard = bitboard
+        self.time_budget = time_budget
+        self.tablebase = tablebase
+        self.workers = workers
+        self.engine = engine
+        self.tracer = tracer
+        self.last_value = 1
+        self.proof_number_search = None
+        self.pool = None
+        self.pool_board = None
+        self.completed_depth = 0
 
     def set_state(self, state_description):
         """Defines the current state of the game from a state description dictionary provided by the Agent1 server
@@ -261,13 +720,17 @@ class Agent:
             state_description (dict): the state description dictionary
 
         """
+        if self.bitboard:
+            BitboardState.load_board()
+            self.current_state = BitboardState(state_description["agent_id"] == 0,
+                                               BitboardState.board.cell(state_description["agents"][0]),
+                                               BitboardState.board.cell(state_description["agents"][1]),
+                                               state_description["round"])
+            return
         self.current_state = State(state_description["agent_id"] == 0,
                                    state_description["agents"][0],
                                    state_description["agents"][1],
-                                   state_description["round"],
-                                   None,  # nx.Graph(),
-                                   None,
-                                   "root")
+                                   state_description["round"])
 
     def alpha_beta_search(self):
         """Returns the action description string that corresponds to the best action the agent can execute, that is, to
@@ -279,41 +742,191 @@ class Agent:
         Returns:
             (str): the action description string.
         """
-        a, v = self.current_state.max_value(-1000, 1000, "stay")
-
-        if self.current_state.graph is not None:
-            labels = nx.get_node_attributes(self.current_state.graph, "value")
-            edge_labels = nx.get_edge_attributes(self.current_state.graph, "action")
-            # print(edge_labels)
-            plt.figure(figsize=(20, 20))
-
-            pos = hierarchy_pos(self.current_state.graph, "root", width=2 * math.pi, xcenter=0)
-            new_pos = {u: (r * math.cos(theta), r * math.sin(theta)) for u, (theta, r) in pos.items()}
+        if self.tablebase is not None:
+            min_pos, max_pos = self.current_state.positions()
+            rounds_left = State.max_rounds - self.current_state.round
+            value, action = self.tablebase.lookup(min_pos, max_pos, self.current_state.is_max_turn, rounds_left)
+            if action is not None:
+                self.completed_depth = rounds_left
+                return action
+        if State.transposition_table is not None:
+            State.transposition_table.new_search()
+        if State.move_history is not None:
+            State.move_history.new_search()
+        State.tracer = self.tracer
+        if self.time_budget is not None:
+            return self.iterative_deepening_search()
+        if self.workers > 1 and self.tracer is None:
+            return self.parallel_search()
+        a, v = self.search_root()
+        self.completed_depth = State.max_rounds - self.current_state.round
+        return a
 
-            nx.draw(self.current_state.graph, new_pos, node_size=20, alpha=0.5, node_color="blue", labels=labels)
-            nx.draw_networkx_edge_labels(self.current_state.graph, new_pos, edge_labels=edge_labels)
-            plt.axis("equal")
-            plt.show()
+    def search_root(self):
+        """Searches the current state with the engine of the agent
 
-        return a
+        Returns:
+            (str): the best action
+            (int): the value of the current state
+        """
+        if self.tracer is not None:
+            self.tracer.new_search()
+        if self.engine == "alphabeta":
+            return self.current_state.max_value(-1000, 1000, "stay")
+        if self.engine == "pvs":
+            return self.current_state.scout_max_value(-1000, 1000, "stay")
+        if self.engine == "mtdf":
+            return self.mtdf_search()
+        if self.engine == "dfpn":
+            self.proof_number_search = ProofNumberSearch()
+            return self.proof_number_search.search(self.current_state)
+        raise ValueError("Unknown search engine: " + str(self.engine))
+
+    def mtdf_search(self):
+        """MTD(f): finds the value of the current state with null window searches only, narrowing the bounds of the
+        value around a guess (the value of the previous search) until they meet. The transposition table keeps each
+        search from repeating the work of the previous ones. Since utilities are 0 or 1, this takes one or two
+        searches.
 
-def parse_last_dict(bad_string):
-    """Returns the string that corresponds to the last open and closed curly brackets.
-    This is necessary due to the way the server/client interaction works, so as to identify the last server response.
-    Ideally, this would be unnecessary, but this had to be implemented due to time restrictions that prevented the group
-    from exploring the software.
+        Returns:
+            (str): the best action
+            (int): the value of the current state
+        """
+        lower, upper = -1000, 1000
+        value = self.last_value
+        best_action = None
+        while lower < upper:
+            beta = value + 1 if value == lower else value
+            action, value = self.current_state.max_value(beta - 1, beta, "stay")
+            if value < beta:
+                upper = value
+            else:
+                # Only a search that fails high proves its action reaches the value
+                lower = value
+                best_action = action
+        self.last_value = value
+        return best_action if best_action is not None else action, value
+
+    def iterative_deepening_search(self):
+        """Searches the current state 1, 2, 3... rounds ahead until the time budget of the agent runs out or the end of
+        the game is reached, and returns the best action found by the deepest search that was completed. Each search
+        tries the principal variation of the previous one first.
 
-    Parameters:
-        bad_string (str): the string to parse
+        Returns:
+            (str): the action description string.
+        """
+        max_rounds = State.max_rounds
+        best_action = None
+        self.completed_depth = 0
+        State.principal_variation = {}
+        State.deadline = time.perf_counter() + self.time_budget
+        try:
+            for depth in range(1, max_rounds - self.current_state.round + 1):
+                State.max_rounds = self.current_state.round + depth
+                try:
+                    action, value = self.search_root()
+                except SearchTimeout:
+                    break
+                best_action = action
+                self.completed_depth = depth
+                State.principal_variation = self.extract_principal_variation(action)
+                if value == 0:
+                    # The minimizing player already wins within fewer rounds, so searching deeper changes nothing
+                    break
+        finally:
+            State.max_rounds = max_rounds
+            State.deadline = None
+            State.principal_variation = {}
+
+        if best_action is None:
+            best_action = self.current_state.actions()[0]
+        return best_action
+
+    def parallel_search(self):
+        """Searches the actions of the root in parallel, Young Brothers Wait style: the first action, which is the
+        most promising one, is searched in this process, and its value becomes the alpha bound the other actions are
+        searched with by the worker processes. The best action is the first one, in the order they are tried, with the
+        highest value, as in the serial search.
 
-    Returns:
-        (str): the resulting good string
+        Returns:
+            (str): the action description string.
+        """
+        state = self.current_state
+        self.completed_depth = State.max_rounds - state.round
+        tt_move = None
+        if State.transposition_table is not None:
+            stored, tt_move = state.probe(-1000, 1000)
+            if stored is not None:
+                return stored[0]
+        actions = state.ordered_actions(tt_move)
+        if len(actions) < 2 or state.is_terminal() or \
+                (State.distance_oracle is not None and state.out_of_reach()):
+            return state.max_value(-1000, 1000, "stay")[0]
+
+        action = actions[0]
+        value = state.result(action).min_value(-1000, 1000, action)[1]
+        # A win (utility 1) cannot be improved on, so the other actions are only searched if the first one does not win
+        if value < 1:
+            values = {}
+            futures = [self.worker_pool().submit(search_root_action, type(state), state.min_pos, state.max_pos,
+                                                 state.round - 1, a, value, 1000) for a in actions[1:]]
+            for future in as_completed(futures):
+                a, v, instances = future.result()
+                values[a] = v
+                State.instances += instances
+            for a in actions[1:]:
+                if values[a] > value:
+                    action, value = a, values[a]
+
+        if State.transposition_table is not None:
+            state.record(-1000, 1000, action, value)
+        return action
+
+    def worker_pool(self):
+        """Returns the pool of worker processes of the parallel search, starting it, or restarting it if the board
+        changed since it was started
 
-    """
-    return bad_string[bad_string.rindex("{"):]
+        Returns:
+            (ProcessPoolExecutor): the pool
+        """
+        board = (State.obstacle_matrix, State.goal_positions, State.max_rounds)
+        if self.pool is None or self.pool_board != board:
+            self.close()
+            self.pool = ProcessPoolExecutor(self.workers, initializer=initialize_worker, initargs=board)
+            self.pool_board = board
+        return self.pool
+
+    def close(self):
+        """Stops the worker processes of the parallel search, if any"""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+            self.pool_board = None
+
+    def extract_principal_variation(self, action):
+        """Follows the best actions stored in the transposition table from the current state, starting with the given
+        action.
 
+        Parameters:
+            action (str): the best action found for the current state
 
-def main(rounds):
+        Returns:
+            (dict): the best action of each state of the principal variation, indexed by the state key
+        """
+        variation = {}
+        state = self.current_state
+        while action is not None and not state.is_terminal():
+            variation[state.key()] = action
+            state = state.result(action)
+            action = None
+            if State.transposition_table is not None:
+                entry = State.transposition_table.peek(state.key())
+                if entry is not None:
+                    action = entry[4]
+        return variation
+
+def main(rounds, time_budget=None, bitboard=False, tablebase=False, workers=1, engine="alphabeta", tracer=None,
+         compare_serial=False):
     """Game loop. Creates two clients and cycles between them.
     The first client is the minimizing player, or the human,
     and so the program waits for user input and sends the corresponding action value pair to the server.
@@ -323,6 +936,19 @@ def main(rounds):
 
     Parameters:
         rounds (int): the number of game rounds
+        time_budget (float or None): the number of seconds the maximizing player may spend on each move. If None, the
+        maximizing player always searches until the end of the game
+        bitboard (bool): whether or not the maximizing player represents the states with a bitboard
+        tablebase (bool): whether or not the maximizing player looks its moves up in a tablebase, which is read from
+        the tablebases directory if one was built before for the same board files or built when the board is received
+        workers (int): the number of processes the maximizing player searches with
+        engine (str): the search the maximizing player uses: "alphabeta", "pvs", "mtdf" or "dfpn"
+        tracer (Tracer or None): receives the events of the searches of the maximizing player (see tracing.py). A
+        NetworkXTracer draws the tree of every move to search_tree_round_<round>.png, once the move is sent, and a
+        CountingTracer prints its counts
+        compare_serial (bool): whether or not the serial search is also run before the parallel one on each move, to
+        report the speedup of the parallel one (which doubles the time every move takes). benchmark.py compares them
+        without playing a game
 
     Returns:
         None
@@ -333,28 +959,77 @@ def main(rounds):
     res_max = client_max.connect()
     if all(res != -1 for res in (res_min, res_max)):
 
-        agent = Agent()
+        agent = Agent(time_budget, bitboard, workers=workers, engine=engine, tracer=tracer)
         State.set_max_rounds(rounds)
+        board_version = None
 
         while True:
             command, action = input("Min > ").split(" ")
             client_min.execute(command, action)
 
-            state = ast.literal_eval(parse_last_dict(client_max.receiveData()))
-            State.set_goal_positions(state["goals"])
-            State.set_obstacle_matrix(state["obstacles"])
+            state = client_max.receive_state()
+            # The tables derived from the board are only rebuilt when the server sends a new version of it
+            if state["board_version"] != board_version:
+                board_version = state["board_version"]
+                State.set_goal_positions(state["goals"])
+                State.set_obstacle_matrix(state["obstacles"])
+            if tablebase and agent.tablebase is None:
+                start = time.perf_counter()
+                agent.tablebase = Tablebase.load_or_build(State.obstacle_matrix, State.goal_positions, rounds)
+                print("Tablebase ready in", time.perf_counter() - start, "seconds")
             agent.set_state(state)
+            serial_time = None
+            if compare_serial and workers > 1:
+                # The serial search must not leave its results in the transposition table or its killers and history
+                # in the move history for the parallel one
+                slots = State.transposition_table.slots[:] if State.transposition_table is not None else None
+                move_history = copy.deepcopy(State.move_history)
+                agent.workers = 1
+                start = time.perf_counter()
+                agent.alpha_beta_search()
+                serial_time = time.perf_counter() - start
+                agent.workers = workers
+                if slots is not None:
+                    State.transposition_table.slots = slots
+                    State.transposition_table.reset_counters()
+                State.move_history = move_history
+                State.instances = 0
             start = time.perf_counter()
             action = agent.alpha_beta_search()
             stop = time.perf_counter()
             print("Max > command", action)
-            print("Elapsed time:", stop - start, "Generated nodes:", State.instances)
+            if serial_time is None:
+                print("Elapsed time:", stop - start, "Generated nodes:", State.instances)
+            else:
+                print("Elapsed time:", stop - start, "Generated nodes:", State.instances,
+                      "Serial time:", serial_time, "Speedup:", serial_time / (stop - start))
+            if time_budget is not None:
+                print("Time budget:", time_budget, "Completed depth:", agent.completed_depth)
+            if State.move_history is not None:
+                root_ply = agent.current_state.ply()
+                for ply, searched, cutoffs, first_cutoffs in State.move_history.cutoff_statistics():
+                    print("Ply", ply - root_ply, "searched states:", searched, "cutoffs:", cutoffs,
+                          "first action cutoffs:", first_cutoffs)
+            if agent.proof_number_search is not None:
+                print("Proof number:", agent.proof_number_search.proof_number,
+                      "Disproof number:", agent.proof_number_search.disproof_number,
+                      "Expanded nodes:", agent.proof_number_search.expanded)
+            if State.transposition_table is not None:
+                print("Transposition table hits:", State.transposition_table.hits,
+                      "misses:", State.transposition_table.misses,
+                      "stores:", State.transposition_table.stores)
+                State.transposition_table.reset_counters()
+            if isinstance(tracer, CountingTracer):
+                print(tracer.summary())
             State.instances = 0
             client_max.execute("command", action)
+            if isinstance(tracer, NetworkXTracer):
+                tracer.draw("search_tree_round_%d.png" % state["round"])
 
             if agent.current_state.result(action).is_terminal():
                 input("O jogo terminou.")
                 break
+        agent.close()
 
 
 if __name__ == "__main__":
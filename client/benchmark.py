@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import minimax
+import minimax_oo
+import minimax_oo_reverse
+import alpha_beta_pruning
+import alpha_beta_pruning_inplace
+import alphabeta_oo
+import alphabeta_oo_reverse
+from scenario import load_scenario
+
+# Name, module, decision function (or Agent method), whether or not the minimizing player is the one that tries to
+# reach a goal, which tells which game the engine plays, and the arguments of the Agent of object-oriented engines
+ENGINES = (
+    ("minimax", minimax, "minimax_decision", True, {}),
+    ("alpha_beta_pruning", alpha_beta_pruning, "alpha_beta_search", True, {}),
+    ("alpha_beta_pruning_inplace", alpha_beta_pruning_inplace, "alpha_beta_search", True, {}),
+    ("minimax_oo", minimax_oo, "minimax_decision", True, {}),
+    ("minimax_oo_bitboard", minimax_oo, "minimax_decision", True, {"bitboard": True}),
+    ("alphabeta_oo", alphabeta_oo, "alpha_beta_search", True, {}),
+    ("alphabeta_oo_bitboard", alphabeta_oo, "alpha_beta_search", True, {"bitboard": True}),
+    ("alphabeta_oo_pvs", alphabeta_oo, "alpha_beta_search", True, {"engine": "pvs"}),
+    ("alphabeta_oo_mtdf", alphabeta_oo, "alpha_beta_search", True, {"engine": "mtdf"}),
+    ("alphabeta_oo_dfpn", alphabeta_oo, "alpha_beta_search", True, {"engine": "dfpn"}),
+    ("alphabeta_oo_time_budget", alphabeta_oo, "alpha_beta_search", True, {"time_budget": 1.0}),
+    ("alphabeta_oo_workers", alphabeta_oo, "alpha_beta_search", True, {"workers": 4}),
+    ("minimax_oo_reverse", minimax_oo_reverse, "minimax_decision", False, {}),
+    ("minimax_oo_reverse_bitboard", minimax_oo_reverse, "minimax_decision", False, {"bitboard": True}),
+    ("alphabeta_oo_reverse", alphabeta_oo_reverse, "alpha_beta_search", False, {}),
+    ("alphabeta_oo_reverse_bitboard", alphabeta_oo_reverse, "alpha_beta_search", False, {"bitboard": True}),
+)
+
+# The alpha-beta engine the moves of each game are checked against
+REFERENCE = {True: alphabeta_oo, False: alphabeta_oo_reverse}
+
+
+def configure(module, state, rounds):
+    """Loads the board and the duration of the game into the State class of an object-oriented engine, and empties
+    what it learned in previous runs (transposition table and move history), if anything, so that every run starts
+    from the same point
+
+    Parameters:
+        module (module): the engine
+        state (dict): state description dictionary
+        rounds (int): the number of game rounds
+    """
+    module.State.set_max_rounds(rounds)
+    module.State.set_goal_positions(state["goals"])
+    module.State.set_obstacle_matrix(state["obstacles"])
+    transposition_table = getattr(module.State, "transposition_table", None)
+    if transposition_table is not None:
+        transposition_table.clear()
+        transposition_table.reset_counters()
+    move_history = getattr(module.State, "move_history", None)
+    if move_history is not None:
+        move_history.clear()
+
+
+def prepare_engine(module, state, rounds, options):
+    """Gets an engine ready to search a state, so that what a game only does once (loading the board, emptying the
+    transposition table, creating the Agent and starting the worker processes of the parallel search) is not
+    measured with the search
+
+    Parameters:
+        module (module): the engine
+        state (dict): state description dictionary
+        rounds (int): the number of game rounds
+        options (dict): the arguments of the Agent of object-oriented engines
+
+    Returns:
+        (Agent or None): the agent of object-oriented engines, with the state set, None for the other ones
+    """
+    if not hasattr(module, "State"):
+        return None
+    configure(module, state, rounds)
+    agent = module.Agent(**options)
+    if getattr(agent, "workers", 1) > 1:
+        pool = agent.worker_pool()
+        list(pool.map(abs, range(agent.workers)))
+    # The root state counts as generated, as with the other engines
+    module.State.instances = 0
+    agent.set_state(state)
+    return agent
+
+
+def close_engine(agent):
+    """Stops the worker processes of an agent prepared by prepare_engine, if any
+
+    Parameters:
+        agent (Agent or None): the agent
+    """
+    if hasattr(agent, "close"):
+        agent.close()
+
+
+def run_engine(module, decision, agent, state, rounds):
+    """Runs the search of an engine once
+
+    Parameters:
+        module (module): the engine
+        decision (str): the name of the decision function, or of the Agent method for object-oriented engines
+        agent (Agent or None): the agent of object-oriented engines, prepared by prepare_engine
+        state (dict): state description dictionary
+        rounds (int): the number of game rounds
+
+    Returns:
+        (str): the action the engine chose
+        (int): the number of states the engine generated
+    """
+    if agent is not None:
+        return getattr(agent, decision)(), module.State.instances
+    module.instances = 1
+    return getattr(module, decision)(dict(state), rounds), module.instances
+
+
+def is_optimal(min_seeks_goal, state, rounds, action):
+    """Checks, with the alpha-beta engine of the game, whether or not an action is as good as the best one
+
+    Parameters:
+        min_seeks_goal (bool): whether or not the minimizing player is the one that tries to reach a goal
+        state (dict): state description dictionary
+        rounds (int): the number of game rounds
+        action (str): the action to check
+
+    Returns:
+        (bool): whether or not the action leads to the value of the state
+    """
+    module = REFERENCE[min_seeks_goal]
+    configure(module, state, rounds)
+    root = module.State(True, state["agents"][0], state["agents"][1], state["round"])
+    if root.is_terminal():
+        return True
+    if action not in root.actions():
+        return False
+    best = root.max_value(-1000, 1000, "stay")[1]
+    return root.result(action).min_value(-1000, 1000, action)[1] == best
+
+
+def benchmark(state, rounds, engines=ENGINES, minimax_max_rounds=7):
+    """Runs every engine at every number of rounds. Each search is run twice: once to measure the time and once, under
+    tracemalloc (which slows it down), to measure the peak memory. Only the search is measured (see prepare_engine),
+    and the memory is the one of this process, not of the worker processes of the parallel search
+
+    Parameters:
+        state (dict): state description dictionary
+        rounds (iterable): the numbers of game rounds to run the engines with
+        engines (iterable): the engines to run (see ENGINES)
+        minimax_max_rounds (int): the largest number of rounds to run the engines without pruning with, since their
+        trees grow exponentially
+
+    Returns:
+        (list): one dictionary per run with the measurements
+    """
+    results = []
+    for r in rounds:
+        first_moves = {}
+        for name, module, decision, min_seeks_goal, options in engines:
+            if name.startswith("minimax") and r > minimax_max_rounds:
+                continue
+            agent = prepare_engine(module, state, r, options)
+            start = time.perf_counter()
+            action, nodes = run_engine(module, decision, agent, state, r)
+            elapsed = time.perf_counter() - start
+            close_engine(agent)
+
+            agent = prepare_engine(module, state, r, options)
+            tracemalloc.start()
+            run_engine(module, decision, agent, state, r)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            close_engine(agent)
+
+            first_moves.setdefault(min_seeks_goal, action)
+            results.append({"engine": name,
+                            "rounds": r,
+                            "min_seeks_goal": min_seeks_goal,
+                            "move": action,
+                            "nodes": nodes,
+                            "time": elapsed,
+                            "nodes_per_second": nodes / elapsed if elapsed > 0 else None,
+                            "peak_memory": peak,
+                            "agrees": action == first_moves[min_seeks_goal],
+                            "optimal": is_optimal(min_seeks_goal, state, r, action)})
+    return results
+
+
+def format_table(results):
+    """Formats the measurements as a text table
+
+    Parameters:
+        results (list): the measurements returned by benchmark
+
+    Returns:
+        (str): the table
+    """
+    header = ("engine", "rounds", "move", "nodes", "nodes/s", "time (s)", "peak (KiB)", "agrees", "optimal")
+    rows = [header]
+    for result in results:
+        nodes_per_second = result["nodes_per_second"]
+        rows.append((result["engine"],
+                     str(result["rounds"]),
+                     result["move"],
+                     str(result["nodes"]),
+                     "-" if nodes_per_second is None else str(int(nodes_per_second)),
+                     "%.4f" % result["time"],
+                     "%.1f" % (result["peak_memory"] / 1024),
+                     "yes" if result["agrees"] else "no",
+                     "yes" if result["optimal"] else "no"))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def main(rounds=(3, 5, 7), scenario="input_files", round=1, json_path=None, minimax_max_rounds=7):
+    """Runs the benchmark on a scenario, prints the table and, if a path is given, writes the measurements as JSON.
+    "agrees" tells whether an engine chose the same move as the first engine of its game, and "optimal" whether the
+    move is as good as the best one, since engines may break ties between equally good moves differently
+
+    Parameters:
+        rounds (iterable): the numbers of game rounds to run the engines with
+        scenario (str): the directory with the board files (see scenario.py)
+        round (int): the round of the state the engines search from
+        json_path (str or None): the path of the JSON file to write
+        minimax_max_rounds (int): the largest number of rounds to run the engines without pruning with
+
+    Returns:
+        None
+    """
+    state = load_scenario(scenario, round)
+    results = benchmark(state, rounds, minimax_max_rounds=minimax_max_rounds)
+    print(format_table(results))
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump({"scenario": scenario,
+                       "round": round,
+                       "agents": state["agents"],
+                       "python": platform.python_version(),
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs every search engine on a board without the server")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[3, 5, 7], help="numbers of game rounds")
+    parser.add_argument("--scenario", default="input_files", help="directory with the board files")
+    parser.add_argument("--round", type=int, default=1, help="round of the state the engines search from")
+    parser.add_argument("--json", dest="json_path", help="file to write the measurements to")
+    parser.add_argument("--minimax-max-rounds", type=int, default=7,
+                        help="largest number of rounds to run the engines without pruning with")
+    args = parser.parse_args()
+    main(args.rounds, args.scenario, args.round, args.json_path, args.minimax_max_rounds)
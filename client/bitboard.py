@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+ACTIONS = ("stay", "north", "south", "east", "west")
+
+ACTION_OFFSETS = ((0, 0), (0, -1), (0, 1), (1, 0), (-1, 0))
+
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+
+class Bitboard:
+    """Packs a board into integers. Each cell (x, y) is identified by the index x * rows + y, which is also the bit that
+    represents the cell in the obstacle and goal masks."""
+
+    def __init__(self, obstacle_matrix, goal_positions, min_seeks_goal=True):
+        """Builds the masks of the board and, for every cell, the cells reached by each action, wrapping around the
+        edges of the board, and the moves each player can make
+
+        Parameters:
+            obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+            goal_positions (list): list of the goal positions
+            min_seeks_goal (bool): True if the minimizing player is the one trying to reach a goal, False if it is the
+            maximizing player
+        """
+        self.columns = len(obstacle_matrix)
+        self.rows = len(obstacle_matrix[0])
+        self.cells = self.columns * self.rows
+        self.coords = tuple((x, y) for x in range(self.columns) for y in range(self.rows))
+
+        self.obstacles = 0
+        for x in range(self.columns):
+            for y in range(self.rows):
+                if obstacle_matrix[x][y] != 0:
+                    self.obstacles |= 1 << self.cell((x, y))
+
+        self.goals = 0
+        for goal in goal_positions:
+            self.goals |= 1 << self.cell(goal)
+        # The same cells as a set, which the terminal test looks cells up in faster than it shifts the mask
+        self.goal_cells = frozenset(self.cell(goal) for goal in goal_positions)
+
+        self.neighbours = tuple(
+            tuple(((x + dx) % self.columns) * self.rows + (y + dy) % self.rows for dx, dy in ACTION_OFFSETS)
+            for x, y in self.coords)
+
+        # The cell each action leads to from every cell, and the moves each player can make from every cell, indexed
+        # by whether or not it is the maximizing player, as the (action, cell) pairs that neither end on an obstacle
+        # nor, for the player that does not try to reach a goal, on a goal. Only the check for the cell of the other
+        # player is then left to the search
+        self.targets = tuple(dict(zip(ACTIONS, neighbours)) for neighbours in self.neighbours)
+        self.moves = {}
+        for is_max in (True, False):
+            blocked = self.obstacles | (self.goals if is_max == min_seeks_goal else 0)
+            self.moves[is_max] = tuple(tuple((action, cell) for action, cell in zip(ACTIONS, neighbours)
+                                             if not (blocked >> cell) & 1)
+                                       for neighbours in self.neighbours)
+
+    def cell(self, pos):
+        """Returns the index of a position
+
+        Parameters:
+            pos (tuple or list): a position (x, y), possibly outside the board
+
+        Returns:
+            (int): the index of the cell
+        """
+        return (pos[0] % self.columns) * self.rows + pos[1] % self.rows
+
+
+class BitboardState:
+    """State backend where both agent positions are cell indexes of a Bitboard, so that move generation, the transition
+    and the terminal test are lookups in tables indexed by cell, without any (x, y) tuple. It is meant to be mixed in
+    before the State class of a search engine, which keeps providing the search itself: min_pos and max_pos are then
+    cell indexes instead of (x, y) tuples."""
+
+    __slots__ = ()
+
+    board = None
+    board_source = None
+    min_seeks_goal = True
+
+    @classmethod
+    def load_board(cls):
+        """Builds the bitboard from the obstacle matrix and goal positions of the State class, unless they did not
+        change since the last time"""
+        source = (cls.obstacle_matrix, cls.goal_positions)
+        if cls.board is None or cls.board_source != source:
+            cls.board = Bitboard(cls.obstacle_matrix, cls.goal_positions, cls.min_seeks_goal)
+            cls.board_source = source
+
+    def positions(self):
+        """Returns the position of both players as (x, y) tuples
+
+        Returns:
+            (tuple): the position of the minimizing player
+            (tuple): the position of the maximizing player
+        """
+        return self.board.coords[self.min_pos], self.board.coords[self.max_pos]
+
+    def key(self):
+        """Packs the position of both players, the next player and the round into a single integer
+
+        Returns:
+            (int): the compact state key
+        """
+        cells = self.board.cells
+        return ((self.round * 2 + self.is_max_turn) * cells + self.min_pos) * cells + self.max_pos
+
+    def result(self, action):
+        """Defines the state that results from doing a certain action in the state.
+
+        Parameters:
+            action (string): action description string
+
+        Returns:
+            (BitboardState): the resulting state
+        """
+        if self.is_max_turn:
+            return type(self)(False, self.min_pos, self.board.targets[self.max_pos][action], self.round)
+        return type(self)(True, self.board.targets[self.min_pos][action], self.max_pos, self.round)
+
+    def seeker_at_goal(self):
+        """Checks whether the player that tries to reach a goal is at a goal
+
+        Returns:
+            (bool): whether or not the player that tries to reach a goal is at a goal
+        """
+        return (self.min_pos if self.min_seeks_goal else self.max_pos) in self.board.goal_cells
+
+    def utility(self):
+        """Utility function (or payoff function). Defines the final numeric value for the game that ends in the state.
+
+        Returns:
+            (int) 0 if the minimizing player wins, 1 if the maximizing player wins
+        """
+        if self.min_seeks_goal:
+            return 0 if self.min_pos in self.board.goal_cells else 1
+        return 1 if self.max_pos in self.board.goal_cells else 0
+
+    def is_terminal(self):
+        """Checks whether or not the game is over.
+
+        Returns:
+            (bool): whether or the state is a terminal state.
+        """
+        return (self.min_pos if self.min_seeks_goal else self.max_pos) in self.board.goal_cells or \
+            self.round >= self.max_rounds
+
+    def blocked_mask(self):
+        """Returns the mask of the cells the next player cannot move to: obstacles, the other player and, for the player
+        that does not try to reach a goal, the goals
+
+        Returns:
+            (int): the mask
+        """
+        if self.is_max_turn:
+            blocked = self.board.obstacles | (1 << self.min_pos)
+        else:
+            blocked = self.board.obstacles | (1 << self.max_pos)
+        if self.is_max_turn == self.min_seeks_goal:
+            return blocked | self.board.goals
+        return blocked
+
+    def is_legal(self, action):
+        """Checks whether or not the next player can perform a certain action.
+
+        Parameters:
+            action (str): the action description string
+
+        Returns:
+            (bool): whether or not the next player can perform the given action
+        """
+        player_pos = self.max_pos if self.is_max_turn else self.min_pos
+        return (self.blocked_mask() >> self.board.neighbours[player_pos][ACTION_INDEX[action]]) & 1 == 0
+
+    def actions(self):
+        """Returns all actions that the next player is allowed to perform in its turn.
+
+        Returns:
+            (list) list of strings representing all legal actions ("north", "south", "east", "west" or "stay")
+        """
+        if self.is_max_turn:
+            return [action for action, cell in self.board.moves[True][self.max_pos] if cell != self.min_pos]
+        return [action for action, cell in self.board.moves[False][self.min_pos] if cell != self.max_pos]
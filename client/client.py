@@ -2,34 +2,105 @@
 import socket
 import time
 import ast
+import protocol
 
 HOST = '127.0.0.1'  # The server's hostname or IP address
 PORT = 50000      # The port used by the server
+
+
 class Client:
-    def __init__(self,HOST='127.0.0.1',PORT=50000):
+    def __init__(self,HOST='127.0.0.1',PORT=50000,framed=True):
+        """Parameters:
+            HOST (str): the server's hostname or IP address
+            PORT (int): the port used by the server
+            framed (bool): whether the client asks the server for framed messages (see protocol.py) or uses the
+            text protocol
+        """
         self.host = HOST
         self.port = PORT
+        self.framed = framed
+        self.id = None
+        # What was received with the text protocol and not read yet
+        self.text = ""
     def print_message(self,data):
         print("Data Received:",data)
     def connect(self):
 #        try:
             self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.s.connect((self.host, self.port))
+            if self.framed:
+                self.s.sendall(protocol.HELLO)
+                self.reader = protocol.MessageReader(self.s)
+                self.mirror = protocol.Mirror()
+                _, self.id = self.reader.read()
 #            return(0)
 #        except:
 #            print('A connection error occurred!')
 #            return(-1)
-    def receiveData(self,sleep_t = 0.5):
-        data = self.s.recv(20248)
-        #print('Received',repr(data))
-        msg = data.decode()
+    def receiveData(self,sleep_t = 0):
+        if self.framed:
+            kind, value = self.reader.read()
+            self.mirror.apply(kind, value)
+            msg = str(value)
+        else:
+            msg = self.next_text_message()
         #message(ast.literal_eval(data.decode()))
-        time.sleep(sleep_t)
+        if sleep_t:
+            time.sleep(sleep_t)
         return msg
-    def execute(self,action,value,sleep_t = 0.5):
+    def next_text_message(self):
+        """Returns the next message of the text protocol, waiting for it to be received if needed. Messages are not
+        delimited, but they are either the agent id, as "(id,<number>)", or the text of a state description dictionary,
+        which holds no curly brackets but its own, so several of them received at once, or one received in parts, can
+        still be told apart
+
+        Returns:
+            (str): the message
+        """
+        while True:
+            end = self.text.find(")" if self.text.startswith("(") else "}")
+            if end != -1:
+                msg, self.text = self.text[:end + 1], self.text[end + 1:]
+                return msg
+            data = self.s.recv(20248)
+            if not data:
+                raise ConnectionError("the connection was closed")
+            self.text += data.decode()
+    def receive_state(self):
+        """Returns the state of the world after the last action of another agent. With framed messages, the world is
+        kept up to date from the board and delta messages, and the deltas that result from the actions of this client
+        are skipped. With the text protocol, the states that result from the actions of this client are skipped the
+        same way, once its agent id was received. Either way this returns as soon as the state is received. The state
+        also has the version of the board (see protocol.py), so that tables derived from the board only need to be
+        rebuilt when it changes
+
+        Returns:
+            (dict): state description dictionary
+        """
+        if not self.framed:
+            while True:
+                msg = self.next_text_message()
+                if msg.startswith("(id,"):
+                    self.id = int(msg[4:-1])
+                    continue
+                state = ast.literal_eval(msg)
+                if state["agent_id"] != self.id:
+                    state["board_version"] = protocol.board_version(state["obstacles"], state["goals"])
+                    return state
+        kind, value = self.reader.read()
+        self.mirror.apply(kind, value)
+        while kind != protocol.DELTA or value["agent_id"] == self.id:
+            kind, value = self.reader.read()
+            self.mirror.apply(kind, value)
+        return self.mirror.state()
+    def execute(self,action,value,sleep_t = 0):
         #data = self.s.recv(20248)
-        self.s.sendall(str.encode(action+" "+value))
-        time.sleep(sleep_t)
+        if self.framed:
+            self.s.sendall(protocol.encode_action(action, value))
+        else:
+            self.s.sendall(str.encode(action+" "+value))
+        if sleep_t:
+            time.sleep(sleep_t)
         return 1
         #data = self.s.recv(2048)
         #print('Received', repr(data))
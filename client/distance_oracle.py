@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+from collections import deque
+from move_ordering import goal_side
+
+INFINITY = float("inf")
+
+OFFSETS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+
+
+class DistanceOracle:
+    """True distances on a board, taking into account that moves wrap around the edges of the board and that no player
+    can move onto an obstacle, while the player that does not try to reach a goal cannot move onto a goal either.
+    The distances are computed with breadth-first searches when the board is loaded (or, for the distances between
+    arbitrary cells, the first time they are needed) so that every query afterwards is a dictionary lookup."""
+
+    def __init__(self, obstacle_matrix, goal_positions, all_pairs=False):
+        """Computes the distance from every cell to the closest goal and the cell the blocking player should head to
+        for every position of the player that tries to reach a goal, together with the distances to that cell
+
+        Parameters:
+            obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+            goal_positions (list): list of the goal positions
+            all_pairs (bool): whether or not to compute the distances between every pair of cells right away
+        """
+        self.columns = len(obstacle_matrix)
+        self.rows = len(obstacle_matrix[0])
+        self.goal_positions = [tuple(goal) for goal in goal_positions]
+        self.free = [(x, y) for x in range(self.columns) for y in range(self.rows) if obstacle_matrix[x][y] == 0]
+        self.seeker_blocked = {(x, y) for x in range(self.columns) for y in range(self.rows)
+                               if obstacle_matrix[x][y] != 0}
+        self.blocker_blocked = self.seeker_blocked | set(self.goal_positions)
+
+        self.goal_distance = self.breadth_first_search(self.goal_positions, self.seeker_blocked)
+        self.goal_maps = {goal: self.breadth_first_search([goal], self.seeker_blocked) for goal in self.goal_positions}
+        self.seeker_maps = {}
+        self.blocker_maps = {}
+
+        self.targets = {pos: self.compute_blocking_target(pos) for pos in self.free}
+        for target in set(self.targets.values()):
+            self.blocker_distance(target, target)
+        if all_pairs:
+            for pos in self.free:
+                self.distance(pos, pos)
+                self.blocker_distance(pos, pos)
+
+    def breadth_first_search(self, sources, blocked):
+        """Computes the distance from the given sources to every cell that can be reached from them
+
+        Parameters:
+            sources (list): the positions the search starts from. They are expanded even if they are blocked
+            blocked (set): the positions that cannot be moved onto
+
+        Returns:
+            (dict): the distance of every reachable position
+        """
+        distances = {source: 0 for source in sources}
+        frontier = deque(sources)
+        while frontier:
+            x, y = frontier.popleft()
+            d = distances[(x, y)] + 1
+            for dx, dy in OFFSETS:
+                neighbour = ((x + dx) % self.columns, (y + dy) % self.rows)
+                if neighbour not in distances and neighbour not in blocked:
+                    distances[neighbour] = d
+                    frontier.append(neighbour)
+        return distances
+
+    def distance_to_goal(self, pos):
+        """Returns the number of moves the player that tries to reach a goal needs to get from a position to the
+        closest goal, ignoring the other player
+
+        Parameters:
+            pos (tuple): a position
+
+        Returns:
+            (int or float): the distance, INFINITY if no goal can be reached
+        """
+        return self.goal_distance.get(pos, INFINITY)
+
+    def distance(self, pos1, pos2):
+        """Returns the number of moves the player that tries to reach a goal needs to get from pos1 to pos2, ignoring
+        the other player
+
+        Parameters:
+            pos1 (tuple): a position
+            pos2 (tuple): another position
+
+        Returns:
+            (int or float): the distance, INFINITY if pos2 cannot be reached from pos1
+        """
+        distances = self.seeker_maps.get(pos2)
+        if distances is None:
+            distances = self.seeker_maps[pos2] = self.breadth_first_search([pos2], self.seeker_blocked)
+        return distances.get(pos1, INFINITY)
+
+    def blocker_distance(self, pos1, pos2):
+        """Returns the number of moves the player that does not try to reach a goal needs to get from pos1 to pos2,
+        ignoring the other player. If pos2 is an obstacle or a goal, this is one more than the distance to get next to it
+
+        Parameters:
+            pos1 (tuple): a position
+            pos2 (tuple): another position
+
+        Returns:
+            (int or float): the distance, INFINITY if pos2 cannot be reached from pos1
+        """
+        distances = self.blocker_maps.get(pos2)
+        if distances is None:
+            distances = self.blocker_maps[pos2] = self.breadth_first_search([pos2], self.blocker_blocked)
+        return distances.get(pos1, INFINITY)
+
+    def blocking_target(self, pos):
+        """Returns the cell the player that does not try to reach a goal should head to in order to block the other
+        player, when the other player is at the given position
+
+        Parameters:
+            pos (tuple): the position of the player that tries to reach a goal
+
+        Returns:
+            (tuple): the target cell
+        """
+        target = self.targets.get(pos)
+        if target is None:
+            target = self.targets[pos] = self.compute_blocking_target(pos)
+        return target
+
+    def compute_blocking_target(self, pos):
+        """Computes the blocking target of a position (see blocking_target): the cell next to the closest goal, by true
+        distance, on the side the position approaches it from"""
+        closest_goal = min(self.goal_positions, key=lambda goal: self.goal_maps[goal].get(pos, INFINITY))
+        target = goal_side(closest_goal, pos)
+        return target[0] % self.columns, target[1] % self.rows
@@ -1,14 +1,9 @@
 #!/usr/bin/env python3
-import math
 import socket
 import time
 import client as ct
-import ast
-import matplotlib.pyplot as plt
-import networkx as nx
-from networkx.drawing.nx_agraph import write_dot, graphviz_layout
 import random
-from hierarchy_pos import hierarchy_pos
+from tracing import NetworkXTracer
 
 instances = 1
 
@@ -21,14 +16,13 @@ action_dict = {
 }
 
 
-def result(state, action, graph=None):
+def result(state, action):
     """Defines the state that results from doing a certain action in a certain state.
     In other words, it is the transition model.
 
     Parameters:
         state (dict): state description dictionary
         action (string): action description string
-        graph (networkx.Graph or None): graph, used for visualization, may be None.
 
     Returns:
         state(dict): state description dictionary of the resulting state
@@ -41,11 +35,6 @@ def result(state, action, graph=None):
     if state["agent_id"] == 1:
         new_state["round"] += 1
 
-    if graph is not None:
-        new_state["node_name"] = state["node_name"]+str(new_state["agent_id"])+action  # NetworkX
-        graph.add_node(new_state["node_name"])#, **new_state)  # NetworkX
-        graph.add_edge(new_state["node_name"], state["node_name"], action=action)  # NetworkX
-
     global instances
     instances += 1
     return new_state
@@ -118,112 +107,87 @@ def actions(state):
     return [direction for direction in action_dict if can_move(state, direction)]
 
 
-def max_value(state, rounds, graph):
+def max_value(state, rounds, tracer=None, action=None):
     """Explores, in a tree-like fashion, the outcomes of all possible actions in a state from the perspective of the
     maximizing player.
 
     Parameters:
         state (dict): state description dictionary
         rounds (int): number of rounds the minimizing player has to get to the goals
-        graph (networkx.Graph): graph, used for visualization, may be None
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
+        action (str or None): the action that resulted in the state, only used to trace the search
 
     Returns:
         (int): the value to assign to this state, according to the minimax algorithm, from the perspective of the
         maximizing player.
     """
 
+    if tracer is not None:
+        tracer.on_enter(state, action)
     if terminal_test(state, rounds):
-        if graph is not None:
-            state["value"] = utility(state, rounds)  # NetworkX
-            graph.nodes[state["node_name"]]["value"] = utility(state)  # NetworkX
+        if tracer is not None:
+            tracer.on_terminal(utility(state, rounds))
         return utility(state, rounds)
     value = -1000
     for action in actions(state):
-        value = max(value, min_value(result(state, action, graph), rounds, graph))
+        value = max(value, min_value(result(state, action), rounds, tracer, action))
 
-    if graph is not None:
-        state["value"] = value  # NetworkX
-        graph.nodes[state["node_name"]]["value"] = value  # NetworkX
+    if tracer is not None:
+        tracer.on_exit(value)
     return value
 
 
-def min_value(state, rounds, graph):
+def min_value(state, rounds, tracer=None, action=None):
     """Explores, in a tree-like fashion, the outcomes of all possible actions in a state from the perspective of the
     minimizing player.
 
     Parameters:
         state (dict): state description dictionary
         rounds (int): number of rounds the minimizing player has to get to the goal
-        graph (networkx.Graph): graph, used for visualization, may be None
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
+        action (str or None): the action that resulted in the state, only used to trace the search
 
     Returns:
         (int): the value to assign to this state, according to the minimax algorithm, from the perspective of the
         minimizing player.
     """
 
+    if tracer is not None:
+        tracer.on_enter(state, action)
     if terminal_test(state, rounds):
-        if graph is not None:
-            state["value"] = utility(state, rounds)  # NetworkX
-            graph.nodes[state["node_name"]]["value"] = utility(state, rounds)  # NetworkX
+        if tracer is not None:
+            tracer.on_terminal(utility(state, rounds))
         return utility(state, rounds)
     value = 1000
     for action in actions(state):
-        value = min(value, max_value(result(state, action, graph), rounds, graph))
+        value = min(value, max_value(result(state, action), rounds, tracer, action))
 
-    if graph is not None:
-        state["value"] = value  # NetworkX
-        graph.nodes[state["node_name"]]["value"] = value  # NetworkX
+    if tracer is not None:
+        tracer.on_exit(value)
     return value
 
 
-def minimax_decision(state, rounds, graph=None):
+def minimax_decision(state, rounds, tracer=None):
     """Returns the action description string that corresponds to the best action the agent can execute, that is, to the
     action that leads to the outcome with the best utility for the agent, assuming the adversary wants to minimize it.
 
     Parameters:
         state (dict): state description dictionary. The state of the environment before the agent moves.
         rounds (int): number of rounds the minimizing player has to get to the goal
-        graph (networkx.Graph or None): graph used to represent and plot the decision tree
+        tracer (Tracer or None): receives the events of the search (see tracing.py)
     Returns:
         (str): the action description string.
     """
-    G = graph
-
-    a = {action: min_value(result(state, action, G), rounds, G) for action in actions(state)}
-
-    if G is not None:
-        labels = nx.get_node_attributes(G, "value")
-        edge_labels = nx.get_edge_attributes(G, "action")
-        # print(edge_labels)
-        plt.figure(figsize=(20, 20))
-
-        pos = hierarchy_pos(G, "root", width=2 * math.pi, xcenter=0)
-        new_pos = {u: (r * math.cos(theta), r * math.sin(theta)) for u, (theta, r) in pos.items()}
-
-        nx.draw(G, new_pos, node_size=20, alpha=0.5, node_color="blue", labels=labels)
-        nx.draw_networkx_edge_labels(G, new_pos, edge_labels=edge_labels)
-        plt.axis("equal")
-        plt.show()
+    if tracer is not None:
+        tracer.new_search()
+        tracer.on_enter(state, None)
+    a = {action: min_value(result(state, action), rounds, tracer, action) for action in actions(state)}
+    if tracer is not None:
+        tracer.on_exit(max(a.values()))
 
     return max(a, key=a.get)
 
 
-def parse_last_dict(bad_string):
-    """Returns the string that corresponds to the last open and closed curly brackets.
-    This is necessary due to the way the server/client interaction works, so as to identify the last server response.
-    Ideally, this would be unnecessary, but this had to be implemented due to time restrictions that prevented the group
-    from exploring the software.
-
-    Parameters:
-        bad_string (str): the string to parse
-
-    Returns:
-        (str): the resulting good string
-
-    """
-    return bad_string[bad_string.rindex("{"):]
-
-
 def main(rounds=5, visualization=False):
     """Game loop. Creates two clients and cycles between them.
     The first client is the minimizing player, or the human,
@@ -250,22 +214,23 @@ def main(rounds=5, visualization=False):
             print("Action Value pair:", action, " ", value)
             client_min.execute(action, value)
 
-            state = ast.literal_eval(parse_last_dict(client_max.receiveData()))
-            state["node_name"] = "root"
+            state = client_max.receive_state()
             print("Round: ",state["round"])
 
             start = time.perf_counter()
-            g = nx.Graph() if visualization else None
-            value = minimax_decision(state, rounds, g)
+            tracer = NetworkXTracer() if visualization else None
+            value = minimax_decision(state, rounds, tracer)
             stop = time.perf_counter()
 
             print("Max > command", value)
             print("Elapsed time:", stop - start, "Generated nodes:", instances)
             if visualization:
-                print("Generated nodes:", g.number_of_nodes())
+                print("Generated nodes:", tracer.graph.number_of_nodes())
             client_max.execute("command", value)
+            if visualization:
+                tracer.draw("search_tree_round_%d.png" % state["round"])
 
-            if terminal_test(result(state, value, None), rounds):
+            if terminal_test(result(state, value), rounds):
                 input("O jogo terminou.")
                 break
             instances = 1
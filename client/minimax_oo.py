@@ -1,18 +1,21 @@
 #!/usr/bin/env python3
-import math
 import time
 
 import client as ct
-import ast
-import matplotlib.pyplot as plt
-import networkx as nx
-from hierarchy_pos import hierarchy_pos
+import bitboard
+from move_tables import build_move_tables
+from tracing import CountingTracer, NetworkXTracer
 
 
 class State:
 
+    __slots__ = ("is_max_turn", "min_pos", "max_pos", "round")
+
     instances = 0
 
+    # Receives the events of the search when attached (see tracing.py)
+    tracer = None
+
     action_offset = {
         "stay": (0, 0),
         "north": (0, -1),
@@ -24,41 +27,46 @@ class State:
     goal_positions = None
     max_rounds = None
     obstacle_matrix = None
+    move_table = None
 
     @classmethod
     def set_obstacle_matrix(cls, obstacle_matrix):
         """Defines the obstacle matrix, where at indexes [x][y] 1 means there is an obstacle at position at (x,y),
-        0 otherwise. Also defines the dimensions of the board"""
+        0 otherwise. Also defines the dimensions of the board and, if the board changed, the tables derived from it"""
+        if obstacle_matrix == cls.obstacle_matrix:
+            return
         cls.obstacle_matrix = obstacle_matrix
         cls.columns = len(obstacle_matrix)
         cls.rows = len(obstacle_matrix[0])
+        cls.update_board_tables()
 
     @classmethod
     def set_goal_positions(cls, goal_positions):
-        """Defines the goal positions for the round that will be examined by the algorithm"""
+        """Defines the goal positions for the round that will be examined by the algorithm and, if they changed, the
+        tables derived from them"""
+        if goal_positions == cls.goal_positions:
+            return
         cls.goal_positions = goal_positions
+        cls.update_board_tables()
+
+    @classmethod
+    def update_board_tables(cls):
+        """Precomputes the moves each player can make from every cell of the board (see move_tables.py), once both
+        the obstacle matrix and the goal positions are known"""
+        if cls.obstacle_matrix is not None and cls.goal_positions is not None:
+            cls.move_table = build_move_tables(cls.obstacle_matrix, cls.goal_positions, cls.action_offset, True)
 
     @classmethod
     def set_max_rounds(cls, max_rounds):
         """Defines the duration of the game, which is also the depth of the search tree"""
         cls.max_rounds = max_rounds
 
-    def __init__(self, is_max_turn, min_pos, max_pos, previous_round, graph=None, previous_name=None, action=None):
-        """Defines the state's attributes and, if visualization is enabled (work in progress), adds a corresponding node
-        and edge to the tree graph."""
+    def __init__(self, is_max_turn, min_pos, max_pos, previous_round):
+        """Defines the state's attributes"""
         self.is_max_turn = is_max_turn
         self.min_pos = min_pos
         self.max_pos = max_pos
         self.round = previous_round + (1 if is_max_turn else 0)
-        self.graph = graph
-        self.name = "root"
-        self.action = action
-
-        # TODO: fix graph issues
-        if self.graph is not None and (previous_name != None):
-            self.name = previous_name+str("Max" if self.is_max_turn else "Min")+str(self.max_pos if self.is_max_turn else self.min_pos)
-            graph.add_node(self.name)  # NetworkX
-            graph.add_edge(previous_name, self.name, action=action)  # NetworkX
 
         State.instances += 1
 
@@ -73,15 +81,14 @@ class State:
             (State): the resulting state
         """
         if self.is_max_turn:
-            new_max_pos = (self.max_pos[0] + self.action_offset[action][0],
-                           self.max_pos[1] + self.action_offset[action][1])
+            new_max_pos = ((self.max_pos[0] + self.action_offset[action][0]) % self.columns,
+                           (self.max_pos[1] + self.action_offset[action][1]) % self.rows)
             new_min_pos = self.min_pos
         else:
-            new_min_pos = (self.min_pos[0] + self.action_offset[action][0],
-                           self.min_pos[1] + self.action_offset[action][1])
+            new_min_pos = ((self.min_pos[0] + self.action_offset[action][0]) % self.columns,
+                           (self.min_pos[1] + self.action_offset[action][1]) % self.rows)
             new_max_pos = self.max_pos
-        return State(not self.is_max_turn, new_min_pos, new_max_pos, self.round,
-                     graph=self.graph, previous_name=self.name, action=action)
+        return type(self)(not self.is_max_turn, new_min_pos, new_max_pos, self.round)
 
     def utility(self):
         """Utility function (or payoff function). Defines the final numeric value for the game that ends in the state.
@@ -91,10 +98,7 @@ class State:
         Returns:
             (int) 0 if the minimizing player wins, 1 if the maximizing player wins
         """
-        u = 0 if self.min_pos in self.goal_positions else 1
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = u
-        return u
+        return 0 if self.min_pos in self.goal_positions else 1
 
     def is_terminal(self):
         """Checks whether or not the game is over. Returns True if so, False otherwise.
@@ -105,6 +109,15 @@ class State:
         """
         return self.min_pos in State.goal_positions or self.round >= State.max_rounds
 
+    def positions(self):
+        """Returns the position of both players as (x, y) tuples
+
+        Returns:
+            (tuple): the position of the minimizing player
+            (tuple): the position of the maximizing player
+        """
+        return self.min_pos, self.max_pos
+
     def is_legal(self, action):
         """Checks whether or not the next player can perform a certain action.
 
@@ -132,52 +145,88 @@ class State:
         Returns:
             (list) list of strings representing all legal actions ("north", "south", "east", "west" or "stay")
         """
-        return [action for action in State.action_offset if self.is_legal(action)]
+        player_pos, other_pos = (self.max_pos, self.min_pos) if self.is_max_turn else (self.min_pos, self.max_pos)
+        moves = State.move_table[self.is_max_turn][player_pos]
+        return [action for action, destination in moves if destination != other_pos]
 
-    def max_value(self):
+    def max_value(self, action=None):
         """Explores, in a tree-like fashion, the outcomes of all possible actions in the state from the perspective of
         the maximizing player.
 
+        Parameters:
+            action (str or None): the action that resulted in the state, only used to trace the search
+
         Returns:
             (int): the value to assign to this state, according to the minimax algorithm, from the perspective of the
             maximizing player.
         """
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action)
         if self.is_terminal():
-            return self.utility()
+            value = self.utility()
+            if tracer is not None:
+                tracer.on_terminal(value)
+            return value
 
         value = -1000
         for action in self.actions():
-            value = max(value, self.result(action).min_value())
+            value = max(value, self.result(action).min_value(action))
 
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = value
+        if tracer is not None:
+            tracer.on_exit(value)
         return value
 
-    def min_value(self):
+    def min_value(self, action=None):
         """Explores, in a tree-like fashion, the outcomes of all possible actions in a state from the perspective of the
         minimizing player.
 
+        Parameters:
+            action (str or None): the action that resulted in the state, only used to trace the search
+
         Returns:
             (int): the value to assign to this state, according to the minimax algorithm, from the perspective of the
             minimizing player.
         """
+        tracer = State.tracer
+        if tracer is not None:
+            tracer.on_enter(self, action)
         if self.is_terminal():
-            return self.utility()
+            value = self.utility()
+            if tracer is not None:
+                tracer.on_terminal(value)
+            return value
 
         value = 1000
         for action in self.actions():
-            value = min(value, self.result(action).max_value())
+            value = min(value, self.result(action).max_value(action))
 
-        if self.graph is not None:
-            self.graph.nodes[self.name]["value"] = value
+        if tracer is not None:
+            tracer.on_exit(value)
         return value
 
+class BitboardState(bitboard.BitboardState, State):
+    """State of the game where the positions of both players are cell indexes of a bitboard (see bitboard.py), which
+    replaces the tuple arithmetic and the obstacle matrix lookups of State with lookups in tables indexed by cell"""
+
+    __slots__ = ()
+
+    min_seeks_goal = True
+
+
 class Agent:
     """Describes an adversarial agent"""
 
-    def __init__(self):
-        """Simply initializes the agent"""
+    def __init__(self, bitboard=False, tracer=None):
+        """Simply initializes the agent
+
+        Parameters:
+            bitboard (bool): whether or not the states are represented with a bitboard (see BitboardState)
+            tracer (Tracer or None): receives the events of the searches of the agent (see tracing.py)
+        """
         self.current_state = None
+        self.bitboard = bitboard
+        self.tracer = tracer
 
     def set_state(self, state_description):
         """Defines the current state of the game from a state description dictionary provided by the Agent1 server
@@ -186,13 +235,17 @@ class Agent:
             state_description (dict): the state description dictionary
 
         """
+        if self.bitboard:
+            BitboardState.load_board()
+            self.current_state = BitboardState(state_description["agent_id"] == 0,
+                                               BitboardState.board.cell(state_description["agents"][0]),
+                                               BitboardState.board.cell(state_description["agents"][1]),
+                                               state_description["round"])
+            return
         self.current_state = State(state_description["agent_id"] == 0,
                                    state_description["agents"][0],
                                    state_description["agents"][1],
-                                   state_description["round"],
-                                   None,  # nx.Graph(),
-                                   None,
-                                   "root")
+                                   state_description["round"])
 
     def minimax_decision(self):
         """Returns the action description string that corresponds to the best action the agent can execute, that is, to
@@ -202,49 +255,30 @@ class Agent:
         Returns:
             (str): the action description string.
         """
-        a = {action: self.current_state.result(action).min_value() for action in self.current_state.actions()}
-
-        if self.current_state.graph is not None:
-            # From Joel's answer at https://stackoverflow.com/a/29597209/2966723
-
-            labels = nx.get_node_attributes(self.current_state.graph, "value")
-            edge_labels = nx.get_edge_attributes(self.current_state.graph, "action")
-            # print(edge_labels)
-            plt.figure(figsize=(20, 20))
-
-            pos = hierarchy_pos(self.current_state.graph, "root", width=2 * math.pi, xcenter=0)
-            new_pos = {u: (r * math.cos(theta), r * math.sin(theta)) for u, (theta, r) in pos.items()}
-
-            nx.draw(self.current_state.graph, new_pos, node_size=20, alpha=0.5, node_color="blue", labels=labels)
-            nx.draw_networkx_edge_labels(self.current_state.graph, new_pos, edge_labels=edge_labels)
-            plt.axis("equal")
-            plt.show()
+        State.tracer = self.tracer
+        if self.tracer is not None:
+            self.tracer.new_search()
+            self.tracer.on_enter(self.current_state, None)
+        a = {action: self.current_state.result(action).min_value(action) for action in self.current_state.actions()}
+        if self.tracer is not None:
+            self.tracer.on_exit(max(a.values()))
 
         return max(a, key=a.get)
 
-def parse_last_dict(bad_string):
-    """Returns the string that corresponds to the last open and closed curly brackets.
-    This is necessary due to the way the server/client interaction works, so as to identify the last server response.
-    Ideally, this would be unnecessary, but this had to be implemented due to time restrictions that prevented the group
-    from exploring the software.
-
-    Parameters:
-        bad_string (str): the string to parse
-
-    Returns:
-        (str): the resulting good string
-
-    """
-    return bad_string[bad_string.rindex("{"):]
-
-
-def main(rounds):
+def main(rounds, bitboard=False, tracer=None):
     """Game loop. Creates two clients and cycles between them.
     The first client is the minimizing player, or the human,
     and so the program waits for user input and sends the corresponding action value pair to the server.
     The second
     client is the maximizing player, and so the program calculates the best possible decision based on the minimax algorithm and sends
     the corresponding action value pair to the server.
+
+    Parameters:
+        rounds (int): the number of game rounds
+        bitboard (bool): whether or not the maximizing player represents the states with a bitboard
+        tracer (Tracer or None): receives the events of the searches of the maximizing player (see tracing.py). A
+        NetworkXTracer draws the tree of every move to search_tree_round_<round>.png, once the move is sent, and a
+        CountingTracer prints its counts
     """
     client_min = ct.Client('127.0.0.1', 50000)
     client_max = ct.Client('127.0.0.1', 50000)
@@ -252,16 +286,20 @@ def main(rounds):
     res_max = client_max.connect()
     if all(res != -1 for res in (res_min, res_max)):
 
-        agent = Agent()
+        agent = Agent(bitboard, tracer)
         State.set_max_rounds(rounds)
+        board_version = None
 
         while True:
             command, action = input("Min > ").split(" ")
             client_min.execute(command, action)
 
-            state = ast.literal_eval(parse_last_dict(client_max.receiveData()))
-            State.set_goal_positions(state["goals"])
-            State.set_obstacle_matrix(state["obstacles"])
+            state = client_max.receive_state()
+            # The tables derived from the board are only rebuilt when the server sends a new version of it
+            if state["board_version"] != board_version:
+                board_version = state["board_version"]
+                State.set_goal_positions(state["goals"])
+                State.set_obstacle_matrix(state["obstacles"])
             agent.set_state(state)
 
             start = time.perf_counter()
@@ -270,9 +308,13 @@ def main(rounds):
 
             print("Max > command", action)
             print("Elapsed time:", stop - start, " # of Nodes:", State.instances)
+            if isinstance(tracer, CountingTracer):
+                print(tracer.summary())
             State.instances = 0
 
             client_max.execute("command", action)
+            if isinstance(tracer, NetworkXTracer):
+                tracer.draw("search_tree_round_%d.png" % state["round"])
 
             if agent.current_state.result(action).is_terminal():
                 input("O jogo terminou.")
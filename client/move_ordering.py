@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+GOAL_ADJACENT_OFFSETS = ((0, 0), (0, -1), (0, 1), (1, 0), (-1, 0))
+
+
+def manhattan_distance(pos1, pos2):
+    """ The Manhattan distance between two positions
+
+    Parameters:
+        pos1 (tuple or list): a position
+        pos2 (tuple or list): another position
+
+    Returns:
+        (int or float): the Manhattan distance between pos1 and pos2
+    """
+    return abs(pos2[0] - pos1[0]) + abs(pos2[1] - pos1[1])
+
+
+def goal_side(goal, pos):
+    """The cell next to a goal on the side a position approaches it from, which is where the maximizing player should
+    stand to block the minimizing player at that position
+
+    Parameters:
+        goal (tuple): the position of the goal
+        pos (tuple): the position of the minimizing player
+
+    Returns:
+        (tuple): the goal-adjacent cell, which may lie outside the board
+    """
+    dx, dy = goal[0] - pos[0], goal[1] - pos[1]
+    if dx >= 0 and dx >= abs(dy):
+        return goal[0] + 1, goal[1]
+    if dx <= 0 and dx >= abs(dy):
+        return goal[0] - 1, goal[1]
+    if dy >= 0 and dx < abs(dy):
+        return goal[0], goal[1] + 1
+    return goal[0], goal[1] - 1
+
+
+class KillerTargets:
+    """Lookup, for a set of goals, from the position of the minimizing player to the positions the killer-moves
+    heuristic measures distances to: the goal closest to the minimizing player and the goal-adjacent cell the maximizing
+    player should head to in order to block it. Each position is computed once, so ranking an action only costs a table
+    read and a Manhattan distance."""
+
+    cached = None
+
+    @classmethod
+    def for_goals(cls, goal_positions):
+        """Returns the lookup for the given goals, reusing the last one built if the goals did not change
+
+        Parameters:
+            goal_positions (list): list of the goal positions
+
+        Returns:
+            (KillerTargets): the lookup
+        """
+        if cls.cached is None or (cls.cached.goal_positions is not goal_positions and
+                                  cls.cached.goal_positions != goal_positions):
+            cls.cached = cls(goal_positions)
+        return cls.cached
+
+    def __init__(self, goal_positions, columns=None, rows=None):
+        """Defines the goals and, if the dimensions of the board are given, computes the targets of every position
+
+        Parameters:
+            goal_positions (list): list of the goal positions
+            columns (int or None): the number of columns of the board
+            rows (int or None): the number of rows of the board
+        """
+        self.goal_positions = goal_positions
+        self.targets = {}
+        if columns is not None and rows is not None:
+            for x in range(columns):
+                for y in range(rows):
+                    self.lookup((x, y))
+
+    def lookup(self, min_pos):
+        """Returns the targets for a position of the minimizing player
+
+        Parameters:
+            min_pos (tuple): the position of the minimizing player
+
+        Returns:
+            (tuple): the goal closest to min_pos
+            (tuple): the cell next to that goal on the side min_pos approaches it from
+            (tuple): the cell among that goal and its neighbours that is closest to min_pos
+        """
+        targets = self.targets.get(min_pos)
+        if targets is None:
+            targets = self.targets[min_pos] = self.compute(min_pos)
+        return targets
+
+    def compute(self, min_pos):
+        """Computes the targets for a position of the minimizing player (see lookup)"""
+        closest_goal = min(self.goal_positions, key=lambda x: manhattan_distance(x, min_pos))
+
+        blocking_target = goal_side(closest_goal, min_pos)
+        adjacent_target = min([(closest_goal[0] + i, closest_goal[1] + j) for i, j in GOAL_ADJACENT_OFFSETS],
+                              key=lambda x: manhattan_distance(x, min_pos))
+
+        return closest_goal, blocking_target, adjacent_target
+
+
+class MoveHistory:
+    """Move ordering learned from the cutoffs of the search, meant to be kept for a whole game so that each search
+    starts from what the previous ones learned. It combines two heuristics:
+    killer slots, which keep, for each ply, the last actions that caused a cutoff in a state of that ply, and the
+    history table, which counts, for each player, cell and action, how useful the action was in past cutoffs (weighted
+    by the depth left, since cutoffs close to the root save more work). Both only reorder the actions they are given, so
+    the static ordering those actions come in breaks the ties.
+    Plies are numbered from the start of the game, which keeps the killer slots meaningful from one move to the
+    next."""
+
+    killer_slots = 2
+
+    def __init__(self):
+        """Starts with empty killer slots, history table and statistics"""
+        self.killers = {}
+        self.history = {}
+        self.statistics = {}
+
+    def clear(self):
+        """Forgets everything that was learned, which is needed when the board changes"""
+        self.killers = {}
+        self.history = {}
+        self.statistics = {}
+
+    def new_search(self):
+        """Prepares for the search of a new move: the history table is halved, so that recent cutoffs weigh more than
+        old ones, and the statistics start over"""
+        self.history = {key: score // 2 for key, score in self.history.items() if score > 1}
+        self.statistics = {}
+
+    def order(self, actions, ply, is_max_turn, pos):
+        """Orders actions by the killer slots of the ply, then by their history score
+
+        Parameters:
+            actions (list): the legal actions, in the order of the static heuristic
+            ply (int): the ply of the state
+            is_max_turn (bool): whether or not the maximizing player is the one to play
+            pos (tuple or int): the position of the player to play
+
+        Returns:
+            (list): the ordered actions
+        """
+        history = self.history
+        if history:
+            actions = sorted(actions, key=lambda a: -history.get((is_max_turn, pos, a), 0))
+        killers = self.killers.get(ply)
+        if killers:
+            front = [a for a in killers if a in actions]
+            if front:
+                actions = front + [a for a in actions if a not in front]
+        return actions
+
+    def update(self, ply, is_max_turn, pos, action, depth, cutoff):
+        """Learns from the search of a state
+
+        Parameters:
+            ply (int): the ply of the state
+            is_max_turn (bool): whether or not the maximizing player is the one to play
+            pos (tuple or int): the position of the player to play
+            action (str): the best action found in the state
+            depth (int): the number of rounds left in the state
+            cutoff (int or None): the index, in the order the actions were tried, of the action that caused a cutoff,
+            or None if there was no cutoff
+        """
+        statistics = self.statistics.get(ply)
+        if statistics is None:
+            statistics = self.statistics[ply] = [0, 0, 0]
+        statistics[0] += 1
+        if cutoff is None:
+            return
+        statistics[1] += 1
+        if cutoff == 0:
+            statistics[2] += 1
+
+        key = (is_max_turn, pos, action)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+        killers = self.killers.setdefault(ply, [])
+        if action in killers:
+            killers.remove(action)
+        killers.insert(0, action)
+        del killers[self.killer_slots:]
+
+    def cutoff_statistics(self):
+        """Returns the statistics of the current search
+
+        Returns:
+            (list): one (ply, searched states, cutoffs, cutoffs by the first action) tuple per ply, in ply order
+        """
+        return [(ply, *self.statistics[ply]) for ply in sorted(self.statistics)]
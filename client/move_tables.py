@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+
+def build_move_tables(obstacle_matrix, goal_positions, action_offset, min_seeks_goal=True):
+    """Precomputes, for a board, the moves each player can make from every cell, leaving only the check for the cell of
+    the other player to be done during the search. Moves wrap around the edges of the board, cannot end on an obstacle
+    and, for the player that does not try to reach a goal, cannot end on a goal.
+
+    Parameters:
+        obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+        goal_positions (list): list of the goal positions
+        action_offset (dict): the (dx, dy) offset of each action, in the order the actions should be tried
+        min_seeks_goal (bool): True if the minimizing player is the one trying to reach a goal, False if it is the
+        maximizing player
+
+    Returns:
+        (dict): indexed by whether or not the player is the maximizing player, a dictionary that maps every (x, y)
+        position to the tuple of the (action, destination) pairs the player can choose from
+    """
+    columns = len(obstacle_matrix)
+    rows = len(obstacle_matrix[0])
+    goals = set(tuple(goal) for goal in goal_positions)
+    tables = {}
+    for is_max in (True, False):
+        avoids_goals = is_max == min_seeks_goal
+        table = {}
+        for x in range(columns):
+            for y in range(rows):
+                moves = []
+                for action, (dx, dy) in action_offset.items():
+                    destination = ((x + dx) % columns, (y + dy) % rows)
+                    if obstacle_matrix[destination[0]][destination[1]] == 0 and \
+                            not (avoids_goals and destination in goals):
+                        moves.append((action, destination))
+                table[(x, y)] = tuple(moves)
+        tables[is_max] = table
+    return tables
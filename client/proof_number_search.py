@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+INFINITY = 10 ** 9
+
+
+class ProofNumberSearch:
+    """Depth-first proof-number search (df-pn) of the states of alphabeta_oo. Since every game ends with utility 0 or 1,
+    searching a state amounts to proving (value 1) or disproving (value 0) that the maximizing player can keep the
+    minimizing player away from the goals until the end of the game.
+
+    The proof number of a state is the least number of leaves that still have to be proved to prove it, and the
+    disproof number the least number that still have to be disproved to disprove it. The search always expands the
+    state that is cheapest to settle and only moves to another part of the tree once the numbers of the current one
+    exceed the thresholds it was given. The numbers of the states are kept in a table indexed by the state key, which
+    is what makes the search depth-first."""
+
+    def __init__(self):
+        """Starts with an empty table"""
+        self.table = {}
+        self.expanded = 0
+        self.proof_number = None
+        self.disproof_number = None
+
+    def numbers(self, state):
+        """Returns the proof and disproof numbers of a state, evaluating it if it was never seen: a state where the
+        game is over, or where the minimizing player can no longer reach a goal, is settled right away, any other one
+        starts with both numbers at 1
+
+        Parameters:
+            state (State): the state
+
+        Returns:
+            (int): the proof number
+            (int): the disproof number
+        """
+        key = state.key()
+        numbers = self.table.get(key)
+        if numbers is None:
+            if state.is_terminal():
+                numbers = (0, INFINITY) if state.utility() == 1 else (INFINITY, 0)
+            elif type(state).distance_oracle is not None and state.out_of_reach():
+                numbers = (0, INFINITY)
+            else:
+                numbers = (1, 1)
+            self.table[key] = numbers
+        return numbers
+
+    def search(self, state):
+        """Proves or disproves a state in which the maximizing player is the next to play
+
+        Parameters:
+            state (State): the state
+
+        Returns:
+            (str): the action of the maximizing player that keeps the proof, or the first action if the state was
+            disproved
+            (int): the value of the state, 1 if it was proved, 0 if it was disproved
+        """
+        self.expanded = 0
+        proof_number, disproof_number = self.numbers(state)
+        if proof_number != 0 and disproof_number != 0:
+            proof_number, disproof_number = self.multiple_iterative_deepening(state, INFINITY, INFINITY)
+        self.proof_number, self.disproof_number = proof_number, disproof_number
+
+        actions = state.actions()
+        if proof_number == 0:
+            for a in actions:
+                if self.numbers(state.result(a))[0] == 0:
+                    return a, 1
+        return (actions[0] if actions else "stay"), 1 if proof_number == 0 else 0
+
+    def multiple_iterative_deepening(self, state, proof_threshold, disproof_threshold):
+        """Expands a state that is not settled until its proof number reaches proof_threshold or its disproof number
+        reaches disproof_threshold. The maximizing player needs one of its actions to be proved (its proof number is the
+        smallest one of its children and its disproof number their sum), while the minimizing player needs one of its
+        actions to be disproved (the other way around)
+
+        Parameters:
+            state (State): the state
+            proof_threshold (int): the proof number at which to stop
+            disproof_threshold (int): the disproof number at which to stop
+
+        Returns:
+            (int): the proof number of the state
+            (int): the disproof number of the state
+        """
+        state.check_deadline()
+        self.expanded += 1
+        key = state.key()
+        children = [state.result(a) for a in state.actions()]
+        while True:
+            numbers = [self.numbers(child) for child in children]
+            if state.is_max_turn:
+                proof_number = min(p for p, _ in numbers)
+                disproof_number = min(INFINITY, sum(d for _, d in numbers))
+            else:
+                proof_number = min(INFINITY, sum(p for p, _ in numbers))
+                disproof_number = min(d for _, d in numbers)
+            self.table[key] = (proof_number, disproof_number)
+            if proof_number >= proof_threshold or disproof_number >= disproof_threshold:
+                return proof_number, disproof_number
+
+            # The child to expand is the one that is cheapest to settle in the player's favour. It is searched until
+            # it stops being so, that is, until it costs more than the second cheapest one
+            side = 0 if state.is_max_turn else 1
+            best, second = None, INFINITY
+            for i, child_numbers in enumerate(numbers):
+                if best is None or child_numbers[side] < numbers[best][side]:
+                    if best is not None:
+                        second = numbers[best][side]
+                    best = i
+                elif child_numbers[side] < second:
+                    second = child_numbers[side]
+            child_proof, child_disproof = numbers[best]
+            if state.is_max_turn:
+                child_proof_threshold = min(proof_threshold, second + 1)
+                child_disproof_threshold = disproof_threshold - disproof_number + child_disproof
+            else:
+                child_proof_threshold = proof_threshold - proof_number + child_proof
+                child_disproof_threshold = min(disproof_threshold, second + 1)
+            self.multiple_iterative_deepening(children[best], child_proof_threshold, child_disproof_threshold)
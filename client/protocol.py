@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+import select
+import socket
+import struct
+import time
+import zlib
+
+# Sent by a client right after connecting to ask for framed messages. The server answers the clients that do not send
+# it with the text messages of the original protocol
+HELLO = b"AGP\x02"
+HELLO_TIMEOUT = 1.0
+
+# Every framed message starts with the length of its body and its kind. The server sends the board (obstacles and
+# goals) once, when the client connects, and again only if it changes, and after every action a delta with what moves
+FRAME = struct.Struct("!IB")
+ID = 1
+BOARD = 2
+DELTA = 3
+ACTION = 4
+
+AGENT_ID = struct.Struct("!H")
+# Version of the board (a checksum of the rest of the message), number of columns and rows and number of goals. The
+# header is followed by the goals, as pairs of coordinates, and by the obstacle matrix, one bit per cell
+BOARD_HEADER = struct.Struct("!IHHH")
+# Id of the agent that acted, round, number of agents and number of positions visited since the last delta. The header
+# is followed by the positions of the agents and by the visited positions, as pairs of coordinates
+DELTA_HEADER = struct.Struct("!HIHH")
+
+RECEIVE_SIZE = 65536
+
+
+def frame(kind, body):
+    """Frames the body of a message
+
+    Parameters:
+        kind (int): the kind of message (ID, BOARD, DELTA or ACTION)
+        body (bytes): the body
+
+    Returns:
+        (bytes): the message, ready to be sent
+    """
+    return FRAME.pack(len(body), kind) + body
+
+
+def encode_id(agent_id):
+    """Encodes the message that tells a client its agent id
+
+    Parameters:
+        agent_id (int): the agent id
+
+    Returns:
+        (bytes): the message
+    """
+    return frame(ID, AGENT_ID.pack(agent_id))
+
+
+def encode_action(command, value):
+    """Encodes an action value pair, such as ("command", "north") or ("moveto", "(3,4)")
+
+    Parameters:
+        command (str): the action
+        value (str): its value
+
+    Returns:
+        (bytes): the message
+    """
+    return frame(ACTION, (command + " " + value).encode())
+
+
+def encode_board(obstacles, goals):
+    """Encodes the board, which the clients keep until they receive another version of it
+
+    Parameters:
+        obstacles (list): the obstacle matrix, where at indexes [x][y] 1 means there is an obstacle at (x,y)
+        goals (list): the goal positions
+
+    Returns:
+        (int): the version of the board
+        (bytes): the message
+    """
+    columns = len(obstacles)
+    rows = len(obstacles[0]) if columns else 0
+    coordinates = [coordinate for goal in goals for coordinate in goal]
+    body = (struct.pack("!HHH%dH" % len(coordinates), columns, rows, len(goals), *coordinates)
+            + pack_matrix(obstacles))
+    version = zlib.crc32(body)
+    return version, frame(BOARD, struct.pack("!I", version) + body)
+
+
+def encode_delta(agent_id, round, agents, visited):
+    """Encodes what changed after an action
+
+    Parameters:
+        agent_id (int): the id of the agent that acted
+        round (int): the round
+        agents (list): the positions of all agents
+        visited (list): the positions visited since the last delta
+
+    Returns:
+        (bytes): the message
+    """
+    coordinates = [coordinate for positions in (agents, visited) for position in positions for coordinate in position]
+    return frame(DELTA, DELTA_HEADER.pack(agent_id, round, len(agents), len(visited))
+                 + struct.pack("!%dH" % len(coordinates), *coordinates))
+
+
+def board_version(obstacles, goals):
+    """Returns the version the server gives a board, for clients that receive it some other way
+
+    Parameters:
+        obstacles (list): the obstacle matrix
+        goals (list): the goal positions
+
+    Returns:
+        (int): the version
+    """
+    return encode_board(obstacles, goals)[0]
+
+
+def pack_matrix(matrix):
+    """Packs a matrix of 0s and 1s, one bit per cell, column after column
+
+    Parameters:
+        matrix (list): the matrix, indexed by column and then by row
+
+    Returns:
+        (bytes): the packed matrix
+    """
+    bits = "".join("1" if cell else "0" for column in matrix for cell in column)
+    size = (len(bits) + 7) // 8
+    return int(bits.ljust(size * 8, "0") or "0", 2).to_bytes(size, "big")
+
+
+def unpack_matrix(data, columns, rows):
+    """Unpacks a matrix packed by pack_matrix
+
+    Parameters:
+        data (bytes): the packed matrix
+        columns (int): the number of columns
+        rows (int): the number of rows
+
+    Returns:
+        (list): the matrix, indexed by column and then by row
+    """
+    bits = format(int.from_bytes(data, "big"), "0%db" % (len(data) * 8))
+    return [list(map(int, bits[column * rows:(column + 1) * rows])) for column in range(columns)]
+
+
+def positions(coordinates):
+    """Pairs up a flat sequence of coordinates
+
+    Parameters:
+        coordinates (tuple): the coordinates
+
+    Returns:
+        (list): the positions, as tuples
+    """
+    return list(zip(coordinates[::2], coordinates[1::2]))
+
+
+def decode_board(body):
+    """Decodes the body of a board message
+
+    Parameters:
+        body (bytes): the body
+
+    Returns:
+        (dict): the version, obstacle matrix and goal positions of the board
+    """
+    version, columns, rows, nr_goals = BOARD_HEADER.unpack_from(body)
+    goals = positions(struct.unpack_from("!%dH" % (2 * nr_goals), body, BOARD_HEADER.size))
+    return {"version": version,
+            "obstacles": unpack_matrix(body[BOARD_HEADER.size + 4 * nr_goals:], columns, rows),
+            "goals": goals}
+
+
+def decode_delta(body):
+    """Decodes the body of a delta message
+
+    Parameters:
+        body (bytes): the body
+
+    Returns:
+        (dict): the id of the agent that acted, the round, the positions of the agents and the visited positions
+    """
+    agent_id, round, nr_agents, nr_visited = DELTA_HEADER.unpack_from(body)
+    coordinates = positions(struct.unpack_from("!%dH" % (2 * (nr_agents + nr_visited)), body, DELTA_HEADER.size))
+    return {"agent_id": agent_id,
+            "round": round,
+            "agents": coordinates[:nr_agents],
+            "visited": coordinates[nr_agents:]}
+
+
+DECODERS = {ID: lambda body: AGENT_ID.unpack(body)[0],
+            BOARD: decode_board,
+            DELTA: decode_delta,
+            ACTION: bytes.decode}
+
+
+class Mirror:
+    """Copy of the world a client keeps from the board and delta messages it receives, from which it rebuilds the
+    same state description dictionary the text protocol gives, with the version of the board added to it."""
+
+    def __init__(self):
+        """Starts with an empty world"""
+        self.board_version = None
+        self.obstacles = []
+        self.goals = []
+        self.agent_id = None
+        self.agents = []
+        self.visited = []
+        self.round = 0
+
+    def apply(self, kind, value):
+        """Updates the world with a message
+
+        Parameters:
+            kind (int): the kind of message
+            value: the decoded body of the message
+        """
+        if kind == BOARD:
+            self.board_version = value["version"]
+            self.obstacles = value["obstacles"]
+            self.goals = value["goals"]
+        elif kind == DELTA:
+            self.agent_id = value["agent_id"]
+            self.round = value["round"]
+            self.agents = value["agents"]
+            self.visited.extend(value["visited"])
+
+    def state(self):
+        """Returns the world as a state description dictionary. The obstacle matrix and goal positions are shared
+        with the mirror, and only replaced when a new version of the board is received
+
+        Returns:
+            (dict): state description dictionary
+        """
+        return {"agent_id": self.agent_id,
+                "agents": list(self.agents),
+                "obstacles": self.obstacles,
+                "goals": self.goals,
+                "visited": list(self.visited),
+                "round": self.round,
+                "board_version": self.board_version}
+
+
+class MessageReader:
+    """Reads framed messages from a socket. Whatever is received is kept in a buffer, so that messages split across
+    several receptions, or several messages received at once, are all read whole and in order."""
+
+    def __init__(self, connection):
+        """Starts with an empty buffer
+
+        Parameters:
+            connection (socket): the socket to read from
+        """
+        self.connection = connection
+        self.buffer = bytearray()
+
+    def next(self):
+        """Takes the next message out of the buffer, without receiving anything
+
+        Returns:
+            (tuple or None): the kind and the decoded body of the message, None if the buffer does not hold a whole one
+        """
+        if len(self.buffer) < FRAME.size:
+            return None
+        length, kind = FRAME.unpack_from(self.buffer)
+        end = FRAME.size + length
+        if len(self.buffer) < end:
+            return None
+        body = bytes(self.buffer[FRAME.size:end])
+        del self.buffer[:end]
+        return kind, DECODERS[kind](body)
+
+    def read(self):
+        """Returns the next message, waiting for it to be received if needed
+
+        Returns:
+            (tuple): the kind and the decoded body of the message
+        """
+        message = self.next()
+        while message is None:
+            self.receive()
+            message = self.next()
+        return message
+
+    def receive(self):
+        """Receives what is available on the socket into the buffer, waiting for something if nothing is. Lets the
+        caller wait for the socket to be ready (e.g. with select) and only then receive, without blocking"""
+        data = self.connection.recv(RECEIVE_SIZE)
+        if not data:
+            raise ConnectionError("the connection was closed")
+        self.buffer += data
+
+
+def receive_hello(connection, timeout=HELLO_TIMEOUT):
+    """Checks whether a client that just connected asked for framed messages, by looking at what it sent without
+    taking it from the socket, and takes the hello out if it did. Clients of the text protocol send nothing before
+    their first action, so the check gives up after a timeout
+
+    Parameters:
+        connection (socket): the socket of the client
+        timeout (float): the number of seconds to wait for the hello
+
+    Returns:
+        (bool): whether or not the client asked for framed messages
+    """
+    deadline = time.monotonic() + timeout
+    data = b""
+    while len(data) < len(HELLO) and HELLO.startswith(data):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([connection], [], [], remaining)[0]:
+            return False
+        received = connection.recv(len(HELLO), socket.MSG_PEEK)
+        if not received:
+            return False
+        if received == data:
+            # Only part of the hello arrived, give the rest a moment
+            time.sleep(0.001)
+        data = received
+    if data != HELLO:
+        return False
+    connection.recv(len(HELLO))
+    return True
+
+
+if __name__ == "__main__":
+    # Round trip of the messages of a game through a socket, with the agents and a visited position on the last
+    # column and row, where the server puts jumps off the board such as "moveto (-1,-1)"
+    obstacles = [[0] * 6 for _ in range(6)]
+    obstacles[1][1] = 1
+    goals = [(3, 3)]
+    agents, visited = [(5, 5), (0, 5)], [(5, 5)]
+    version, board_message = encode_board(obstacles, goals)
+    server, client = socket.socketpair()
+    with server, client:
+        server.sendall(encode_id(0) + board_message + encode_delta(0, 1, agents, visited))
+        reader, mirror = MessageReader(client), Mirror()
+        kind, agent_id = reader.read()
+        assert (kind, agent_id) == (ID, 0)
+        for _ in range(2):
+            mirror.apply(*reader.read())
+    assert mirror.state() == {"agent_id": 0, "agents": agents, "obstacles": obstacles, "goals": goals,
+                              "visited": visited, "round": 1, "board_version": version}, mirror.state()
+    print("The messages of a game round trip")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import importlib.util
+import os
+
+
+def load_server_module(name):
+    """Loads a module of the server from its file, under a name of its own, so that it cannot be mixed up with a
+    module of the client with the same name
+
+    Parameters:
+        name (str): the name of the module in the server directory
+
+    Returns:
+        (module): the module, named "server_" followed by its name
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server", name + ".py")
+    spec = importlib.util.spec_from_file_location("server_" + name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# The board files are read the way the server reads them
+server_world = load_server_module("world")
+
+
+def load_scenario(directory="input_files", round=1):
+    """Builds, from a directory with the files the server reads (see read_board in server/world.py), the state
+    description dictionary the server sends to the maximizing player at the start of its turn, so that the search
+    engines can be run without the server
+
+    Parameters:
+        directory (str): the directory with the board files
+        round (int): the round of the state
+
+    Returns:
+        (dict): the state description dictionary
+    """
+    board = server_world.read_board(directory)
+    obstacles = [[0 for y in range(board["rows"])] for x in range(board["columns"])]
+    for x, y in board["obstacles"]:
+        obstacles[x][y] = 1
+
+    return {"agent_id": 0,
+            "agents": [(x, y) for x, y, _ in board["players"]],
+            "obstacles": obstacles,
+            "goals": board["goals"],
+            "visited": [],
+            "round": round}
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import struct
+
+from bitboard import ACTIONS, ACTION_INDEX, ACTION_OFFSETS
+from move_tables import build_move_tables
+
+UNUSED = 0xFF
+
+HEADER = struct.Struct("<4sHHH20s")
+MAGIC = b"AGTB"
+
+BOARD_FILES = ("gameboard_file.txt", "obstacles_file.txt", "goal_file.txt")
+
+
+def board_files_hash(directory="input_files"):
+    """Returns a hash of the files that describe the board, so that tables built for a board can be found again
+
+    Parameters:
+        directory (str): the directory with the board files
+
+    Returns:
+        (str or None): the hexadecimal hash, or None if some board file cannot be read
+    """
+    digest = hashlib.sha1()
+    for name in BOARD_FILES:
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(name.encode() + b"\0" + f.read() + b"\0")
+        except OSError:
+            return None
+    return digest.hexdigest()
+
+
+def board_digest(obstacle_matrix, goal_positions):
+    """Returns a digest of the board itself, used to check that a stored table belongs to the current board
+
+    Parameters:
+        obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+        goal_positions (list): list of the goal positions
+
+    Returns:
+        (bytes): the 20 byte digest
+    """
+    goals = sorted(tuple(goal) for goal in goal_positions)
+    return hashlib.sha1(repr(([list(column) for column in obstacle_matrix], goals)).encode()).digest()
+
+
+class Tablebase:
+    """Outcome and best action of every state of the game played by alphabeta_oo (the minimizing player tries to reach a
+    goal within the rounds that are left, the maximizing player tries to prevent it) for one board.
+
+    The table is built by backward induction from the end of the game: with 0 rounds left every state is decided, and
+    the states with L rounds left only depend on the states with L or L - 1 rounds left. Each state takes one byte: bit 0
+    is the value (0 if the minimizing player wins, 1 if the maximizing player wins) and the remaining bits are the index
+    of the best action in ACTIONS. States that cannot occur are marked UNUSED."""
+
+    def __init__(self, obstacle_matrix, goal_positions, max_rounds, data=None):
+        """Defines the board the table is about and builds the table, unless it is given
+
+        Parameters:
+            obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+            goal_positions (list): list of the goal positions
+            max_rounds (int): the largest number of rounds left the table covers
+            data (bytes or None): the contents of a table built before
+        """
+        self.columns = len(obstacle_matrix)
+        self.rows = len(obstacle_matrix[0])
+        self.cells = self.columns * self.rows
+        self.max_rounds = max_rounds
+        self.digest = board_digest(obstacle_matrix, goal_positions)
+        if data is None:
+            data = self.build(obstacle_matrix, goal_positions)
+        self.data = data
+
+    def index(self, min_cell, max_cell, is_max_turn, rounds_left):
+        """Returns the position of a state in the table"""
+        return ((rounds_left * 2 + is_max_turn) * self.cells + min_cell) * self.cells + max_cell
+
+    def build(self, obstacle_matrix, goal_positions):
+        """Computes the outcome and best action of every state
+
+        Parameters:
+            obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+            goal_positions (list): list of the goal positions
+
+        Returns:
+            (bytearray): the table
+        """
+        move_table = build_move_tables(obstacle_matrix, goal_positions, dict(zip(ACTIONS, ACTION_OFFSETS)))
+        rows = self.rows
+        moves = {is_max: [() for _ in range(self.cells)] for is_max in (True, False)}
+        for is_max in (True, False):
+            for (x, y), pairs in move_table[is_max].items():
+                moves[is_max][x * rows + y] = tuple((ACTION_INDEX[action], destination[0] * rows + destination[1])
+                                                    for action, destination in pairs)
+
+        free = [x * rows + y for x in range(self.columns) for y in range(rows) if obstacle_matrix[x][y] == 0]
+        goals = {goal[0] * rows + goal[1] for goal in goal_positions}
+        data = bytearray([UNUSED]) * (self.index(0, 0, False, self.max_rounds + 1))
+
+        for rounds_left in range(self.max_rounds + 1):
+            for is_max_turn in (False, True):
+                for min_cell in free:
+                    for max_cell in free:
+                        if min_cell == max_cell or max_cell in goals:
+                            continue
+                        i = self.index(min_cell, max_cell, is_max_turn, rounds_left)
+                        if min_cell in goals:
+                            data[i] = 0
+                        elif rounds_left == 0:
+                            data[i] = 1
+                        elif is_max_turn:
+                            data[i] = self.best_reply(data, moves[True][max_cell], min_cell, is_max_turn, rounds_left)
+                        else:
+                            data[i] = self.best_reply(data, moves[False][min_cell], max_cell, is_max_turn, rounds_left)
+        return data
+
+    def best_reply(self, data, moves, other_cell, is_max_turn, rounds_left):
+        """Computes the entry of a non-terminal state from the entries of the states its moves lead to
+
+        Parameters:
+            data (bytearray): the table, already filled in for the states the moves lead to
+            moves (tuple): the (action index, destination cell) pairs of the next player
+            other_cell (int): the cell of the other player
+            is_max_turn (bool): whether or not the next player is the maximizing player
+            rounds_left (int): the number of rounds left
+
+        Returns:
+            (int): the entry of the state
+        """
+        wanted = 1 if is_max_turn else 0
+        best = None
+        for action_index, destination in moves:
+            if destination == other_cell:
+                continue
+            if is_max_turn:
+                value = data[self.index(other_cell, destination, False, rounds_left)] & 1
+            else:
+                value = data[self.index(destination, other_cell, True, rounds_left - 1)] & 1
+            if value == wanted:
+                return value | action_index << 1
+            if best is None:
+                best = value | action_index << 1
+        return best
+
+    def lookup(self, min_pos, max_pos, is_max_turn, rounds_left):
+        """Returns the outcome and best action of a state
+
+        Parameters:
+            min_pos (tuple): the position of the minimizing player
+            max_pos (tuple): the position of the maximizing player
+            is_max_turn (bool): whether or not the maximizing player is the next to play
+            rounds_left (int): the number of rounds left
+
+        Returns:
+            (int or None): 0 if the minimizing player wins, 1 if the maximizing player wins, None if the state is not
+            covered by the table
+            (str or None): the best action for the next player
+        """
+        if not 0 <= rounds_left <= self.max_rounds:
+            return None, None
+        min_cell = (min_pos[0] % self.columns) * self.rows + min_pos[1] % self.rows
+        max_cell = (max_pos[0] % self.columns) * self.rows + max_pos[1] % self.rows
+        entry = self.data[self.index(min_cell, max_cell, is_max_turn, rounds_left)]
+        if entry == UNUSED:
+            return None, None
+        return entry & 1, ACTIONS[entry >> 1]
+
+    def save(self, path):
+        """Writes the table to a file
+
+        Parameters:
+            path (str): the path of the file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.columns, self.rows, self.max_rounds, self.digest))
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, path, obstacle_matrix, goal_positions):
+        """Reads a table from a file
+
+        Parameters:
+            path (str): the path of the file
+            obstacle_matrix (list): matrix of the current board
+            goal_positions (list): goal positions of the current board
+
+        Returns:
+            (Tablebase or None): the table, or None if the file does not exist or belongs to another board
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(HEADER.size)
+                data = f.read()
+        except OSError:
+            return None
+        if len(header) != HEADER.size:
+            return None
+        magic, columns, rows, max_rounds, digest = HEADER.unpack(header)
+        if magic != MAGIC or digest != board_digest(obstacle_matrix, goal_positions):
+            return None
+        table = cls(obstacle_matrix, goal_positions, max_rounds, data=data)
+        if len(data) != table.index(0, 0, False, max_rounds + 1):
+            return None
+        return table
+
+    @classmethod
+    def load_or_build(cls, obstacle_matrix, goal_positions, max_rounds, directory="tablebases",
+                      board_directory="input_files"):
+        """Returns the table for a board, reading it from disk if it was built before for the same board files and at
+        least as many rounds, or building and storing it otherwise
+
+        Parameters:
+            obstacle_matrix (list): matrix where at indexes [x][y] 1 means there is an obstacle at position (x,y)
+            goal_positions (list): list of the goal positions
+            max_rounds (int): the number of rounds the table must cover
+            directory (str): the directory where tables are stored
+            board_directory (str): the directory with the board files the stored tables are named after
+
+        Returns:
+            (Tablebase): the table
+        """
+        name = board_files_hash(board_directory) or board_digest(obstacle_matrix, goal_positions).hex()
+        path = os.path.join(directory, name + ".tb")
+        table = cls.load(path, obstacle_matrix, goal_positions)
+        if table is None or table.max_rounds < max_rounds:
+            table = cls(obstacle_matrix, goal_positions, max_rounds)
+            table.save(path)
+        return table
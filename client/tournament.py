@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import alphabeta_oo
+from benchmark import ENGINES, configure, run_engine
+# The games are played with the rules of the world of the server, without its sockets
+from scenario import server_world
+
+MIN = "min"
+MAX = "max"
+
+# The engines that play the maximizing player of the game where the minimizing player tries to reach a goal, by name
+MAX_ENGINES = {name: (module, decision, options)
+               for name, module, decision, min_seeks_goal, options in ENGINES if min_seeks_goal}
+
+# The ways the minimizing player can play: a random legal move, the legal move that gets closest to a goal, or the
+# best move found by an alpha-beta search. The first two break ties at random
+MIN_PLAYERS = ("random", "greedy", "search")
+
+# The engine whose states define the legal moves of the minimizing player and the end of the game, as in the clients
+REFERENCE = alphabeta_oo
+
+# The board the games of a worker process are played on (see initialize_worker)
+board = None
+
+
+def initialize_worker(directory):
+    """Reads the board the games are played on. This runs once per worker process, so the board files are read once
+    per worker rather than once per game
+
+    Parameters:
+        directory (str): the directory with the board files
+    """
+    global board
+    board = server_world.read_board(directory)
+
+
+def starting_positions(starts, rng):
+    """Returns the players of a game: the ones of the board files, or the same players placed on random free cells,
+    which are neither obstacles nor goals
+
+    Parameters:
+        starts (str): "board" or "random"
+        rng (Random): the random number generator of the game
+
+    Returns:
+        (list): the players, as (x, y, color)
+    """
+    if starts == "board":
+        return board["players"]
+    blocked = set(board["obstacles"]) | set(board["goals"])
+    free = [(x, y) for x in range(board["columns"]) for y in range(board["rows"]) if (x, y) not in blocked]
+    positions = rng.sample(free, len(board["players"]))
+    return [(x, y, player[2]) for (x, y), player in zip(positions, board["players"])]
+
+
+def min_decision(player, min_pos, max_pos, round, rng):
+    """Chooses the move of the minimizing player
+
+    Parameters:
+        player (str): how the minimizing player plays (see MIN_PLAYERS)
+        min_pos (tuple): the position of the minimizing player
+        max_pos (tuple): the position of the maximizing player
+        round (int): the round of the move, which numbers the state the same way as the one the maximizing player
+        receives after it
+        rng (Random): the random number generator of the game
+
+    Returns:
+        (str): the action
+    """
+    root = REFERENCE.State(False, min_pos, max_pos, round)
+    actions = root.actions()
+    if not actions:
+        return "stay"
+    if player == "random":
+        return rng.choice(actions)
+    if player == "greedy":
+        oracle = REFERENCE.State.distance_oracle
+        distances = {action: oracle.distance_to_goal(root.result(action).min_pos) for action in actions}
+        closest = min(distances.values())
+        return rng.choice([action for action in actions if distances[action] == closest])
+    # The search does not use the transposition table and the move history, which would otherwise hold the results
+    # of the searches of the minimizing player when the maximizing player searches with the same engine
+    tables = REFERENCE.State.transposition_table, REFERENCE.State.move_history
+    REFERENCE.State.transposition_table = REFERENCE.State.move_history = None
+    try:
+        return root.min_value(-1000, 1000, "stay")[0]
+    finally:
+        REFERENCE.State.transposition_table, REFERENCE.State.move_history = tables
+
+
+def max_decision(module, decision, agent, state, rounds):
+    """Chooses the move of the maximizing player with its engine
+
+    Parameters:
+        module (module): the engine
+        decision (str): the name of the decision function, or of the Agent method for object-oriented engines
+        agent (Agent or None): the agent of object-oriented engines
+        state (dict): the state description dictionary the server sends after the move of the minimizing player
+        rounds (int): the number of game rounds
+
+    Returns:
+        (str): the action
+        (int): the number of states the engine generated
+    """
+    if agent is not None:
+        module.State.instances = 0
+        agent.set_state(state)
+    return run_engine(module, decision, agent, state, rounds)
+
+
+def play_game(engine, min_player, game, rounds, starts, seed):
+    """Plays a game between an engine, as the maximizing player, and the minimizing player, in a new world of the
+    server. As in the clients, the game ends when the minimizing player reaches a goal or when the state after
+    a move of the maximizing player is terminal. The games with the same number and seed start from the same
+    positions and have the same random choices, whatever the engine
+
+    Parameters:
+        engine (str): the name of the engine (see MAX_ENGINES)
+        min_player (str): how the minimizing player plays (see MIN_PLAYERS)
+        game (int): the number of the game
+        rounds (int): the number of game rounds
+        starts (str): where the players start (see starting_positions)
+        seed (int): the seed of the random choices
+
+    Returns:
+        (dict): the result of the game, with the time and number of generated states of every move of the maximizing
+        player and the time of every move of the minimizing player
+    """
+    module, decision, options = MAX_ENGINES[engine]
+    rng = random.Random("%d:%d" % (seed, game))
+    players = starting_positions(starts, rng)
+    world = server_world.World(board["columns"], board["rows"])
+    world.add_board(board)
+    agents = [world.add_player(player, nr) for nr, player in enumerate(players)]
+
+    static = {"obstacles": world.view_obstacles(agents[0]), "goals": world.getgoalsposition(agents[0])}
+    configure(REFERENCE, static, rounds)
+    agent = None
+    if hasattr(module, "State"):
+        configure(module, static, rounds)
+        agent = module.Agent(**options)
+
+    min_times, max_times, max_nodes = [], [], []
+    winner = None
+    round = 0
+    while winner is None:
+        round += 1
+        start = time.perf_counter()
+        action = min_decision(min_player, world.getagentposition(agents[0]), world.getagentposition(agents[1]), round,
+                              rng)
+        min_times.append(time.perf_counter() - start)
+        world.act(agents[0], "command " + action)
+        state = world.state(0, agents, round)
+        if state["agents"][0] in state["goals"]:
+            winner = MIN
+            break
+
+        start = time.perf_counter()
+        action, nodes = max_decision(module, decision, agent, state, rounds)
+        max_times.append(time.perf_counter() - start)
+        max_nodes.append(nodes)
+        max_state = REFERENCE.State(True, state["agents"][0], state["agents"][1], state["round"])
+        world.act(agents[1], "command " + action)
+        state = world.state(1, agents, round)
+        if max_state.result(action).is_terminal():
+            winner = MIN if state["agents"][0] in state["goals"] else MAX
+
+    return {"engine": engine,
+            "min": min_player,
+            "game": game,
+            "start": [player[:2] for player in players],
+            "winner": winner,
+            "rounds": round,
+            "max_times": max_times,
+            "max_nodes": max_nodes,
+            "min_times": min_times}
+
+
+def tournament(engines, min_players, games, rounds, scenario="input_files", starts="random", seed=0, workers=None):
+    """Plays every engine against every minimizing player, the same games for all of them, across a pool of worker
+    processes
+
+    Parameters:
+        engines (iterable): the names of the engines (see MAX_ENGINES)
+        min_players (iterable): how the minimizing player plays (see MIN_PLAYERS)
+        games (int): the number of games of every engine against every minimizing player
+        rounds (int): the number of game rounds
+        scenario (str): the directory with the board files
+        starts (str): where the players start (see starting_positions)
+        seed (int): the seed of the random choices
+        workers (int or None): the number of worker processes. With 1, the games are played in this process. With
+        None, there is one per processor
+
+    Returns:
+        (list): the results of the games (see play_game), in the order of the engines, minimizing players and games
+    """
+    tasks = [(engine, min_player, game, rounds, starts, seed)
+             for engine in engines for min_player in min_players for game in range(games)]
+    if workers == 1:
+        initialize_worker(scenario)
+        return [play_game(*task) for task in tasks]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers, initializer=initialize_worker, initargs=(scenario,)) as pool:
+        return list(pool.map(play_game, *zip(*tasks), chunksize=max(1, len(tasks) // (workers * 8))))
+
+
+def percentile(values, p):
+    """Returns a percentile of some values, by the nearest-rank method
+
+    Parameters:
+        values (list): the values
+        p (float): the percentile, from 0 to 100
+
+    Returns:
+        (float or None): the percentile, None if there are no values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def summarize(results):
+    """Sums the results of the games up for every engine and minimizing player: the win rate of the engine, the
+    latency percentiles and the number of generated states of its moves, and how often the games end the same way as
+    with the first engine, which plays the same games
+
+    Parameters:
+        results (list): the results returned by tournament
+
+    Returns:
+        (list): one dictionary per engine and minimizing player
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result["engine"], result["min"]), []).append(result)
+    first_engine = results[0]["engine"] if results else None
+    first_winners = {(result["min"], result["game"]): result["winner"]
+                     for result in results if result["engine"] == first_engine}
+    summary = []
+    for (engine, min_player), group in groups.items():
+        times = [t for result in group for t in result["max_times"]]
+        nodes = [n for result in group for n in result["max_nodes"]]
+        same_outcome = sum(result["winner"] == first_winners[(result["min"], result["game"])] for result in group)
+        summary.append({"engine": engine,
+                        "min": min_player,
+                        "games": len(group),
+                        "max_win_rate": sum(result["winner"] == MAX for result in group) / len(group),
+                        "mean_rounds": sum(result["rounds"] for result in group) / len(group),
+                        "moves": len(times),
+                        "latency_p50": percentile(times, 50),
+                        "latency_p90": percentile(times, 90),
+                        "latency_p99": percentile(times, 99),
+                        "latency_max": max(times) if times else None,
+                        "nodes": sum(nodes),
+                        "nodes_per_move": sum(nodes) / len(nodes) if nodes else None,
+                        "nodes_p99": percentile(nodes, 99),
+                        "nodes_per_second": sum(nodes) / sum(times) if sum(times) > 0 else None,
+                        "same_outcome": same_outcome / len(group)})
+    return summary
+
+
+def format_table(summary):
+    """Formats the summary of a tournament as a text table, with the latencies in milliseconds
+
+    Parameters:
+        summary (list): the summary returned by summarize
+
+    Returns:
+        (str): the table
+    """
+    def milliseconds(seconds):
+        return "-" if seconds is None else "%.3f" % (seconds * 1000)
+
+    header = ("engine", "min", "games", "max wins", "rounds", "p50 (ms)", "p90 (ms)", "p99 (ms)", "max (ms)",
+              "nodes/move", "nodes p99", "nodes/s", "same outcome")
+    rows = [header]
+    for result in summary:
+        rows.append((result["engine"],
+                     result["min"],
+                     str(result["games"]),
+                     "%.1f%%" % (100 * result["max_win_rate"]),
+                     "%.2f" % result["mean_rounds"],
+                     milliseconds(result["latency_p50"]),
+                     milliseconds(result["latency_p90"]),
+                     milliseconds(result["latency_p99"]),
+                     milliseconds(result["latency_max"]),
+                     "-" if result["nodes_per_move"] is None else "%.1f" % result["nodes_per_move"],
+                     "-" if result["nodes_p99"] is None else str(result["nodes_p99"]),
+                     "-" if result["nodes_per_second"] is None else str(int(result["nodes_per_second"])),
+                     "%.1f%%" % (100 * result["same_outcome"])))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def main(engines=("alphabeta_oo",), min_players=("greedy",), games=1000, rounds=7, scenario="input_files",
+         starts="random", seed=0, workers=None, json_path=None):
+    """Plays the tournament, prints the table and, if a path is given, writes the summary and the results of every
+    game as JSON
+
+    Parameters:
+        engines (iterable): the names of the engines (see MAX_ENGINES)
+        min_players (iterable): how the minimizing player plays (see MIN_PLAYERS)
+        games (int): the number of games of every engine against every minimizing player
+        rounds (int): the number of game rounds
+        scenario (str): the directory with the board files
+        starts (str): where the players start (see starting_positions)
+        seed (int): the seed of the random choices
+        workers (int or None): the number of worker processes
+        json_path (str or None): the path of the JSON file to write
+    """
+    start = time.perf_counter()
+    results = tournament(engines, min_players, games, rounds, scenario, starts, seed, workers)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    print(format_table(summary))
+    print("%d games in %.2f s" % (len(results), elapsed))
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump({"scenario": scenario,
+                       "rounds": rounds,
+                       "starts": starts,
+                       "seed": seed,
+                       "summary": summary,
+                       "games": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays engines against the minimizing player without the server")
+    parser.add_argument("--engines", nargs="+", default=["alphabeta_oo"], choices=sorted(MAX_ENGINES),
+                        help="engines of the maximizing player, the first one being the one the others are compared to")
+    parser.add_argument("--min", dest="min_players", nargs="+", default=["greedy"], choices=MIN_PLAYERS,
+                        help="ways the minimizing player plays")
+    parser.add_argument("--games", type=int, default=1000, help="games of every engine against every minimizing player")
+    parser.add_argument("--rounds", type=int, default=7, help="number of game rounds")
+    parser.add_argument("--scenario", default="input_files", help="directory with the board files")
+    parser.add_argument("--starts", default="random", choices=("board", "random"),
+                        help="whether the players start where the board files place them or on random free cells")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random choices")
+    parser.add_argument("--workers", type=int, help="number of worker processes (one per processor by default)")
+    parser.add_argument("--json", dest="json_path", help="file to write the summary and the games to")
+    args = parser.parse_args()
+    main(args.engines, args.min_players, args.games, args.rounds, args.scenario, args.starts, args.seed, args.workers,
+         args.json_path)
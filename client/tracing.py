@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+from collections import Counter
+
+
+class Tracer:
+    """Receives the events of a search, when attached to an engine. Engines only check whether a tracer is attached,
+    so that searches without one pay nothing else.
+
+    Every event applies to the current node of the search: on_enter goes down to a child of the current node, through
+    the given action, and makes it the current node. The current node is then left either through on_terminal, when it
+    was decided without exploring its children (the game is over, or its value is already known), or through on_exit,
+    after its children were explored. Both give its value and make its parent the current node again. on_cutoff tells
+    that the remaining children of the current node were pruned, right after the child that caused it.
+
+    Nodes are numbered in the order they are entered, and the path from the root to the current node is kept, so that
+    subclasses only have to record what they need in enter, leave and cutoff."""
+
+    def __init__(self):
+        """Starts with no nodes"""
+        self.nodes = 0
+        self.path = []
+
+    def new_search(self):
+        """Marks the beginning of a new search, whose first node is a new root. Needed after a search was interrupted
+        (e.g. by SearchTimeout), which leaves the path of the node it was exploring behind"""
+        self.path = []
+
+    def on_enter(self, state, action, alpha=None, beta=None):
+        """Goes down to a child of the current node, or to a new root if there is no current node
+
+        Parameters:
+            state (State or dict): the state of the child
+            action (str): the action that resulted in the state
+            alpha (int or None): the alpha value the child is searched with, None if the search has no window
+            beta (int or None): the beta value the child is searched with, None if the search has no window
+        """
+        node = self.nodes
+        self.nodes += 1
+        self.enter(node, self.path[-1] if self.path else None, state, action, alpha, beta)
+        self.path.append(node)
+
+    def on_exit(self, value):
+        """Leaves the current node, after exploring its children
+
+        Parameters:
+            value (int): the value found for the node
+        """
+        self.leave(self.path.pop(), value, False)
+
+    def on_terminal(self, value):
+        """Leaves the current node, which was decided without exploring its children
+
+        Parameters:
+            value (int): the value of the node
+        """
+        self.leave(self.path.pop(), value, True)
+
+    def on_cutoff(self, action, alpha, beta):
+        """Tells that the remaining children of the current node were pruned
+
+        Parameters:
+            action (str): the action that caused the cutoff
+            alpha (int): the alpha value when the cutoff happened
+            beta (int): the beta value when the cutoff happened
+        """
+        self.cutoff(self.path[-1], action, alpha, beta)
+
+    def enter(self, node, parent, state, action, alpha, beta):
+        """Records a node the search entered. Does nothing, subclasses record what they need
+
+        Parameters:
+            node (int): the number of the node
+            parent (int or None): the number of its parent, None for a root
+            state (State or dict): the state of the node
+            action (str): the action that resulted in the state
+            alpha (int or None): the alpha value the node is searched with
+            beta (int or None): the beta value the node is searched with
+        """
+
+    def leave(self, node, value, terminal):
+        """Records the value of a node the search left. Does nothing, subclasses record what they need
+
+        Parameters:
+            node (int): the number of the node
+            value (int): the value of the node
+            terminal (bool): whether or not the node was decided without exploring its children
+        """
+
+    def cutoff(self, node, action, alpha, beta):
+        """Records a cutoff. Does nothing, subclasses record what they need
+
+        Parameters:
+            node (int): the number of the node whose children were pruned
+            action (str): the action that caused the cutoff
+            alpha (int): the alpha value when the cutoff happened
+            beta (int): the beta value when the cutoff happened
+        """
+
+
+class CountingTracer(Tracer):
+    """Only counts the nodes entered, the terminal nodes and the cutoffs at every depth, so it can follow searches of
+    any size. Overrides the events directly, since it does not need to number the nodes."""
+
+    def __init__(self):
+        """Starts with every count at 0"""
+        Tracer.__init__(self)
+        self.depth = 0
+        self.entered = Counter()
+        self.terminals = Counter()
+        self.cutoffs = Counter()
+
+    def new_search(self):
+        """Marks the beginning of a new search (see Tracer.new_search)"""
+        self.depth = 0
+
+    def on_enter(self, state, action, alpha=None, beta=None):
+        self.entered[self.depth] += 1
+        self.depth += 1
+
+    def on_exit(self, value):
+        self.depth -= 1
+
+    def on_terminal(self, value):
+        self.depth -= 1
+        self.terminals[self.depth] += 1
+
+    def on_cutoff(self, action, alpha, beta):
+        self.cutoffs[self.depth - 1] += 1
+
+    def summary(self):
+        """Returns the counts at every depth, as text
+
+        Returns:
+            (str): one line per depth with the number of nodes, terminal nodes and cutoffs
+        """
+        return "\n".join("depth %d: %d nodes, %d terminal, %d cutoffs"
+                         % (depth, self.entered[depth], self.terminals[depth], self.cutoffs[depth])
+                         for depth in sorted(self.entered))
+
+
+class FileTracer(Tracer):
+    """Writes every event to a text file as soon as it happens, one tab-separated line per event, so that trees too
+    large to be kept in memory can be examined afterwards:
+
+        enter   <node>  <parent or ->  <action>    <alpha or -> <beta or ->
+        exit    <node>  <value>
+        terminal    <node>  <value>
+        cutoff  <node>  <action>    <alpha> <beta>
+    """
+
+    def __init__(self, path):
+        """Opens the file, replacing it if it exists
+
+        Parameters:
+            path (str): the path of the file
+        """
+        Tracer.__init__(self)
+        self.file = open(path, "w")
+
+    def enter(self, node, parent, state, action, alpha, beta):
+        self.file.write("enter\t%d\t%s\t%s\t%s\t%s\n" % (node, "-" if parent is None else parent, action,
+                                                        "-" if alpha is None else alpha, "-" if beta is None else beta))
+
+    def leave(self, node, value, terminal):
+        self.file.write("%s\t%d\t%d\n" % ("terminal" if terminal else "exit", node, value))
+
+    def cutoff(self, node, action, alpha, beta):
+        self.file.write("cutoff\t%d\t%s\t%d\t%d\n" % (node, action, alpha, beta))
+
+    def close(self):
+        """Writes what is left in the buffer and closes the file"""
+        self.file.close()
+
+
+class NetworkXTracer(Tracer):
+    """Builds the search tree in a NetworkX graph and draws it to an image file (see tree_layout.py). Every node keeps
+    its value in the "value" attribute, and whether or not a cutoff happened in it in the "cutoff" attribute, and every
+    edge the action in the "action" attribute. NetworkX is imported when the tracer is created and matplotlib when the
+    tree is drawn, so that the engines do not need them when the tree is not visualized."""
+
+    def __init__(self):
+        """Creates an empty graph"""
+        import networkx as nx
+
+        Tracer.__init__(self)
+        self.graph = nx.Graph()
+        self.root = None
+
+    def new_search(self):
+        """Marks the beginning of a new search (see Tracer.new_search) and empties the graph, which only holds the
+        tree of the last search, so that a game traced move after move does not keep the trees of all its moves"""
+        Tracer.new_search(self)
+        self.graph.clear()
+        self.root = None
+
+    def enter(self, node, parent, state, action, alpha, beta):
+        self.graph.add_node(node)
+        if parent is None:
+            self.root = node
+        else:
+            self.graph.add_edge(parent, node, action=action)
+
+    def leave(self, node, value, terminal):
+        self.graph.nodes[node]["value"] = value
+
+    def cutoff(self, node, action, alpha, beta):
+        self.graph.nodes[node]["cutoff"] = True
+
+    def draw(self, path="search_tree.png", radial=True, **level_of_detail):
+        """Draws the tree of the last search to an image file
+
+        Parameters:
+            path (str): the path of the image file, whose extension gives the format (e.g. PNG or SVG)
+            radial (bool): whether the layout is radial or top-down
+            level_of_detail: the parts of the tree to leave out (see LayoutTree)
+        """
+        from tree_layout import LayoutTree, render
+
+        render(LayoutTree.from_graph(self.graph, self.root, **level_of_detail), path, radial)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    """A bounded table that remembers the outcome of positions that were already searched, so that a position reached
+    through a different move order (e.g. "stay" followed by a move, or a move followed by "stay") is not searched
+    again. Entries live in a fixed number of slots indexed by the state key, and a slot is only overwritten by an entry
+    from a newer search or by an entry with at least the same remaining depth."""
+
+    def __init__(self, size=2 ** 16):
+        """Allocates the slots of the table
+
+        Parameters:
+            size (int): the maximum number of entries the table can hold
+        """
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def clear(self):
+        """Forgets every entry, e.g. when the board or the duration of the game changes"""
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """Marks the beginning of a new search, so that the entries of previous searches are the first to be replaced"""
+        self.generation += 1
+
+    def reset_counters(self):
+        """Resets the hit, miss and store counters"""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def lookup(self, key):
+        """Returns the entry stored for a state, if any.
+
+        Parameters:
+            key (int): the compact state key
+
+        Returns:
+            (tuple or None): (key, value, bound, depth, move, generation) or None if the state is not in the table
+        """
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        """Returns the entry stored for a state, if any, without counting it as a hit or a miss.
+
+        Parameters:
+            key (int): the compact state key
+
+        Returns:
+            (tuple or None): (key, value, bound, depth, move, generation) or None if the state is not in the table
+        """
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, value, bound, depth, move):
+        """Stores the outcome of searching a state, unless its slot holds a deeper entry of the current search.
+
+        Parameters:
+            key (int): the compact state key
+            value (int): the value found for the state
+            bound (int): EXACT if value is the minimax value, LOWER if it is a lower bound (the search failed high),
+            UPPER if it is an upper bound (the search failed low)
+            depth (int): the number of rounds that were left to play in the state
+            move (str): the best action found in the state
+        """
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or entry[3] <= depth:
+            self.slots[index] = (key, value, bound, depth, move, self.generation)
+            self.stores += 1
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+import argparse
+import math
+from collections import deque
+
+
+class LayoutTree:
+    """Search tree to be drawn, stored in parallel lists indexed by node, with the nodes in pre-order (every node comes
+    after its parent), which lets the layout be computed in plain loops instead of recursion.
+
+    Level of detail is applied while the tree is built, breadth first, so that the parts that are left out of a huge
+    tree are never read: subtrees below max_depth, nodes beyond the first max_nodes_per_depth of each depth and, with
+    collapse_cutoffs, the children of the nodes where a cutoff happened are left out. A node some of whose children
+    were left out is marked as collapsed."""
+
+    def __init__(self, max_depth=None, max_nodes_per_depth=None, collapse_cutoffs=False):
+        """Starts with an empty tree
+
+        Parameters:
+            max_depth (int or None): the depth of the deepest nodes to keep, None to keep every depth
+            max_nodes_per_depth (int or None): the number of nodes to keep at each depth, None to keep them all
+            collapse_cutoffs (bool): whether or not the children of the nodes where a cutoff happened are left out
+        """
+        self.max_depth = max_depth
+        self.max_nodes_per_depth = max_nodes_per_depth
+        self.collapse_cutoffs = collapse_cutoffs
+        self.parents = []
+        self.depths = []
+        self.values = []
+        self.actions = []
+        self.cutoffs = []
+        self.collapsed = []
+        self.nodes_per_depth = []
+
+    def __len__(self):
+        """Returns the number of nodes"""
+        return len(self.parents)
+
+    def add(self, parent, value, action, cutoff):
+        """Adds a node, unless the level of detail leaves it out
+
+        Parameters:
+            parent (int or None): the index of the parent, None for the root
+            value (int or None): the value of the node
+            action (str or None): the action that resulted in the node
+            cutoff (bool): whether or not a cutoff happened in the node
+
+        Returns:
+            (int or None): the index of the node, None if it was left out
+        """
+        depth = 0 if parent is None else self.depths[parent] + 1
+        if depth == len(self.nodes_per_depth):
+            self.nodes_per_depth.append(0)
+        if self.max_nodes_per_depth is not None and self.nodes_per_depth[depth] >= self.max_nodes_per_depth:
+            self.collapsed[parent] = True
+            return None
+        self.nodes_per_depth[depth] += 1
+        self.parents.append(parent)
+        self.depths.append(depth)
+        self.values.append(value)
+        self.actions.append(action)
+        self.cutoffs.append(cutoff)
+        self.collapsed.append(False)
+        return len(self.parents) - 1
+
+    def expands(self, node, has_children):
+        """Tells whether or not the children of a node are to be added, marking it as collapsed if it has some and
+        they are not
+
+        Parameters:
+            node (int): the index of the node
+            has_children (bool): whether or not the node has children
+
+        Returns:
+            (bool): whether or not the children are to be added
+        """
+        if not has_children:
+            return False
+        if (self.max_depth is not None and self.depths[node] >= self.max_depth) or \
+                (self.collapse_cutoffs and self.cutoffs[node]):
+            self.collapsed[node] = True
+            return False
+        return True
+
+    @classmethod
+    def from_graph(cls, graph, root, **level_of_detail):
+        """Builds the tree from a NetworkX graph, such as the one of NetworkXTracer, where nodes may have a "value" and
+        a "cutoff" attribute and edges an "action" attribute
+
+        Parameters:
+            graph (networkx.Graph): the graph, which must be a tree around the root
+            root: the root node of the graph
+            level_of_detail: the arguments of LayoutTree
+
+        Returns:
+            (LayoutTree): the tree
+        """
+        tree = cls(**level_of_detail)
+        attributes = graph.nodes[root]
+        queue = deque([(root, None, tree.add(None, attributes.get("value"), None, attributes.get("cutoff", False)))])
+        while queue:
+            node, parent_node, index = queue.popleft()
+            children = [child for child in graph.neighbors(node) if child != parent_node]
+            if not tree.expands(index, len(children) > 0):
+                continue
+            for child in children:
+                attributes = graph.nodes[child]
+                child_index = tree.add(index, attributes.get("value"), graph.edges[node, child].get("action"),
+                                       attributes.get("cutoff", False))
+                if child_index is not None:
+                    queue.append((child, node, child_index))
+        return tree.renumbered()
+
+    @classmethod
+    def from_log(cls, log, position, **level_of_detail):
+        """Builds the tree from the records of a search tree log (see tree_log.py), reading only the records of the
+        nodes that are kept
+
+        Parameters:
+            log (TreeLog): the log
+            position (int): the position of the record of the root
+            level_of_detail: the arguments of LayoutTree
+
+        Returns:
+            (LayoutTree): the tree
+        """
+        tree = cls(**level_of_detail)
+        record = log.record(position)
+        queue = deque([(position, tree.add(None, record.value, record.action, record.cutoff))])
+        while queue:
+            position, index = queue.popleft()
+            record = log.record(position)
+            if not tree.expands(index, record.last > record.node):
+                continue
+            for child in log.children(position):
+                child_record = log.record(child)
+                child_index = tree.add(index, child_record.value, child_record.action, child_record.cutoff)
+                if child_index is not None:
+                    queue.append((child, child_index))
+        return tree.renumbered()
+
+    def renumbered(self):
+        """Returns the same tree with the nodes in pre-order, since the tree is built breadth first
+
+        Returns:
+            (LayoutTree): the tree
+        """
+        children = [[] for _ in self.parents]
+        for node, parent in enumerate(self.parents):
+            if parent is not None:
+                children[parent].append(node)
+        order = []
+        stack = [0] if self.parents else []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(reversed(children[node]))
+        index = [0] * len(order)
+        for i, node in enumerate(order):
+            index[node] = i
+
+        tree = LayoutTree(self.max_depth, self.max_nodes_per_depth, self.collapse_cutoffs)
+        tree.parents = [None if self.parents[node] is None else index[self.parents[node]] for node in order]
+        tree.depths = [self.depths[node] for node in order]
+        tree.values = [self.values[node] for node in order]
+        tree.actions = [self.actions[node] for node in order]
+        tree.cutoffs = [self.cutoffs[node] for node in order]
+        tree.collapsed = [self.collapsed[node] for node in order]
+        tree.nodes_per_depth = self.nodes_per_depth
+        return tree
+
+
+def layout(tree, radial=True):
+    """Computes the position of every node of a tree. Each node gets a share of the width of its parent proportional to
+    the number of leaves below it, so that large subtrees are not squeezed. The leaves are counted in one pass from the
+    last node to the first (children come after their parent) and the positions in one pass from the first to the last
+
+    Parameters:
+        tree (LayoutTree): the tree
+        radial (bool): whether the root is at the centre and every depth on a circle around it, or at the top with
+        every depth on a line below it
+
+    Returns:
+        (list): the x coordinate of every node
+        (list): the y coordinate of every node
+    """
+    n = len(tree)
+    if n == 0:
+        return [], []
+    leaves = [0] * n
+    for node in range(n - 1, -1, -1):
+        if leaves[node] == 0:
+            leaves[node] = 1
+        parent = tree.parents[node]
+        if parent is not None:
+            leaves[parent] += leaves[node]
+
+    # left[node] is where the next child of the node starts, which is where the node itself starts until it has one
+    left = [0.0] * n
+    centre = [0.0] * n
+    for node in range(n):
+        parent = tree.parents[node]
+        if parent is not None:
+            left[node] = left[parent]
+            left[parent] += leaves[node] / leaves[0]
+        centre[node] = left[node] + leaves[node] / leaves[0] / 2
+
+    if not radial:
+        return centre, [-depth for depth in tree.depths]
+    xs = [depth * math.cos(2 * math.pi * x) for x, depth in zip(centre, tree.depths)]
+    ys = [depth * math.sin(2 * math.pi * x) for x, depth in zip(centre, tree.depths)]
+    return xs, ys
+
+
+def render(tree, path, radial=True, labels=None, size=20):
+    """Draws a tree to an image file, whose format (e.g. PNG or SVG) is given by its extension. The figure is drawn
+    without pyplot, so nothing is shown and no window blocks the program. Nodes are coloured by value (blue if the
+    minimizing player wins, red if the maximizing player does, grey if unknown), nodes where a cutoff happened are
+    drawn with a black edge and collapsed nodes as triangles
+
+    Parameters:
+        tree (LayoutTree): the tree
+        path (str): the path of the image file
+        radial (bool): whether the layout is radial or top-down (see layout)
+        labels (bool or None): whether or not the values and actions are written, None to write them only for trees
+        small enough for them to be read
+        size (float): the width and height of the image, in inches
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    xs, ys = layout(tree, radial)
+    if labels is None:
+        labels = len(tree) <= 200
+    node_size = max(1.0, min(40.0, 40000.0 / max(1, len(tree))))
+
+    figure = Figure(figsize=(size, size))
+    axes = figure.add_subplot()
+    axes.set_axis_off()
+    axes.set_aspect("equal")
+    axes.add_collection(LineCollection([((xs[parent], ys[parent]), (xs[node], ys[node]))
+                                        for node, parent in enumerate(tree.parents) if parent is not None],
+                                       colors="0.6", linewidths=0.5, zorder=1))
+
+    colours = ["tab:blue" if value == 0 else "tab:red" if value == 1 else "0.5" for value in tree.values]
+    for collapsed, marker in ((False, "o"), (True, "^")):
+        nodes = [node for node in range(len(tree)) if tree.collapsed[node] == collapsed]
+        if nodes:
+            axes.scatter([xs[node] for node in nodes], [ys[node] for node in nodes], s=node_size, marker=marker,
+                         c=[colours[node] for node in nodes],
+                         edgecolors=["black" if tree.cutoffs[node] else "none" for node in nodes], zorder=2)
+    if labels:
+        for node in range(len(tree)):
+            if tree.values[node] is not None:
+                axes.annotate(str(tree.values[node]), (xs[node], ys[node]), fontsize=7, ha="center", va="center")
+            parent = tree.parents[node]
+            if parent is not None and tree.actions[node] is not None:
+                axes.annotate(tree.actions[node], ((xs[node] + xs[parent]) / 2, (ys[node] + ys[parent]) / 2),
+                              fontsize=6, color="0.3", ha="center", va="center")
+    axes.autoscale_view()
+    figure.savefig(path)
+
+
+def main(log_path, image_path, search=-1, radial=True, max_depth=None, max_nodes_per_depth=None,
+         collapse_cutoffs=False):
+    """Draws one of the searches of a search tree log (see tree_log.py) to an image file
+
+    Parameters:
+        log_path (str): the path of the log
+        image_path (str): the path of the image file
+        search (int): the index of the search among the completed ones, negative to count from the last one
+        radial (bool): whether the layout is radial or top-down
+        max_depth (int or None): see LayoutTree
+        max_nodes_per_depth (int or None): see LayoutTree
+        collapse_cutoffs (bool): see LayoutTree
+    """
+    from tree_log import TreeLog
+
+    log = TreeLog(log_path)
+    tree = LayoutTree.from_log(log, log.roots()[search], max_depth=max_depth,
+                               max_nodes_per_depth=max_nodes_per_depth, collapse_cutoffs=collapse_cutoffs)
+    log.close()
+    render(tree, image_path, radial)
+    print("Drew", len(tree), "nodes to", image_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draws a search recorded in a search tree log")
+    parser.add_argument("log", help="search tree log (see tree_log.py)")
+    parser.add_argument("image", help="image file to write, e.g. tree.png or tree.svg")
+    parser.add_argument("--search", type=int, default=-1, help="index of the search, -1 for the last one")
+    parser.add_argument("--top-down", action="store_true", help="draw the tree top-down instead of radially")
+    parser.add_argument("--max-depth", type=int, help="deepest depth to draw")
+    parser.add_argument("--max-nodes-per-depth", type=int, help="largest number of nodes to draw at each depth")
+    parser.add_argument("--collapse-cutoffs", action="store_true",
+                        help="do not draw the children of the nodes where a cutoff happened")
+    args = parser.parse_args()
+    main(args.log, args.image, args.search, not args.top_down, args.max_depth, args.max_nodes_per_depth,
+         args.collapse_cutoffs)
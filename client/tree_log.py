@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+import mmap
+import struct
+import sys
+from collections import namedtuple
+
+from bitboard import ACTIONS, ACTION_INDEX
+from tracing import Tracer
+
+HEADER = struct.Struct("<4sHH")
+MAGIC = b"AGTL"
+VERSION = 1
+
+# Node number, parent number, number of the last node of the subtree, action index, flags, value, alpha and beta
+RECORD = struct.Struct("<IIIBBhhh")
+
+NO_PARENT = 0xFFFFFFFF
+NO_ACTION = 0xFF
+NO_BOUND = -0x8000
+
+CUTOFF = 1
+TERMINAL = 2
+
+Node = namedtuple("Node", ("position", "node", "parent", "last", "action", "cutoff", "terminal", "value", "alpha",
+                           "beta"))
+
+
+class TreeRecorder(Tracer):
+    """Tracer that appends every node of the search to a binary file, as a fixed-size record (see RECORD), so that the
+    trees of deep searches can be examined afterwards (see TreeLog) without ever being held in memory. The only memory
+    it needs is the path from the root to the current node.
+
+    A node is written when the search leaves it, that is, after all of its descendants, and since nodes are numbered in
+    the order they are entered, its descendants are the nodes numbered from its own number to the last number of its
+    subtree, which the record keeps. The records of the subtree of a node are thus the ones right before its own."""
+
+    def __init__(self, path):
+        """Creates the file, replacing it if it exists
+
+        Parameters:
+            path (str): the path of the file
+        """
+        Tracer.__init__(self)
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.entries = []
+        self.cutoff_node = None
+
+    def new_search(self):
+        """Marks the beginning of a new search (see Tracer.new_search)"""
+        Tracer.new_search(self)
+        self.entries = []
+
+    def enter(self, node, parent, state, action, alpha, beta):
+        self.entries.append((NO_PARENT if parent is None else parent,
+                             ACTION_INDEX.get(action, NO_ACTION),
+                             NO_BOUND if alpha is None else alpha,
+                             NO_BOUND if beta is None else beta))
+
+    def leave(self, node, value, terminal):
+        parent, action, alpha, beta = self.entries.pop()
+        flags = (CUTOFF if node == self.cutoff_node else 0) | (TERMINAL if terminal else 0)
+        self.file.write(RECORD.pack(node, parent, self.nodes - 1, action, flags, value, alpha, beta))
+
+    def cutoff(self, node, action, alpha, beta):
+        self.cutoff_node = node
+
+    def close(self):
+        """Writes what is left in the buffer and closes the file"""
+        self.file.close()
+
+
+class TreeLog:
+    """Reads the file written by a TreeRecorder through a memory map, so that only the records that are looked at are
+    read from disk. Records are identified by their position in the file. The roots of the searches are found from the
+    end of the file, and the children of a node from its own record, skipping over the subtree of each child."""
+
+    def __init__(self, path):
+        """Opens and maps the file
+
+        Parameters:
+            path (str): the path of the file
+        """
+        self.file = open(path, "rb")
+        magic, version, record_size = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.file.close()
+            raise ValueError(path + " is not a search tree log")
+        size = self.file.seek(0, 2)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size > HEADER.size else b""
+        self.length = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        """Returns the number of records"""
+        return self.length
+
+    def record(self, position):
+        """Returns the record at a position
+
+        Parameters:
+            position (int): the position of the record, from 0
+
+        Returns:
+            (Node): the record
+        """
+        node, parent, last, action, flags, value, alpha, beta = \
+            RECORD.unpack_from(self.data, HEADER.size + position * RECORD.size)
+        return Node(position,
+                    node,
+                    None if parent == NO_PARENT else parent,
+                    last,
+                    None if action == NO_ACTION else ACTIONS[action],
+                    flags & CUTOFF != 0,
+                    flags & TERMINAL != 0,
+                    value,
+                    None if alpha == NO_BOUND else alpha,
+                    None if beta == NO_BOUND else beta)
+
+    def roots(self):
+        """Returns the positions of the roots of the searches that were completed. The records of searches that were
+        interrupted (e.g. by SearchTimeout) are skipped
+
+        Returns:
+            (list): the positions, in the order the searches were run
+        """
+        roots = []
+        position = self.length - 1
+        while position >= 0:
+            record = self.record(position)
+            if record.parent is None:
+                roots.append(position)
+            position -= record.last - record.node + 1
+        roots.reverse()
+        return roots
+
+    def children(self, position):
+        """Returns the positions of the children of a node
+
+        Parameters:
+            position (int): the position of the node
+
+        Returns:
+            (list): the positions, in the order the children were searched
+        """
+        record = self.record(position)
+        first = position - (record.last - record.node)
+        children = []
+        position -= 1
+        while position >= first:
+            children.append(position)
+            child = self.record(position)
+            position -= child.last - child.node + 1
+        children.reverse()
+        return children
+
+    def subtree(self, position, depth=None):
+        """Rebuilds the subtree of a node, down to a given depth
+
+        Parameters:
+            position (int): the position of the node
+            depth (int or None): the number of levels below the node to rebuild, None for all of them
+
+        Returns:
+            (tuple): the record of the node and the list of the subtrees of its children
+        """
+        if depth == 0:
+            return self.record(position), []
+        return self.record(position), [self.subtree(child, None if depth is None else depth - 1)
+                                       for child in self.children(position)]
+
+    def summary(self, position):
+        """Counts the nodes, terminal nodes and cutoffs of the subtree of a node, reading its records in order
+
+        Parameters:
+            position (int): the position of the node
+
+        Returns:
+            (int): the number of nodes
+            (int): the number of terminal nodes
+            (int): the number of cutoffs
+        """
+        record = self.record(position)
+        nodes = record.last - record.node + 1
+        terminals = cutoffs = 0
+        for offset in range(HEADER.size + (position - nodes + 1) * RECORD.size,
+                            HEADER.size + (position + 1) * RECORD.size, RECORD.size):
+            flags = self.data[offset + 13]
+            terminals += flags & TERMINAL != 0
+            cutoffs += flags & CUTOFF != 0
+        return nodes, terminals, cutoffs
+
+    def close(self):
+        """Unmaps and closes the file"""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+
+def main(path):
+    """Prints, for every search in a log, the value of the root, the number of nodes, terminal nodes and cutoffs and
+    the children of the root
+
+    Parameters:
+        path (str): the path of the log
+    """
+    log = TreeLog(path)
+    for root in log.roots():
+        record = log.record(root)
+        nodes, terminals, cutoffs = log.summary(root)
+        print("Search from node", record.node, "value:", record.value, "nodes:", nodes, "terminal:", terminals,
+              "cutoffs:", cutoffs)
+        for child in log.children(root):
+            child = log.record(child)
+            print("   ", child.action, "value:", child.value, "window:", (child.alpha, child.beta),
+                  "nodes:", child.last - child.node + 1, "cutoff" if child.cutoff else "")
+    log.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
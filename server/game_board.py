@@ -4,6 +4,7 @@ from PIL import Image
 #from PIL import ImageTk
 import time
 import sys
+import world as w
 #------------------------------------------------------------
 # CLASS OBJECT:
 #------------------------------------------------------------
@@ -179,8 +180,10 @@ class GameBoard(tk.Frame):
         self.size = size
         self.color1 = color1
         self.color2 = color1
-        self.objects = []
-        self.places_visited = [] # Places where agents or agent already were.
+        # Objects shown on the board, in the order they were added (a dict, so that they can be removed in constant
+        # time). The rules of the game and the queries about the board are the ones of the world (see world.py), which
+        # the board only shows
+        self.objects = {}
 
         canvas_width = columns * size
         canvas_height = rows * size
@@ -215,20 +218,6 @@ class GameBoard(tk.Frame):
         pass
 
     #------------------------------------------------
-    # SET_PLACES_VISITED and GET_PLACES_VISITED (2020)
-    # Places visited by agents
-    #------------------------------------------------
-    def set_placesVisited(self,place):
-        self.places_visited.append(place)
-    def get_placesVisited(self):
-        return self.places_visited
-
-    def is_inPlaceVisited(self, place):
-        if place in self.places_visited:
-            return True
-        else:
-            return False
-    #------------------------------------------------
     # GET_MAXCOORD
     #------------------------------------------------
 
@@ -323,7 +312,7 @@ class GameBoard(tk.Frame):
         canvas_image = self.canvas.create_image(x, y, image=object.get_image(), tags=(object.get_name(), "piece"), anchor="c")
         object.set_canvasimage(canvas_image)
         self.place(object, x, y)
-        self.objects.append(object)
+        self.objects[object] = None
 
     #------------------------------------------------
     # REMOVE:
@@ -332,7 +321,7 @@ class GameBoard(tk.Frame):
     def remove(self, object):
         #del self.pieces[object.name]
         self.canvas.delete(object.get_name())
-        self.objects.remove(object)
+        del self.objects[object]
         del object
         #self.moving_refresh()
 
@@ -422,106 +411,6 @@ class GameBoard(tk.Frame):
             res = self.turn_south(object)
         return res
 
-    #------------------------------------------------
-    # Move To
-    #------------------------------------------------
-    def move_to(self,object,position):
-        #self.place(object,position[0],position[1])
-        #Test
-
-        return [position[0],position[1]]
-    #------------------------------------------------
-    # MOVE (forward and backward*)
-    # * backward not yet implemented
-    # Find the coordinates to move. The movement is done
-    # after testing obstacles in the function which calls this one
-    #------------------------------------------------
-    def move_north(self,object,movement):
-        if movement =="forward":
-            x = object.get_x()
-            y = object.get_y() - 1
-
-        elif movement == "backward":
-            x = object.get_x()
-            y = object.get_y() + 1
-
-#        self.change_position(object, x, y)
-        x = self.change_x(x)
-        y = self.change_y(y)
-        return (x,y)
-    def move_south(self,object,movement):
-        if movement =="forward":
-            x = object.get_x()
-            y = object.get_y() + 1
-        elif movement == "backward":
-            x = object.get_x()
-            y = object.get_y() - 1
-#       self.change_position(object, x, y)print_step
-        x = self.change_x(x)
-        y = self.change_y(y)
-        return (x,y)
-    def move_east(self,object,movement):
-        if movement =="forward":
-            x = object.get_x() + 1
-            y = object.get_y()
-        elif movement == "backward":
-            x = object.get_x() - 1
-            y = object.get_y()
- #       self.change_position(object, x, y)
-        x = self.change_x(x)
-        y = self.change_y(y)
-        return (x,y)
-    def move_west(self,object,movement):
-        if movement =="forward":
-            x = object.get_x() - 1
-            y = object.get_y()
-        elif movement =="backward":
-            x = object.get_x() + 1
-            y = object.get_y()
-#        self.change_position(object, x, y)
-        x = self.change_x(x)
-        y = self.change_y(y)
-        return (x,y)
-
-    def move_idle(self,object,movement):
-        x = object.get_x()
-        y = object.get_y()
-        return (x,y)
-
-    def is_target_obstacle(self,coordinates):
-        """Test if in the coordinates there is an obstacle"""
-        for obj in self.objects:
-            if isinstance(obj, Obstacle):
-                if obj.get_x() == coordinates[0] and obj.get_y() == coordinates[1]:
-                    return True
-        return False
-
-    def move(self,object,movement):
-        """Moves to direction selected but only if there is no obstacle!"""
-        if object.get_direction()== "north":
-            res = self.move_north(object,movement)
-            if not self.is_target_obstacle(res):
-                self.change_position(object, res[0], res[1])
-
-
-        elif object.get_direction()== "south":
-            res = self.move_south(object,movement)
-            if not self.is_target_obstacle(res):
-                self.change_position(object, res[0], res[1])
-
-        elif object.get_direction()== "east":
-            res = self.move_east(object,movement)
-            if not self.is_target_obstacle(res):
-                self.change_position(object, res[0], res[1])
-
-        elif object.get_direction()== "west":
-            res = self.move_west(object,movement)
-            if not self.is_target_obstacle(res):
-                self.change_position(object, res[0], res[1])
-        else:
-            res = self.move_idle(object,movement)
-        return res
-
     #------------------------------------------------
     # MOVE_HOME ()
     #------------------------------------------------
@@ -562,76 +451,6 @@ class GameBoard(tk.Frame):
         else:
                 return (object.get_x(), object.get_y())
 
-    #------------------------------------------------
-    # GETGOALPOSITION (return the position of the goal)
-    #------------------------------------------------
-    def getgoalsposition(self, object):
-        posgoals =[]
-        for ag in self.objects:
-            if isinstance(ag,Goal):
-                posgoals.append((ag.get_x(), ag.get_y()))
-        return posgoals
-
-    #-------------------------------------------------
-    # GETAGENTPOSITION
-    #-------------------------------------------------
-    def getagentposition(self,object):
-        return (object.get_x(),object.get_y())
-
-    #------------------------------------------------
-    # VIEW OBJECTS (return objects ahead)
-    #------------------------------------------------
-
-    def view_object(self,object,coordinates):
-        """Return the type of object in the position given by 'coordinates'"""
-        res=[]
-        #front = self.getplaceahead(object)
-        for ag in self.objects:
-            if (ag.get_x() == coordinates[0] and ag.get_y() == coordinates[1]):
-                print('There is something in postion:',coordinates)
-                if isinstance(ag,Player):
-                    res.append('player')
-                elif isinstance(ag,Bomb):
-                    res.append('bomb')
-                elif isinstance(ag,BombSound):
-                    res.append('bomb_sound')
-                elif isinstance(ag,Obstacle):
-                    res.append('obstacle')
-                elif isinstance(ag,Goal):
-                    res.append('goal')
-                else:
-                    res.append('unkown')
-        else:
-            pass
-        return res
-
-    def view_weights(self,object,view):
-        if view =="front":
-            front = self.getplaceahead(object)
-            for ag in self.objects:
-                if isinstance(ag,Patch):
-                    if ag.get_x() == front[0] and ag.get_y() == front[1]:
-                        print("Found weights! x=",front[0]," y=",front[1]," weight=",ag.get_weight())
-                        return ag.get_weight()
-            return 0.0
-        else:
-            return 0.0
-
-    def view_global_weights(self,object):
-        weights =[[0 for x in range(self.columns)] for x in range(self.rows)]
-        for ag in self.objects:
-            if isinstance(ag,Patch):
-                weights[ag.get_x()][ag.get_y()]=ag.get_weight()
-        return weights
-
-    def view_obstacles(self, object):
-        obstacles = [[0 for x in range(self.rows)] for x in range(self.columns)]
-        for ag in self.objects:
-            if isinstance(ag, Obstacle):
-                obstacles[ag.get_x()][ag.get_y()] = 1
-        return obstacles
-
-
     def refresh(self, event):
         '''Redraw the board, possibly in response to window being resized'''
         xsize = int((event.width - 1) / self.columns)
@@ -657,3 +476,57 @@ class GameBoard(tk.Frame):
 
 
 
+
+
+#------------------------------------------------------------
+# CLASS WORLDVIEW:
+#------------------------------------------------------------
+class WorldView():
+    """Shows a world (see world.py) on a GameBoard. It is an observer of the world, which creates an object of the
+    board for every entity of the world and moves it with the entity."""
+
+    def __init__(self, root, board, images_directory):
+        self.root = root
+        self.board = board
+        self.images_directory = images_directory
+        self.views = {}
+
+    def added(self, entity):
+        if isinstance(entity, w.Player):
+            #imageDir,name,image_name,x,y,dir,view_type,width=0,heigh=0,color="white"
+            object = Player(self.images_directory, entity.get_name(), entity.image_name, entity.get_x(), entity.get_y(),
+                            'south', 'front', True, entity.get_color())
+            object.set_home(entity.get_home())
+            object.close_eyes()
+        elif isinstance(entity, w.Patch):
+            object = Patch(self.images_directory, entity.get_name(), entity.image_name, entity.get_x(), entity.get_y(),
+                           entity.get_weight(), False)
+        elif isinstance(entity, w.Obstacle):
+            object = Obstacle(self.images_directory, entity.get_name(), entity.get_x(), entity.get_y())
+        elif isinstance(entity, w.Goal):
+            object = Goal(self.images_directory, entity.get_name(), entity.get_x(), entity.get_y())
+        elif isinstance(entity, w.BombSound):
+            object = BombSound(self.images_directory, entity.get_name(), entity.get_x(), entity.get_y())
+        else:
+            object = Bomb(self.images_directory, entity.get_name(), entity.get_x(), entity.get_y())
+        self.views[entity] = object
+        self.board.add(object, entity.get_x(), entity.get_y())
+
+    def removed(self, entity):
+        self.board.remove(self.views.pop(entity))
+
+    def moved(self, entity):
+        self.board.change_position(self.views[entity], entity.get_x(), entity.get_y())
+
+    def print_position(self, entity):
+        self.board.print_position(self.views[entity], entity.get_x(), entity.get_y())
+
+    def steps_view(self, entity):
+        if entity.get_stepsview():
+            self.board.set_stepsview(self.views[entity])
+        else:
+            self.board.reset_stepsview(self.views[entity])
+
+    def update(self):
+        '''Process the events of the window, so that it shows the last changes and keeps responding'''
+        self.root.update()
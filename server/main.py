@@ -12,109 +12,53 @@
 # After each movement, all agents receives information about the world.
 
 #import socket_server as s
-import game_board as gb
+import world as w
+import argparse
+import os
 import socket
 import sys
-import random
-import tkinter as tk
+import select
 import time
 import traceback
+# The framed protocol is shared with the clients
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'client'))
+import protocol
+
+# Longest time the board window goes without being updated while the server waits for an action
+DISPLAY_INTERVAL = 0.05
+# Time to wait for the hello of a client that just connected. Clients send it as soon as they are connected, so it
+# arrives right after the connection is accepted. The clients are accepted one at a time and text clients send
+# nothing, so each of them keeps the next ones waiting this long
+HELLO_TIMEOUT = 0.1
 
 class GameManager:
-    def __init__(self, root:object, board:object,images_directory:str):
-        self.root = root
-        self.board = board
-        self.images_directory = images_directory
+    def __init__(self, world:object, view:object=None, pacing:float=0.0, verbose:bool=True):
+        '''world: the world the game is played in (see world.py)
+        view: the window that shows the world, if any (e.g. a game_board.WorldView, observer of the world). Without
+        one, the game is played headless
+        pacing: number of seconds to wait after every move, so that the game can be followed on the view. With 0, or
+        headless, the server answers as soon as every action is received, which is what batch games want
+        verbose: whether or not to print what happens in the game, at every move'''
+        self.world = world
+        self.view = view
+        self.pacing = pacing
+        self.verbose = verbose
         self.nr_conn = 0
         self.round = 0
-
-    # Note: player[2] is the color of the player.
-    def initialize_player(self, dirImage, player, nr):
-        '''Not only add a player to the board but also return a pointer to this player'''
-#imageDir,name,image_name,x,y,dir,view_type,width=0,heigh=0,color="white"
-        ag = gb.Player(dirImage,'player'+str(nr+1), 'agent'+str(nr+1),player[0], player[1], 'south', 'front',True, player[2])
-        ag.set_home((player[0],player[1]))
-        ag.close_eyes()
-        # Add player ...
-        self.board.add(ag, player[0], player[1])
-        return ag
-
-    def initialize_obstacles(self,dirImage,list_obstacles):
-        i = 1
-        for obst in list_obstacles:
-           ob = gb.Obstacle(dirImage,'ob'+str(i), obst[0], obst[1], 'obstacle'+str(i), False)
-           self.board.add(ob, obst[0],obst[1])
-           i=i+1
-
-    def initialize_goal(self,dirImage,list_goals):
-        # goal = gb.Goal('goal1', 10, 12, 'goal', False)
-        # self.board.add(goal, 10, 12)
-        i=1
-        for g in list_goals:
-            goal = gb.Goal(dirImage,'goal'+str(i),g[0],g[1], 'goal'+str(i), False)
-            self.board.add(goal,g[0],g[1])
-            i = i + 1
-
-    def initialize_bomb(self,dirImage,list_bombs,rows,columns):
-        i = 1
-        for b in list_bombs:
-            bomb = gb.Bomb(dirImage,'bomb'+str(i),b[0],b[1])
-            self.board.add(bomb,b[0],b[1])
-            if b[0] >= rows - 1:
-                new_b = 0
-            else:
-                new_b = b[0]+1
-            bomb_s = gb.BombSound(dirImage,'bomb_sound_s'+str(i),new_b,b[1])
-            self.board.add(bomb_s,new_b,b[1])
-            if b[1] >= columns - 1:
-                new_b = 0
-            else:
-                new_b = b[1]+1
-            bomb_s = gb.BombSound(dirImage,'bomb_sound_e'+str(i),b[0],new_b)
-            self.board.add(bomb_s,b[0],new_b)
-            if b[0] <= 0:
-                new_b = columns - 1
-            else:
-                new_b = b[0]-1
-            bomb_s = gb.BombSound(dirImage,'bomb_sound_n'+str(i),new_b,b[1])
-            self.board.add(bomb_s,new_b,b[1])
-            if b[1] <= 0:
-                new_b = rows - 1
-            else:
-                new_b = b[1]-1
-
-            bomb_s = gb.BombSound(dirImage,'bomb_sound_w'+str(i),b[0],new_b)
-            self.board.add(bomb_s, b[0],new_b)
-            i = i + 1
-
-    def initialize_weights(self,imageDir,rows:int,columns:int):
-        print(columns)
-        print(rows)
-        patch = [[0 for x in range(rows)] for x in range(columns)]
-        print(patch)
-        weight = 1.0
-        name=''
-        for column in range(0, columns):
-            for row in range(0, rows):
-                print("column:", column)
-                print("row:",row)
-                res = random.uniform(0, 1.0)
-                if res <= 0.3:
-                    name = "patch_clear"
-                    weight=1.0
-                elif res <= 0.5:
-                    weight = 1.1#2.0
-                    name = "patch_lighter"
-                elif res <= 0.7:
-                    weight = 1.2 #4.0
-                    name = "patch_middle"
-                elif res <= 1.0:
-                    weight = 1.3 #8.0
-                    name = "patch_heavy"
-                patch[column][row] = gb.Patch(imageDir,'patch' + str(column) + "-" + str(row), name, column, row, weight, False)
-                #print(res)
-                self.board.add(patch[column][row], column, row)
-
+        # Message readers of the clients that asked for framed messages (see protocol.py), by agent id
+        self.readers = dict()
+        # Version of the board the framed clients have and number of visited positions they were sent
+        self.board_version = None
+        self.visited_sent = 0
+        # Encodings of the obstacles and goals, as text and as a framed board message, and the static_version of the
+        # board they were made from, so that they are only made again when the obstacles or goals change
+        self.static_version = None
+        self.static_text = None
+        self.static_message = None
+
+    def initialize_player(self, player, nr):
+        '''Not only add a player to the board but also return a pointer to this player (see World.add_player)'''
+        return self.world.add_player(player, nr)
 
     def message_processing(self,i:int,nr_conn:int, agent:object,data:str,coloring = True):
         ''' This function will process all messages received and  keep the result in a data structure.
@@ -122,118 +66,95 @@ class GameManager:
         i: agent id
         data: message to process
         '''
-        print("BBBBBBBBB",data)
-        type, value = data.split()
-        res = ""
-        # -----------------------
-        # Jumping
-        # -----------------------
-        if type == 'moveto':
-            agent[i].close_eyes()
-            res = self.board.move_to(agent[i],eval(value))
-            if not self.board.is_target_obstacle(res) and not self.board.is_inPlaceVisited(res):
-                self.board.change_position(agent[i],res[0],res[1])
-                # Keep info about all positions occupied by agents in board.
-                self.board.set_placesVisited(res)
-                if coloring:
-                    self.board.print_position(agent[i], res[0], res[1])
-        if type == 'command':
-
-            # -----------------------
-            # movements without considering the direction
-            # of the face of the object but testing the objects
-            # -----------------------
-            #The world must know the initial position of the other agent[i]s!!!!!!
-            if value == 'north':
-                agent[i].close_eyes()
-                res = self.board.move_north(agent[i], 'forward')
-                if not self.board.is_target_obstacle(res):  # NO TERRITORY and not self.board.is_inPlaceVisited(res):
-                    self.board.change_position(agent[i], res[0], res[1])
-                    # Keep info about all positions occupied by agents in board.
-
-                    # NO TERRITORY
-                    # self.board.set_placesVisited(res)
-                    # if coloring:
-                    #    self.board.print_position(agent[i],res[0],res[1])
-
-            elif value == 'south':
-                agent[i].close_eyes()
-                res = self.board.move_south(agent[i], 'forward')
-                if not self.board.is_target_obstacle(res):  # NO TERRITORY and not self.board.is_inPlaceVisited(res):
-                    self.board.change_position(agent[i], res[0], res[1])
-                    # Keep info about all positions occupied by agents in board.
-
-                    # NO TERRITORY
-                    # self.board.set_placesVisited(res)
-                    # if coloring:
-                    #    self.board.print_position(agent[i],res[0],res[1])
-
-
-            elif value == 'east':
-                agent[i].close_eyes()
-                res = self.board.move_east(agent[i], 'forward')
-                if not self.board.is_target_obstacle(res):  # NO TERRITORY and not self.board.is_inPlaceVisited(res):
-                    self.board.change_position(agent[i], res[0], res[1])
-                    # Keep info about all positions occupied by agents in board.
-
-                    # NO TERRITORY
-                    # self.board.set_placesVisited(res)
-                    # if coloring:
-                    #    self.board.print_position(agent[i],res[0],res[1])
-
-            elif value == 'west':
-                agent[i].close_eyes()
-                res = self.board.move_west(agent[i], 'forward')
-                if not self.board.is_target_obstacle(res):  # NO TERRITORY and not self.board.is_inPlaceVisited(res):
-                    self.board.change_position(agent[i], res[0], res[1])
-                    # Keep info about all positions occupied by agents in board.
-
-                    # NO TERRITORY
-                    # self.board.set_placesVisited(res)
-                    # if coloring:
-                    #    self.board.print_position(agent[i],res[0],res[1])
-
-            elif value == 'stay':
-                pass
-
-            elif value == "set_steps":
-                res = self.board.set_stepsview(agent[i])
-            elif value == "reset_steps":
-                res = self.board.reset_stepsview(agent[i])
-
-    #       elif value == "bye" or value == "exit":
-    #            conn.close()
-    #            exit(1)
-
-            else:
-                pass
-
-
+        if self.verbose:
+            print("BBBBBBBBB",data)
+        self.world.act(agent[i], data, coloring)
         # Returned Values
-        # Returned Values
-        #The value returned is: [agendID,[pos_agent[0],pos_agent[1],...],obstacles,goals,positions_already_used]
-        pos_agents = []
-        for j in range(self.nr_conn):
-             pos_agents.append(self.board.getagentposition(agent[j]))
+        #The value returned is the state of the world: agent id, positions of the agents, obstacles, goals, positions
+        #already used and round
+        res = self.world.state(i, agent[:self.nr_conn], self.round)
         # test
-        print("Position of all agents:", pos_agents)
-        # Obstacles
-        pos_obstacles = self.board.view_obstacles(agent[i])
-        # test
-        print('Obstacles:', pos_obstacles)
-        pos_goals = self.board.getgoalsposition(agent[i])
-        print("Goals:",pos_goals)
-        positions_already_used = self.board.get_placesVisited()
-        res = [i,pos_agents,pos_obstacles,pos_goals,positions_already_used]
-
-        res = {"agent_id": i,
-               "agents": pos_agents,
-               "obstacles": pos_obstacles,
-               "goals": pos_goals,
-               "visited": positions_already_used,
-               "round": self.round}
+        if self.verbose:
+            print("Position of all agents:", res["agents"])
+        # Obstacles and goals (these are cached by the world, and only printed when they change)
+        if self.verbose and self.world.static_version != self.static_version:
+            # test
+            print('Obstacles:', res["obstacles"])
+            print("Goals:", res["goals"])
+        return res
+
+    def encode_static(self, agent:object):
+        '''Encodes the obstacles and goals again, only if they changed since they were last encoded.
+        agent: the agent to see them from
+        '''
+        if self.world.static_version != self.static_version:
+            obstacles = self.world.view_obstacles(agent)
+            goals = self.world.getgoalsposition(agent)
+            self.static_version = self.world.static_version
+            self.static_text = (str(obstacles), str(goals))
+            self.static_message = protocol.encode_board(obstacles, goals)
+
+    def text_message(self, state):
+        '''Returns what the text clients must receive after an action: the text of the state, the same as str(state),
+        made of the cached text of the obstacles and goals and of the text of what changes.
+        state: the state of the world returned by message_processing
+        '''
+        obstacles_text, goals_text = self.static_text
+        return str.encode("{'agent_id': %r, 'agents': %r, 'obstacles': %s, 'goals': %s, 'visited': %r, 'round': %r}"
+                          % (state["agent_id"], state["agents"], obstacles_text, goals_text, state["visited"],
+                             state["round"]))
+
+    def framed_messages(self, state):
+        '''Returns what the framed clients must receive after an action: the board, only if it changed since it was
+        last sent, and a delta with the positions of the agents, the round and the positions visited since the last
+        delta.
+        state: the state of the world returned by message_processing
+        '''
+        data = b""
+        version, board_message = self.static_message
+        if version != self.board_version:
+            self.board_version = version
+            data += board_message
+        data += protocol.encode_delta(state["agent_id"], state["round"], state["agents"],
+                                      state["visited"][self.visited_sent:])
+        self.visited_sent = len(state["visited"])
+        return data
+
+    def update_view(self):
+        '''Lets the view show the last changes, if there is one'''
+        if self.view is not None:
+            self.view.update()
+
+    def receive_action(self, i:int):
+        '''Waits for the next action of an agent and returns it, as soon as it is received. The view keeps being
+        updated while waiting.
+        i: agent id
+        '''
+        conn = self.connections[i][0]
+        reader = self.readers.get(i)
+        # Headless, there is nothing to update, so just wait for the socket
+        interval = DISPLAY_INTERVAL if self.view is not None else None
+        while True:
+            if reader is not None:
+                message = reader.next()
+                if message is not None:
+                    return message[1]
+            ready, _, _ = select.select([conn], [], [], interval)
+            if ready:
+                if reader is None:
+                    return conn.recv(1024).decode()
+                reader.receive()
+            else:
+                self.update_view()
 
-        return str(res)
+    def pace(self):
+        '''Waits for the pacing delay, if any, keeping the view updated. Headless, there is nothing to follow'''
+        if self.view is None:
+            return
+        deadline = time.monotonic() + self.pacing
+        while time.monotonic() < deadline:
+            self.view.update()
+            time.sleep(min(DISPLAY_INTERVAL, max(0.0, deadline - time.monotonic())))
 
     def world_state(self,id,nr_agents: int, agent):
         '''The world state returns the data concerning the present world. It builds a list with the following organization:
@@ -248,12 +169,12 @@ class GameManager:
         '''
         pos_agents = []
         for j in range(nr_agents):
-            pos_agents.append(self.board.getagentposition(agent[j]))
+            pos_agents.append(self.world.getagentposition(agent[j]))
         # Test
         print("Position of all agents:", pos_agents)
-        pos_obstacles = self.board.view_obstacles(agent[id])
+        pos_obstacles = self.world.view_obstacles(agent[id])
         print('Obstacles:', pos_obstacles)
-        pos_goals = self.board.getgoalsposition(agent[id])
+        pos_goals = self.world.getgoalsposition(agent[id])
         print("Goals:", pos_goals)
         ws= [id, pos_agents, pos_obstacles, pos_goals]
         return ws
@@ -285,14 +206,21 @@ class GameManager:
                 l = l.split(",")
                 player = (int(l[0]), int(l[1]),str(l[2]).rstrip())
                 players.append(player)
-                agent = self.initialize_player(self.images_directory, player, self.nr_conn)
+                agent = self.initialize_player(player, self.nr_conn)
                 agents.append(agent)
-                # Return the agent id as a tuple (id, <number>)
-                ag_nr = str.encode(str('(id,' + str(self.nr_conn) + ')'))
-                conn.sendto(ag_nr,addr)
+                # Return the agent id as a tuple (id, <number>), or as a framed message to clients that ask for it,
+                # followed by the board, which they keep from then on
+                if protocol.receive_hello(conn, HELLO_TIMEOUT):
+                    self.readers[self.nr_conn] = protocol.MessageReader(conn)
+                    self.encode_static(agent)
+                    self.board_version, board_message = self.static_message
+                    conn.sendall(protocol.encode_id(self.nr_conn) + board_message)
+                else:
+                    ag_nr = str.encode(str('(id,' + str(self.nr_conn) + ')'))
+                    conn.sendto(ag_nr,addr)
                 self.nr_conn += 1
                 l = f.readline()
-                self.root.update()
+                self.update_view()
             f.close()
             #test
             print("Round-robin data receiving from clients.")
@@ -304,92 +232,76 @@ class GameManager:
                         conn = self.connections[i][0]
                         # Send the state of the world first
                         #conn.sendall(ag_nr)
-                        data = conn.recvfrom(1024)
+                        data = self.receive_action(i)
                         #test
-                        print("Server: Data received:", data[0].decode())
-                        return_data = self.message_processing(i,self.nr_conn,agents,data[0].decode())
+                        print("Server: Data received:", data)
+                        return_data = self.message_processing(i,self.nr_conn,agents,data)
                         #The data returned is always the state of the world:
                         #-- map of the obstacles
                         #-- the position of other agents
                         #-- map of goals (points)
                         #-- bombs are invisible and are not yet considered.
-                        encode_data = str.encode(return_data)
-                        self.root.update()
+                        # Text clients receive all of it, framed clients only what changed. Either way, the
+                        # obstacles and goals are only encoded again if they changed
+                        self.encode_static(agents[i])
+                        encode_data = self.text_message(return_data) if len(self.readers) < self.nr_conn else None
+                        framed_data = self.framed_messages(return_data) if self.readers else None
+                        self.update_view()
                         # Send to all agents the new information
                         for j in range(self.nr_conn):
-                          self.connections[j][0].sendto(encode_data,self.connections[j][1])
+                          if j in self.readers:
+                              self.connections[j][0].sendall(framed_data)
+                          else:
+                              self.connections[j][0].sendto(encode_data,self.connections[j][1])
                         #conn.sendall(encode_data)
                         print("Data was sent to all clients!!!!!")
-                        print("waiting 1 seconds...")
-                        time.sleep(1)
+                        self.pace()
+
+
 
+def new_game(board:dict, view:object=None, pacing:float=0.0, verbose:bool=True):
+    '''Returns a GameManager with a new world built from a board read by world.read_board, without the players, which
+    are added as they connect.
+    view: the view of the world, if any, which is made an observer of the world (see GameManager)
+    '''
+    world = w.World(board["columns"], board["rows"])
+    if view is not None:
+        world.add_observer(view)
+    world.add_board(board)
+    gm = GameManager(world, view, pacing, verbose)
+    gm.update_view()
+    return gm
 
 def main():
-    #Host and Port
-    if len(sys.argv) == 3:
-        host, port = sys.argv[1], int(sys.argv[2])
-    else:
-        host = '127.0.0.1'
-        port = 50000
+    parser = argparse.ArgumentParser(description="Game server")
+    parser.add_argument("host", nargs="?", default='127.0.0.1')
+    parser.add_argument("port", nargs="?", type=int, default=50000)
+    # Optional pacing, in seconds after every move, to follow the game on the board
+    parser.add_argument("pacing", nargs="?", type=float, default=0.0)
+    # Without the board window, e.g. for batch simulations or on hosts without a display
+    parser.add_argument("--headless", action="store_true", help="play without showing the board")
+    args = parser.parse_args()
     # Size of the world ...
     print("Starting the Game Board")
-    gameboard_file = 'input_files/gameboard_file.txt'
-    f = open(gameboard_file)
-    l = f.readline().split(",")
-    columns = int(l[0])
-    rows = int(l[1])
-    f.close()
-    root = tk.Tk()
-    images_directory = 'images/'
-    board = gb.GameBoard(root,columns,rows)
-    board.pack(side="top", fill="both", expand="true", padx=4, pady=4)
+    board = w.read_board('input_files')
+    view = None
+    if not args.headless:
+        # Only import Tk when the board is shown, so that headless games run where it is not installed
+        import tkinter as tk
+        import game_board as gb
+        root = tk.Tk()
+        images_directory = 'images/'
+        game_board = gb.GameBoard(root,board["columns"],board["rows"])
+        game_board.pack(side="top", fill="both", expand="true", padx=4, pady=4)
+        view = gb.WorldView(root, game_board, images_directory)
     #BOARD MAANAGER
-    gm = GameManager(root, board,images_directory)
-    # BOARD BOARD:
-    #Read from files: initial agents position
-
-    # Read from files: obstacles ...
-    obstacles_file = 'input_files/obstacles_file.txt'
-    f = open(obstacles_file)
-    obst_list = []
-    for l in f.readlines():
-        l = l.split(",")
-        if len(l) > 1:
-          obst_list.append( (int(l[0]),int(l[1])) )
-
-    gm.initialize_obstacles(images_directory,obst_list)
-    #initialize_obstacles(images_directory,[(0,1),(4,6),(7,6),(6,7),(8,8)])
-    f.close()
-    # Defining the position of 'goals' ...
-    goal_file = 'input_files/goal_file.txt'
-    f = open(goal_file)
-    goal_list = []
-    for l in f.readlines():
-        if len(l) > 1:
-          l = l.split(",")
-          goal_list.append( (int(l[0]),int(l[1])) )
-        #print(goal_list)https://aihub.org/
-    gm.initialize_goal(images_directory,goal_list)
-    f.close()
-    # Defining the bombs position:
-    bomb_file = 'input_files/bomb_file.txt'
-    f = open(bomb_file)
-    bomb_list = []
-    for l in f.readlines():
-        if len(l) > 1:
-          l = l.split(",")
-          bomb_list.append( (int(l[0]),int(l[1])) )
-        #print(bomb_list)
-    gm.initialize_bomb(images_directory,bomb_list,rows,columns)
-    f.close()
-    # Initialize weights ...
-    gm.initialize_weights(images_directory,rows, columns)
-    root.update()
+    gm = new_game(board, view, args.pacing)
     # SERVER SERVER:
     # Starting server ...
     print("Starting the server!"),
     #server = s.Server()
     # Loop ...
-    gm.loop(host,port)
+    gm.loop(args.host,args.port)
 
-main()
+if __name__ == "__main__":
+    main()
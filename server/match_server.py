@@ -0,0 +1,226 @@
+#Match_SERVER
+
+# Many matches at once, each one played as in main.py (round-robin, every agent acts once each time and all agents
+# receive the new state of the world after every action), but in a single process with asyncio, for batch games
+# between programs, e.g. to tune them.
+# Clients connect as they do to main.py, with either protocol, and wait in a lobby until there are as many as the
+# players of the next board. Then a match starts on a new world built from that board and the clients receive their
+# agent id, in the order they connected.
+# A match ends when the first agent (min) reaches a goal, when the round limit is reached (max wins), or when an agent
+# takes longer than the turn timeout to act, sends an action that cannot be played or disconnects (the other side
+# wins). The connections are then closed and the result is printed as a JSON line.
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import main as mn
+import world as w
+import protocol
+
+# The first agent seeks the goals, the other ones block it
+MIN = "min"
+MAX = "max"
+
+# Text actions are "<type> <value>" with nothing after them, so they are split by their form: "moveto (x,y)" ends at
+# its ")" and "command <value>" at the end of one of the values main.py knows, none of which starts another one
+COMMANDS = ("north", "south", "east", "west", "stay", "set_steps", "reset_steps")
+TEXT_ACTION = re.compile(rb"moveto \([^)]*\)|command (?:" + "|".join(COMMANDS).encode() + rb")")
+# Longer text than this that does not start with an action is not one
+MAX_TEXT_ACTION = 1024
+
+def opponent(nr:int):
+    '''The side that wins when the agent with id nr loses'''
+    return MAX if nr == 0 else MIN
+
+async def receive_hello(reader:asyncio.StreamReader, timeout:float=protocol.HELLO_TIMEOUT):
+    '''Checks whether a client that just connected asked for framed messages, as protocol.receive_hello does for
+    sockets. Returns whether or not it did and, if it did not, what it sent, which is the start of its first action.
+    reader: the stream of the client
+    timeout: the number of seconds to wait for the hello
+    '''
+    try:
+        # Only what was read whole is taken from the stream, so giving up on the hello loses nothing
+        data = await asyncio.wait_for(reader.readexactly(len(protocol.HELLO)), timeout)
+    except asyncio.TimeoutError:
+        return False, b""
+    if data == protocol.HELLO:
+        return True, b""
+    return False, data
+
+class Connection:
+    '''A client of the server: its streams, whether it asked for framed messages and what it sent that was not read
+    yet'''
+    def __init__(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter, framed:bool, pending:bytes=b""):
+        self.reader = reader
+        self.writer = writer
+        self.framed = framed
+        self.pending = pending
+
+    async def receive_action(self):
+        '''Waits for the next action of the client and returns it, as soon as it is received'''
+        if self.framed:
+            length, kind = protocol.FRAME.unpack(await self.reader.readexactly(protocol.FRAME.size))
+            return protocol.DECODERS[kind](await self.reader.readexactly(length))
+        # An action can arrive in pieces or together with the next one, what follows it is kept for the next turn
+        while True:
+            action = TEXT_ACTION.match(self.pending)
+            if action is not None:
+                self.pending = self.pending[action.end():]
+                return action.group().decode()
+            if len(self.pending) > MAX_TEXT_ACTION:
+                raise ConnectionError("the client did not send an action")
+            data = await self.reader.read(1024)
+            if not data:
+                raise ConnectionError("the connection was closed")
+            self.pending += data
+
+    def closed(self):
+        '''Whether the client disconnected or the connection was closed'''
+        return self.reader.at_eof() or self.writer.is_closing()
+
+    def close(self):
+        self.writer.close()
+
+class MatchServer:
+    def __init__(self, boards:list, turn_timeout:float=5.0, max_rounds:int=None, results_path:str=None):
+        '''boards: the boards the matches are played on, in turn, as (directory, board read by world.read_board)
+        turn_timeout: the number of seconds an agent has to act, once it received the state of the world
+        max_rounds: the number of rounds after which max wins, None to play until min reaches a goal
+        results_path: the file to append the result of every match to, as a JSON line, if any
+        '''
+        self.boards = boards
+        self.turn_timeout = turn_timeout
+        self.max_rounds = max_rounds
+        self.results_path = results_path
+        # Clients waiting for a match, in the order they connected
+        self.waiting = []
+        self.nr_matches = 0
+        # The matches being played (kept so that their tasks are not garbage collected)
+        self.matches = set()
+
+    async def serve(self, host:str, port:int):
+        listener = await asyncio.start_server(self.connected, host, port, backlog=1024)
+        print("Listening on", host, port)
+        async with listener:
+            await listener.serve_forever()
+
+    async def connected(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        '''Puts a client that connected in the lobby, and starts a match if there are enough clients for it'''
+        try:
+            framed, pending = await receive_hello(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+        self.waiting.append(Connection(reader, writer, framed, pending))
+        # Clients that left the lobby would lose their match at once
+        for player in self.waiting:
+            if player.closed():
+                player.close()
+        self.waiting = [player for player in self.waiting if not player.closed()]
+        directory, board = self.boards[self.nr_matches % len(self.boards)]
+        nr_players = len(board["players"])
+        if len(self.waiting) >= nr_players:
+            players, self.waiting = self.waiting[:nr_players], self.waiting[nr_players:]
+            self.nr_matches += 1
+            match = asyncio.create_task(self.play(self.nr_matches, directory, board, players))
+            self.matches.add(match)
+            match.add_done_callback(self.matches.discard)
+
+    async def send(self, players:list, text:bytes, framed:bytes):
+        '''Sends every client its message, framed or text, and waits until they were all sent. Returns the agent ids of
+        the clients it could not be sent to, because they disconnected'''
+        for player in players:
+            player.writer.write(framed if player.framed else text)
+        results = await asyncio.gather(*(player.writer.drain() for player in players), return_exceptions=True)
+        return [nr for nr, result in enumerate(results) if isinstance(result, ConnectionError)]
+
+    async def play(self, number:int, directory:str, board:dict, players:list):
+        '''Plays a match on a new world built from a board, and reports its result
+        number: the number of the match
+        directory: the directory the board was read from
+        players: the connections of the clients, in the order of their agent ids
+        '''
+        start = time.perf_counter()
+        gm = mn.new_game(board, verbose=False)
+        agents = [gm.initialize_player(player, nr) for nr, player in enumerate(board["players"])]
+        gm.nr_conn = len(agents)
+        # Every client receives its agent id and, if framed, the board it keeps from then on
+        gm.encode_static(agents[0])
+        gm.board_version, board_message = gm.static_message
+        for nr, player in enumerate(players):
+            player.writer.write(protocol.encode_id(nr) + board_message if player.framed
+                                else str.encode('(id,' + str(nr) + ')'))
+        any_text = not all(player.framed for player in players)
+        any_framed = any(player.framed for player in players)
+        winner = reason = None
+        try:
+            while winner is None:
+                gm.round += 1
+                for i, player in enumerate(players):
+                    try:
+                        data = await asyncio.wait_for(player.receive_action(), self.turn_timeout)
+                    except asyncio.TimeoutError:
+                        winner, reason = opponent(i), "timeout"
+                        break
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        winner, reason = opponent(i), "disconnected"
+                        break
+                    except (KeyError, ValueError):
+                        # A framed message of an unknown kind, or an action that is not text
+                        winner, reason = opponent(i), "invalid"
+                        break
+                    try:
+                        state = gm.message_processing(i, gm.nr_conn, agents, data)
+                        gm.encode_static(agents[i])
+                        text = gm.text_message(state) if any_text else None
+                        framed = gm.framed_messages(state) if any_framed else None
+                    except Exception:
+                        # Whatever the world or the encoders cannot take, e.g. "moveto (1, 2)", loses the match
+                        winner, reason = opponent(i), "invalid"
+                        break
+                    failed = await self.send(players, text, framed)
+                    if failed:
+                        winner, reason = opponent(failed[0]), "disconnected"
+                        break
+                    if state["agents"][0] in state["goals"]:
+                        winner, reason = MIN, "goal"
+                        break
+                if winner is None and self.max_rounds is not None and gm.round >= self.max_rounds:
+                    winner, reason = MAX, "rounds"
+        finally:
+            for player in players:
+                player.close()
+            # Every match gets its result line, even one ended by an error of the server
+            self.report({"match": number,
+                         "board": directory,
+                         "winner": winner,
+                         "reason": reason if winner is not None else "error",
+                         "rounds": gm.round,
+                         "seconds": round(time.perf_counter() - start, 3)})
+
+    def report(self, result:dict):
+        line = json.dumps(result)
+        print(line, flush=True)
+        if self.results_path is not None:
+            with open(self.results_path, "a") as f:
+                f.write(line + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Game server that plays many matches at once")
+    parser.add_argument("host", nargs="?", default='127.0.0.1')
+    parser.add_argument("port", nargs="?", type=int, default=50000)
+    parser.add_argument("--boards", nargs="+", default=["input_files"],
+                        help="directories with the board files, which the matches are played on in turn")
+    parser.add_argument("--turn-timeout", type=float, default=5.0, help="seconds an agent has to act")
+    parser.add_argument("--max-rounds", type=int, help="rounds after which max wins")
+    parser.add_argument("--results", dest="results_path", help="file to append the result of every match to")
+    args = parser.parse_args()
+    boards = [(os.path.normpath(directory), w.read_board(directory)) for directory in args.boards]
+    server = MatchServer(boards, args.turn_timeout, args.max_rounds, args.results_path)
+    asyncio.run(server.serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
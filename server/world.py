@@ -0,0 +1,387 @@
+#------------------------------------------------------------
+# WORLD: the rules of the game board, without any display.
+# The Tk board (see game_board.py) is only an observer of the world, so that games can be played headless, e.g. for
+# batch simulations or on hosts without a display.
+#------------------------------------------------------------
+import os
+import random
+
+#------------------------------------------------------------
+# CLASS ENTITY:
+#------------------------------------------------------------
+class Entity():
+    """Every object in the world is an entity, which only has a name and a position"""
+    def __init__(self,name,x,y):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.home = (x,y) #by default
+        self.weight = 0.0
+
+    def get_name(self):
+        return self.name
+    def get_x(self):
+        return self.x
+    def get_y(self):
+        return self.y
+    def set_position(self, x, y):
+        self.x = x
+        self.y = y
+    def set_home(self,home):
+        self.home=home
+    def get_home(self):
+        return self.home
+    def get_weight(self):
+        return self.weight
+
+class Player(Entity):
+    def __init__(self,name,image_name,x,y,color="white"):
+        super().__init__(name,x,y)
+        self.image_name = image_name
+        self.color = color
+        self.steps_view = False
+    def get_color(self):
+        return self.color
+    def get_stepsview(self):
+        return self.steps_view
+
+class Obstacle(Entity):
+    pass
+
+class Goal(Entity):
+    pass
+
+class Bomb(Entity):
+    pass
+
+class BombSound(Entity):
+    pass
+
+class Patch(Entity):
+    def __init__(self,name,image_name,x,y,w):
+        super().__init__(name,x,y)
+        self.image_name = image_name
+        self.weight = w
+
+#------------------------------------------------------------
+# CLASS WORLD:
+#------------------------------------------------------------
+class World():
+    """The board the agents play on: its size, the entities on it and the places visited by agents. Movements wrap
+    around the edges of the board. The methods keep the names they had when they were part of GameBoard, which is now
+    only the view of a world.
+
+    Observers are told about every change: they must have the methods added(entity), removed(entity), moved(entity),
+    print_position(entity) (color the place of a player with its color) and steps_view(entity) (a player started or
+    stopped showing its steps)."""
+
+    def __init__(self, columns=16, rows=16):
+        self.columns = columns
+        self.rows = rows
+        # Entities in the order they were added, entities at every position and entities of every class
+        self.objects = {}
+        self.cells = {}
+        self.objects_by_type = {}
+        # Obstacle matrix and goal positions, built when first asked for and kept until an obstacle or a goal is
+        # added, removed or moved, which also changes static_version
+        self.static_version = 0
+        self.obstacle_matrix = None
+        self.goal_positions = None
+        self.places_visited = [] # Places where agents or agent already were.
+        self.observers = []
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+        for entity in self.objects:
+            observer.added(entity)
+
+    #------------------------------------------------
+    # SETUP: the entities of a board read by read_board
+    #------------------------------------------------
+    # Note: player[2] is the color of the player.
+    def add_player(self, player, nr):
+        '''Not only add a player to the board but also return a pointer to this player'''
+        ag = Player('player'+str(nr+1), 'agent'+str(nr+1),player[0], player[1], player[2])
+        ag.set_home((player[0],player[1]))
+        self.add(ag, player[0], player[1])
+        return ag
+
+    def add_board(self, board):
+        '''Add the obstacles, goals and bombs of a board, and a patch of random weight on every position'''
+        self.add_obstacles(board["obstacles"])
+        self.add_goals(board["goals"])
+        self.add_bombs(board["bombs"], board["rows"], board["columns"])
+        self.add_weights(board["rows"], board["columns"])
+
+    def add_obstacles(self,list_obstacles):
+        i = 1
+        for obst in list_obstacles:
+           ob = Obstacle('ob'+str(i), obst[0], obst[1])
+           self.add(ob, obst[0],obst[1])
+           i=i+1
+
+    def add_goals(self,list_goals):
+        i=1
+        for g in list_goals:
+            goal = Goal('goal'+str(i),g[0],g[1])
+            self.add(goal,g[0],g[1])
+            i = i + 1
+
+    def add_bombs(self,list_bombs,rows,columns):
+        i = 1
+        for b in list_bombs:
+            bomb = Bomb('bomb'+str(i),b[0],b[1])
+            self.add(bomb,b[0],b[1])
+            if b[0] >= rows - 1:
+                new_b = 0
+            else:
+                new_b = b[0]+1
+            bomb_s = BombSound('bomb_sound_s'+str(i),new_b,b[1])
+            self.add(bomb_s,new_b,b[1])
+            if b[1] >= columns - 1:
+                new_b = 0
+            else:
+                new_b = b[1]+1
+            bomb_s = BombSound('bomb_sound_e'+str(i),b[0],new_b)
+            self.add(bomb_s,b[0],new_b)
+            if b[0] <= 0:
+                new_b = columns - 1
+            else:
+                new_b = b[0]-1
+            bomb_s = BombSound('bomb_sound_n'+str(i),new_b,b[1])
+            self.add(bomb_s,new_b,b[1])
+            if b[1] <= 0:
+                new_b = rows - 1
+            else:
+                new_b = b[1]-1
+
+            bomb_s = BombSound('bomb_sound_w'+str(i),b[0],new_b)
+            self.add(bomb_s, b[0],new_b)
+            i = i + 1
+
+    def add_weights(self,rows:int,columns:int):
+        weight = 1.0
+        name=''
+        for column in range(0, columns):
+            for row in range(0, rows):
+                res = random.uniform(0, 1.0)
+                if res <= 0.3:
+                    name = "patch_clear"
+                    weight=1.0
+                elif res <= 0.5:
+                    weight = 1.1#2.0
+                    name = "patch_lighter"
+                elif res <= 0.7:
+                    weight = 1.2 #4.0
+                    name = "patch_middle"
+                elif res <= 1.0:
+                    weight = 1.3 #8.0
+                    name = "patch_heavy"
+                self.add(Patch('patch' + str(column) + "-" + str(row), name, column, row, weight), column, row)
+
+    #------------------------------------------------
+    # ADD, REMOVE and CHANGE_POSITION
+    #------------------------------------------------
+    def add(self, object, x=0, y=0):
+        '''Add entity to the world'''
+        object.set_position(x, y)
+        self.objects[object] = None
+        self.cells.setdefault((x, y), []).append(object)
+        self.objects_by_type.setdefault(type(object), {})[object] = None
+        self.static_changed(object)
+        for observer in self.observers:
+            observer.added(object)
+
+    def remove(self, object):
+        del self.objects[object]
+        self.cells[(object.get_x(), object.get_y())].remove(object)
+        del self.objects_by_type[type(object)][object]
+        self.static_changed(object)
+        for observer in self.observers:
+            observer.removed(object)
+
+    def change_position(self, object, x, y):
+        if (x, y) != (object.get_x(), object.get_y()):
+            self.cells[(object.get_x(), object.get_y())].remove(object)
+            self.cells.setdefault((x, y), []).append(object)
+            object.set_position(x, y)
+            self.static_changed(object)
+        for observer in self.observers:
+            observer.moved(object)
+        return (x,y)
+
+    def static_changed(self, object):
+        """Forget the obstacle matrix and goal positions if the entity added, removed or moved is one of them"""
+        if isinstance(object, (Obstacle, Goal)):
+            self.static_version += 1
+            self.obstacle_matrix = None
+            self.goal_positions = None
+
+    #------------------------------------------------
+    # PLACES VISITED, PRINT_POSITION and STEPS VIEW
+    #------------------------------------------------
+    def set_placesVisited(self,place):
+        self.places_visited.append(place)
+    def get_placesVisited(self):
+        return self.places_visited
+    def is_inPlaceVisited(self, place):
+        return place in self.places_visited
+
+    def print_position(self, object, x, y):
+        """Mark the place of the player with its color, on the observers that show it"""
+        for observer in self.observers:
+            observer.print_position(object)
+
+    def set_stepsview(self, object):
+        object.steps_view = True
+        for observer in self.observers:
+            observer.steps_view(object)
+        return True
+    def reset_stepsview(self, object):
+        object.steps_view = False
+        for observer in self.observers:
+            observer.steps_view(object)
+        return False
+
+    #------------------------------------------------
+    # MOVES: find the coordinates to move to, wrapping around the board. The movement is done after testing
+    # obstacles in the function which calls these ones
+    #------------------------------------------------
+    def get_maxcoord(self):
+        return (self.columns,self.rows)
+
+    def place_at(self, object, dx, dy):
+        return ((object.get_x() + dx) % self.columns, (object.get_y() + dy) % self.rows)
+    def move_to(self,object,position):
+        # Jumps off the board wrap around too, so that positions always fit in the framed messages
+        return [position[0] % self.columns, position[1] % self.rows]
+    def move_north(self,object,movement="forward"):
+        return self.place_at(object, 0, -1 if movement == "forward" else 1)
+    def move_south(self,object,movement="forward"):
+        return self.place_at(object, 0, 1 if movement == "forward" else -1)
+    def move_east(self,object,movement="forward"):
+        return self.place_at(object, 1 if movement == "forward" else -1, 0)
+    def move_west(self,object,movement="forward"):
+        return self.place_at(object, -1 if movement == "forward" else 1, 0)
+
+    #------------------------------------------------
+    # ACTIONS: what the agents send, "moveto (x,y)" or "command <value>"
+    #------------------------------------------------
+    def act(self, object, data, coloring=True):
+        '''Do the action of an agent. Jumps are only done to places without obstacles not visited yet, which are then
+        colored with the color of the agent if coloring, and moves to places without obstacles'''
+        type, value = data.split()
+        if type == 'moveto':
+            res = self.move_to(object,eval(value))
+            if not self.is_target_obstacle(res) and not self.is_inPlaceVisited(res):
+                self.change_position(object,res[0],res[1])
+                # Keep info about all positions occupied by agents in board.
+                self.set_placesVisited(res)
+                if coloring:
+                    self.print_position(object, res[0], res[1])
+        if type == 'command':
+            # Movements without considering the direction of the face of the object but testing the objects
+            moves = {'north': self.move_north, 'south': self.move_south, 'east': self.move_east, 'west': self.move_west}
+            if value in moves:
+                res = moves[value](object, 'forward')
+                if not self.is_target_obstacle(res):  # NO TERRITORY and not self.is_inPlaceVisited(res):
+                    self.change_position(object, res[0], res[1])
+            elif value == "set_steps":
+                self.set_stepsview(object)
+            elif value == "reset_steps":
+                self.reset_stepsview(object)
+
+    def state(self, agent_id, agents, round):
+        '''The state of the world the agents receive after every action: the id of the agent it is seen by, the
+        positions of all agents, obstacles, goals and places already visited, and the round'''
+        return {"agent_id": agent_id,
+                "agents": [self.getagentposition(agent) for agent in agents],
+                "obstacles": self.view_obstacles(agents[agent_id]),
+                "goals": self.getgoalsposition(agents[agent_id]),
+                "visited": self.get_placesVisited(),
+                "round": round}
+
+    #------------------------------------------------
+    # QUERIES
+    #------------------------------------------------
+    def objects_at(self, coordinates):
+        """Return the entities at the position given by 'coordinates', in the order they got there"""
+        return self.cells.get((coordinates[0], coordinates[1]), ())
+
+    def objects_of(self, type):
+        """Return the entities of a class, in the order they were added"""
+        return self.objects_by_type.get(type, {})
+
+    def is_target_obstacle(self,coordinates):
+        """Test if in the coordinates there is an obstacle"""
+        for obj in self.objects_at(coordinates):
+            if isinstance(obj, Obstacle):
+                return True
+        return False
+
+    def getagentposition(self,object):
+        return (object.get_x(),object.get_y())
+
+    def getgoalsposition(self, object):
+        """The list is shared until the goals change (see static_version) and must not be modified"""
+        if self.goal_positions is None:
+            self.goal_positions = [(goal.get_x(), goal.get_y()) for goal in self.objects_of(Goal)]
+        return self.goal_positions
+
+    def view_object(self,object,coordinates):
+        """Return the type of the entities in the position given by 'coordinates'"""
+        names = {Player: 'player', Bomb: 'bomb', BombSound: 'bomb_sound', Obstacle: 'obstacle', Goal: 'goal'}
+        return [names.get(type(entity), 'unkown') for entity in self.objects_at(coordinates)]
+
+    def view_global_weights(self,object):
+        weights = [[0 for x in range(self.rows)] for x in range(self.columns)]
+        for patch in self.objects_of(Patch):
+            weights[patch.get_x()][patch.get_y()] = patch.get_weight()
+        return weights
+
+    def view_obstacles(self, object):
+        """The matrix is shared until the obstacles change (see static_version) and must not be modified"""
+        if self.obstacle_matrix is None:
+            obstacles = [[0 for x in range(self.rows)] for x in range(self.columns)]
+            for obstacle in self.objects_of(Obstacle):
+                obstacles[obstacle.get_x()][obstacle.get_y()] = 1
+            self.obstacle_matrix = obstacles
+        return self.obstacle_matrix
+
+#------------------------------------------------------------
+# BOARD FILES
+#------------------------------------------------------------
+def read_positions(path):
+    '''Read a file with one position per line, as "x,y" and maybe more values after them, which are ignored'''
+    positions = []
+    with open(path) as f:
+        for l in f.readlines():
+            l = l.split(",")
+            if len(l) > 1:
+                positions.append((int(l[0]), int(l[1])))
+    return positions
+
+def read_board(directory='input_files'):
+    '''Reads the files of a board (gameboard_file.txt, obstacles_file.txt, goal_file.txt, bomb_file.txt and
+    players_file.txt) and returns what a game on it is started from: the size of the board, the positions of the
+    obstacles, goals and bombs, and the players, as (x, y, color)
+    directory: the directory with the board files
+    '''
+    f = open(os.path.join(directory, 'gameboard_file.txt'))
+    l = f.readline().split(",")
+    columns = int(l[0])
+    rows = int(l[1])
+    f.close()
+    players = []
+    f = open(os.path.join(directory, 'players_file.txt'))
+    for l in f.readlines():
+        l = l.split(",")
+        if len(l) > 2:
+            players.append((int(l[0]), int(l[1]), str(l[2]).rstrip()))
+    f.close()
+    return {"columns": columns,
+            "rows": rows,
+            "obstacles": read_positions(os.path.join(directory, 'obstacles_file.txt')),
+            "goals": read_positions(os.path.join(directory, 'goal_file.txt')),
+            "bombs": read_positions(os.path.join(directory, 'bomb_file.txt')),
+            "players": players}